@@ -0,0 +1,25 @@
+"""Record the detected date format on column_metadata.
+
+Revision ID: 002_column_date_format
+Revises: 001_initial
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "002_column_date_format"
+down_revision = "001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "column_metadata",
+        sa.Column("date_format", sa.String(64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("column_metadata", "date_format")
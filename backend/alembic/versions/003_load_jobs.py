@@ -0,0 +1,61 @@
+"""Add the load_jobs table for background CSV loads.
+
+Revision ID: 003_load_jobs
+Revises: 002_column_date_format
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+revision = "003_load_jobs"
+down_revision = "002_column_date_format"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    load_job_status = sa.Enum(
+        "queued", "running", "completed", "failed", name="loadjobstatus"
+    )
+    op.create_table(
+        "load_jobs",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "source_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("source_metadata.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("status", load_job_status, default="queued", nullable=False),
+        sa.Column("mode", sa.String(16), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("spool_path", sa.Text, nullable=False),
+        sa.Column("total_bytes", sa.BigInteger, nullable=False),
+        sa.Column("byte_offset", sa.BigInteger, default=0),
+        sa.Column("rows_done", sa.BigInteger, default=0),
+        sa.Column("rows_loaded", sa.BigInteger, default=0),
+        sa.Column("rows_failed", sa.BigInteger, default=0),
+        sa.Column("rows_inserted", sa.BigInteger, default=0),
+        sa.Column("rows_updated", sa.BigInteger, default=0),
+        sa.Column("errors", JSONB),
+        sa.Column("load_method", sa.String(16), nullable=True),
+        sa.Column("error_message", sa.Text, nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("checkpoint_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_load_jobs_status", "load_jobs", ["status"])
+    op.create_index("ix_load_jobs_source_id", "load_jobs", ["source_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("load_jobs")
+    op.execute("DROP TYPE IF EXISTS loadjobstatus")
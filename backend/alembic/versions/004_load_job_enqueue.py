@@ -0,0 +1,25 @@
+"""Let load jobs queue the rows they insert.
+
+Revision ID: 004_load_job_enqueue
+Revises: 003_load_jobs
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "004_load_job_enqueue"
+down_revision = "003_load_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "load_jobs",
+        sa.Column("enqueue", sa.Boolean, nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("load_jobs", "enqueue")
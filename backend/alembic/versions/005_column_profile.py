@@ -0,0 +1,23 @@
+"""Keep the inference profile (null rate, cardinality, range) on column_metadata.
+
+Revision ID: 005_column_profile
+Revises: 004_load_job_enqueue
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+revision = "005_column_profile"
+down_revision = "004_load_job_enqueue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("column_metadata", sa.Column("profile", JSONB, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("column_metadata", "profile")
@@ -0,0 +1,42 @@
+"""Fingerprint each project's column layout so re-uploads can reuse its schema.
+
+Revision ID: 006_source_layout_signature
+Revises: 005_column_profile
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "006_source_layout_signature"
+down_revision = "005_column_profile"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("source_metadata", sa.Column("layout_signature", sa.String(64), nullable=True))
+    op.create_index(
+        "ix_source_metadata_layout_signature", "source_metadata", ["layout_signature"]
+    )
+    # Same as provisioning.layout_signature: sha256 of the sorted, distinct
+    # physical names joined by commas ("C" collation sorts like Python).
+    op.execute(
+        """
+        UPDATE source_metadata s
+        SET layout_signature = encode(sha256(convert_to(c.names, 'UTF8')), 'hex')
+        FROM (
+            SELECT source_id,
+                   string_agg(DISTINCT physical_name COLLATE "C", ','
+                              ORDER BY physical_name COLLATE "C") AS names
+            FROM column_metadata
+            GROUP BY source_id
+        ) c
+        WHERE c.source_id = s.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_source_metadata_layout_signature", table_name="source_metadata")
+    op.drop_column("source_metadata", "layout_signature")
@@ -0,0 +1,52 @@
+"""Record the indexes provisioned on each project table.
+
+Revision ID: 007_index_metadata
+Revises: 006_source_layout_signature
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+revision = "007_index_metadata"
+down_revision = "006_source_layout_signature"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "index_metadata",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "source_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("source_metadata.id", ondelete="CASCADE"),
+        ),
+        sa.Column("index_name", sa.String(63), unique=True, nullable=False),
+        sa.Column("physical_name", sa.String(63), nullable=False),
+        sa.Column("is_unique", sa.Boolean, default=False),
+        sa.Column("status", sa.String(16), nullable=False, server_default="pending"),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_index_metadata_source_id", "index_metadata", ["source_id"])
+    # Existing projects get their unique-ID index planned; the next load
+    # builds it (or adopts the upsert key index if one already exists).
+    # Same naming as provisioning._index_name(table, column, "key").
+    op.execute(
+        """
+        INSERT INTO index_metadata (id, source_id, index_name, physical_name, is_unique)
+        SELECT gen_random_uuid(), s.id,
+               left(s.table_name, 63 - length(c.physical_name) - 5)
+                   || '_' || c.physical_name || '_key',
+               c.physical_name, true
+        FROM column_metadata c JOIN source_metadata s ON s.id = c.source_id
+        WHERE c.is_unique_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("index_metadata")
@@ -0,0 +1,26 @@
+"""Record how each project table is partitioned.
+
+Revision ID: 008_source_partitioning
+Revises: 007_index_metadata
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "008_source_partitioning"
+down_revision = "007_index_metadata"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("source_metadata", sa.Column("partition_strategy", sa.String(8), nullable=True))
+    op.add_column("source_metadata", sa.Column("partition_column", sa.String(63), nullable=True))
+    op.add_column("source_metadata", sa.Column("partition_interval", sa.String(8), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("source_metadata", "partition_interval")
+    op.drop_column("source_metadata", "partition_column")
+    op.drop_column("source_metadata", "partition_strategy")
@@ -0,0 +1,52 @@
+"""Add the schema_changes table for online column type changes.
+
+Revision ID: 009_schema_changes
+Revises: 008_source_partitioning
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+revision = "009_schema_changes"
+down_revision = "008_source_partitioning"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "schema_changes",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "source_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("source_metadata.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("physical_name", sa.String(63), nullable=False),
+        sa.Column("shadow_column", sa.String(63), nullable=False),
+        sa.Column("from_type", sa.String(50), nullable=False),
+        sa.Column("to_type", sa.String(50), nullable=False),
+        sa.Column("date_format", sa.String(64), nullable=True),
+        sa.Column("status", sa.String(16), nullable=False, server_default="queued"),
+        sa.Column("backfill_max_id", sa.BigInteger, nullable=True),
+        sa.Column("last_id", sa.BigInteger, default=0),
+        sa.Column("rows_done", sa.BigInteger, default=0),
+        sa.Column("rows_failed", sa.BigInteger, default=0),
+        sa.Column("error_message", sa.Text, nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+        ),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_schema_changes_status", "schema_changes", ["status"])
+    op.create_index("ix_schema_changes_source_id", "schema_changes", ["source_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("schema_changes")
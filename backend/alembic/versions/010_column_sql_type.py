@@ -0,0 +1,32 @@
+"""Record the SQL type each project column is stored as.
+
+Revision ID: 010_column_sql_type
+Revises: 009_schema_changes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "010_column_sql_type"
+down_revision = "009_schema_changes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("column_metadata", sa.Column("sql_type", sa.String(127), nullable=True))
+    # Existing tables were created with the wide types.
+    op.execute(
+        "UPDATE column_metadata SET sql_type = CASE data_type"
+        " WHEN 'INTEGER' THEN 'BIGINT'"
+        " WHEN 'FLOAT' THEN 'DOUBLE PRECISION'"
+        " WHEN 'BOOLEAN' THEN 'BOOLEAN'"
+        " WHEN 'DATE' THEN 'TIMESTAMP'"
+        " ELSE 'TEXT' END"
+    )
+    op.alter_column("column_metadata", "sql_type", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("column_metadata", "sql_type")
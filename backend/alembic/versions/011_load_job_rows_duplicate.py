@@ -0,0 +1,25 @@
+"""Count upsert rows whose key a later row of the same batch repeated.
+
+Revision ID: 011_load_job_rows_duplicate
+Revises: 010_column_sql_type
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "011_load_job_rows_duplicate"
+down_revision = "010_column_sql_type"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "load_jobs",
+        sa.Column("rows_duplicate", sa.BigInteger, nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("load_jobs", "rows_duplicate")
@@ -0,0 +1,34 @@
+"""Parse a timestamp by pattern, NULL where it does not fit, for type changes.
+
+Revision ID: 012_try_timestamp_function
+Revises: 011_load_job_rows_duplicate
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+revision = "012_try_timestamp_function"
+down_revision = "011_load_job_rows_duplicate"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION qlogic_try_timestamp(value text, pattern text)
+        RETURNS timestamp LANGUAGE plpgsql STABLE SET timezone = 'UTC' AS $$
+        BEGIN
+            IF value IS NULL OR value = '' THEN
+                RETURN NULL;
+            END IF;
+            RETURN to_timestamp(value, pattern) AT TIME ZONE 'UTC';
+        EXCEPTION WHEN data_exception THEN
+            RETURN NULL;
+        END $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS qlogic_try_timestamp(text, text)")
@@ -0,0 +1,22 @@
+"""Record the host whose local spool holds a load job's upload.
+
+Revision ID: 013_load_job_spool_host
+Revises: 012_try_timestamp_function
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "013_load_job_spool_host"
+down_revision = "012_try_timestamp_function"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("load_jobs", sa.Column("spool_host", sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("load_jobs", "spool_host")
@@ -1,9 +1,11 @@
 """Routes for CSV schema inference, table provisioning, and data loading."""
 
+import tempfile
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -12,42 +14,170 @@ from app.schemas.schema_inference import (
     SchemaInferenceResponse,
     ProvisionRequest,
     ProvisionResponse,
-    DataLoadResponse,
+    IndexInfo,
+    PartitionCreateRequest,
+    PartitionInfo,
+    PartitionsResponse,
+    SchemaChangeResponse,
+    SchemaEvolutionRequest,
+    SchemaEvolutionResponse,
+    LoadJobResponse,
+    RejectedRow,
+    RejectsPage,
+    RejectRetryResponse,
 )
-from app.services.inference import infer_schema
-from app.services.provisioning import provision_table
-from app.services.data_loader import load_csv
-from app.services.workspace import get_project_info
+from app.services.file_formats import (
+    ACCEPTED_SUFFIXES,
+    ARROW_FORMATS,
+    UploadFormatError,
+    detect_format,
+    read_csv_head_from_chunks,
+)
+from app.services.inference_cache import InferenceOutcome, infer_csv_head, infer_upload
+from app.services.evolution import (
+    evolve_schema,
+    has_active_change,
+    schedule_index_maintenance,
+    schedule_schema_change,
+)
+from app.services.indexing import build_indexes
+from app.services.partitioning import (
+    PARTITION_RANGE,
+    add_range_partition,
+    check_load_mode,
+    detach_partition,
+    list_partitions,
+)
+from app.services.provisioning import estimate_row_bytes, provision_table
+from app.models.load_job import LoadJob
+from app.models.registry import IndexMetadata
+from app.models.schema_change import SchemaChange
+from app.services.data_loader import retry_rejects
+from app.services.load_jobs import create_load_job, get_load_job, schedule_load_job
+from app.services.rejects import fetch_rejects
+from app.services.workspace import get_project_info, load_project
 
 logger = structlog.get_logger("routes.schema")
 router = APIRouter(prefix="/schema", tags=["Schema"])
 
 
+_UNSUPPORTED_FORMAT = f"Unsupported file type; accepted: {ACCEPTED_SUFFIXES}."
+
+
 @router.post("/infer", response_model=SchemaInferenceResponse)
-async def infer_csv_schema(file: UploadFile = File(...)):
-    """Upload a CSV file and get the inferred schema for each column."""
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are accepted.")
-
-    content = await file.read()
-    max_size = settings.MAX_CSV_SIZE_MB * 1024 * 1024
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File exceeds maximum size of {settings.MAX_CSV_SIZE_MB} MB.",
-        )
+async def infer_csv_schema(
+    file: UploadFile = File(...),
+    full_scan: bool | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Upload a data file and get the inferred schema for each column.
+
+    Accepts CSV (optionally gzip/zstd-compressed, decompressed as a stream)
+    and Parquet/Arrow files, whose column types are read from the file.
 
+    By default CSV types come from the first ``CSV_SAMPLE_ROWS`` rows.
+    ``full_scan=true`` (default ``CSV_INFER_FULL_SCAN``) checks every row in
+    one streaming pass instead, so the types hold for the whole file and
+    ``row_count`` is the file's row count.
+
+    If the headers are exactly a provisioned project's columns, that
+    project's finalized schema is returned (``matched_project_name``)
+    instead; repeat uploads of identical content are answered from a cache.
+    """
+    file_format = detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_FORMAT)
+    if full_scan is None:
+        full_scan = settings.CSV_INFER_FULL_SCAN
+
+    # Uploads over MAX_CSV_SIZE_MB are refused by UploadSizeLimitMiddleware.
     try:
-        columns, row_count = infer_schema(content, max_rows=settings.CSV_SAMPLE_ROWS)
+        outcome = await infer_upload(
+            db,
+            file.file,
+            file_format,
+            full_scan=full_scan,
+            sample_rows=settings.CSV_SAMPLE_ROWS,
+        )
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         logger.exception("csv_parse_failed", filename=file.filename)
-        raise HTTPException(status_code=422, detail="Failed to parse CSV file.")
+        raise HTTPException(status_code=422, detail="Failed to parse the uploaded file.")
+
+    return _inference_response(file.filename, outcome, full_scan)
+
+
+@router.post("/infer/stream", response_model=SchemaInferenceResponse)
+async def infer_streamed_schema(
+    request: Request,
+    filename: str = Query(..., min_length=1),
+    full_scan: bool | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Infer a schema from the raw file sent as the request body.
 
-    logger.info("schema_inferred", filename=file.filename, columns=len(columns), rows=row_count)
+    Same result as ``POST /schema/infer``, but for a sampled CSV only the
+    header and the first ``CSV_SAMPLE_ROWS`` rows are read from the request
+    stream (decompressing as they arrive); the rest of the upload is never
+    received, so latency depends on the sample size, not the file size.
+    Parquet/Arrow files and full scans need the whole file and spool it.
+    """
+    file_format = detect_format(filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_FORMAT)
+    if full_scan is None:
+        full_scan = settings.CSV_INFER_FULL_SCAN
+
+    try:
+        if full_scan or file_format in ARROW_FORMATS:
+            with tempfile.SpooledTemporaryFile(max_size=settings.CSV_READ_CHUNK_SIZE * 16) as spool:
+                async for chunk in request.stream():
+                    spool.write(chunk)
+                spool.seek(0)
+                outcome = await infer_upload(
+                    db,
+                    spool,
+                    file_format,
+                    full_scan=full_scan,
+                    sample_rows=settings.CSV_SAMPLE_ROWS,
+                )
+        else:
+            head, rows = await read_csv_head_from_chunks(
+                request.stream(), file_format, settings.CSV_SAMPLE_ROWS
+            )
+            outcome = await infer_csv_head(db, head, rows, sample_rows=settings.CSV_SAMPLE_ROWS)
+    except HTTPException:
+        raise
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("csv_parse_failed", filename=filename)
+        raise HTTPException(status_code=422, detail="Failed to parse the uploaded file.")
+
+    return _inference_response(filename, outcome, full_scan)
+
+
+def _inference_response(
+    filename: str, outcome: InferenceOutcome, full_scan: bool
+) -> SchemaInferenceResponse:
+    template = outcome.template
+    logger.info(
+        "schema_inferred",
+        filename=filename,
+        columns=len(outcome.columns),
+        rows=outcome.row_count,
+        full_scan=full_scan,
+        cached=outcome.cached,
+        matched_project=template.project_name if template else None,
+    )
     return SchemaInferenceResponse(
-        filename=file.filename,
-        row_count=row_count,
-        columns=columns,
+        filename=filename,
+        row_count=outcome.row_count,
+        columns=outcome.columns,
+        matched_source_id=str(template.id) if template else None,
+        matched_project_name=template.project_name if template else None,
+        cached=outcome.cached,
     )
 
 
@@ -66,6 +196,7 @@ async def provision_project_table(
             project_name=request.project_name,
             columns=request.columns,
             screen_pop_url_template=request.screen_pop_url_template,
+            partitioning=request.partitioning,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -73,50 +204,414 @@ async def provision_project_table(
         logger.exception("provision_failed", project=request.project_name)
         raise HTTPException(status_code=500, detail="Table provisioning failed.")
 
-    logger.info("table_provisioned", project=source.project_name, table=source.table_name)
+    row_bytes, wide_row_bytes = estimate_row_bytes(request.columns, source.columns)
+    logger.info(
+        "table_provisioned",
+        project=source.project_name,
+        table=source.table_name,
+        row_bytes=row_bytes,
+        row_bytes_saved=wide_row_bytes - row_bytes,
+    )
     return ProvisionResponse(
         project_name=source.project_name,
         table_name=source.table_name,
         source_id=str(source.id),
         column_count=len(source.columns),
+        indexes=[_index_info(index) for index in source.indexes],
+        partitions=[p["name"] for p in await list_partitions(db, source.table_name)],
+        column_types={
+            col.physical_name: col.sql_type.strip('"') for col in source.columns
+        },
+        estimated_row_bytes=row_bytes,
+        estimated_row_bytes_saved=wide_row_bytes - row_bytes,
     )
 
 
-@router.post("/{source_id}/load", response_model=DataLoadResponse)
+def _index_info(index: IndexMetadata) -> IndexInfo:
+    return IndexInfo(
+        index_name=index.index_name,
+        column=index.physical_name,
+        unique=index.is_unique,
+        status=index.status,
+        error=index.error,
+    )
+
+
+@router.get("/{source_id}/indexes", response_model=list[IndexInfo])
+async def list_project_indexes(
+    source_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """The project's unique-ID and lookup indexes and whether they are built."""
+    source = await load_project(db, source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    await db.refresh(source, attribute_names=["indexes"])
+    return [_index_info(index) for index in source.indexes]
+
+
+@router.post("/{source_id}/indexes/build", response_model=list[IndexInfo])
+async def build_project_indexes(
+    source_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """Build the project's pending or failed indexes now, concurrently.
+
+    Loads do this on completion; call it after fixing the data behind a
+    failed build (duplicate unique IDs, for instance).
+    """
+    if await get_project_info(db, source_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    await db.close()  # a concurrent build waits for open transactions
+
+    try:
+        indexes = await build_indexes(source_id)
+    except Exception:
+        logger.exception("index_build_failed", source_id=str(source_id))
+        raise HTTPException(status_code=500, detail="Index build failed.")
+    return [_index_info(index) for index in indexes]
+
+
+def _job_response(job: LoadJob) -> LoadJobResponse:
+    return LoadJobResponse(
+        job_id=str(job.id),
+        source_id=str(job.source_id),
+        status=job.status.value,
+        mode=job.mode,
+        enqueue=job.enqueue,
+        filename=job.filename,
+        total_bytes=job.total_bytes,
+        bytes_done=job.byte_offset,
+        percent_complete=job.percent_complete,
+        rows_done=job.rows_done,
+        rows_loaded=job.rows_loaded,
+        rows_inserted=job.rows_inserted,
+        rows_updated=job.rows_updated,
+        rows_duplicate=job.rows_duplicate,
+        rows_unchanged=job.rows_unchanged,
+        rows_failed=job.rows_failed,
+        errors=job.errors or [],
+        load_method=job.load_method,
+        rows_per_second=job.rows_per_second,
+        eta_seconds=job.eta_seconds,
+        error_message=job.error_message,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/{source_id}/load", response_model=LoadJobResponse, status_code=202)
 async def load_csv_data(
     source_id: UUID,
     file: UploadFile = File(...),
+    mode: str = Query("append", pattern="^(append|upsert|replace)$"),
+    enqueue: bool = Query(False),
     db: AsyncSession = Depends(get_db),
 ):
-    """Load CSV data into an already-provisioned project table.
+    """Queue a file load into an already-provisioned project table.
+
+    The upload is spooled and loaded by a background job; poll
+    ``GET /schema/jobs/{job_id}`` for progress.  Rows are streamed and
+    written in batches (COPY where available) with a durable checkpoint
+    every ``DATA_LOAD_COMMIT_EVERY`` batches, so an interrupted load resumes
+    where it stopped.  Rows that fail type conversion are skipped and
+    reported.
 
-    The CSV is streamed and inserted in batches.
-    Rows that fail type conversion are skipped and reported.
+    ``mode=upsert`` refreshes an existing project keyed on its unique ID
+    column instead of appending duplicates.  ``mode=replace`` swaps in a
+    freshly loaded and indexed copy of the table, so agents keep reading a
+    consistent table throughout a full refresh.
+
+    CSV may be gzip/zstd-compressed; Parquet/Arrow files load their typed
+    columns directly, without string conversion.
+
+    ``enqueue=true`` creates a pending work-queue entry for every inserted
+    row as part of the load, so ``POST /workspace/projects/{id}/enqueue`` is
+    not needed afterwards.
     """
-    if not file.filename or not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are accepted.")
+    if detect_format(file.filename) is None:
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_FORMAT)
 
     source = await get_project_info(db, source_id)
     if source is None:
         raise HTTPException(status_code=404, detail="Project not found.")
-
-    content = await file.read()
+    if mode == "upsert" and not any(c.is_unique_id for c in source.columns):
+        raise HTTPException(
+            status_code=400, detail="Upsert requires a column flagged as the unique ID."
+        )
+    key_column = next((c.physical_name for c in source.columns if c.is_unique_id), None)
+    try:
+        check_load_mode(source, mode, key_column)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if mode == "replace" and await has_active_change(db, source_id):
+        raise HTTPException(
+            status_code=409, detail="Wait for the running type change before a replace load."
+        )
 
     try:
-        result = await load_csv(db, source, content)
+        job = await create_load_job(
+            db, source, file.file, file.filename, mode=mode, enqueue=enqueue
+        )
+    except UploadFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception:
-        logger.exception("data_load_failed", source_id=str(source_id))
+        logger.exception("load_job_create_failed", source_id=str(source_id))
         raise HTTPException(status_code=500, detail="Data load failed.")
 
+    schedule_load_job(job.id)
     logger.info(
-        "data_loaded",
+        "load_job_queued",
+        source_id=str(source_id),
+        job_id=str(job.id),
+        mode=mode,
+        enqueue=enqueue,
+        total_bytes=job.total_bytes,
+    )
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=LoadJobResponse)
+async def get_load_job_progress(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """Report a load job's progress: rows done, throughput and ETA."""
+    job = await get_load_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Load job not found.")
+    return _job_response(job)
+
+
+@router.get("/{source_id}/rejects", response_model=RejectsPage)
+async def list_rejected_rows(
+    source_id: UUID,
+    job_id: UUID | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """Page through rows quarantined by earlier loads, optionally for one job."""
+    source = await get_project_info(db, source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+
+    rows, total = await fetch_rejects(
+        db, source.table_name, load_job_id=job_id, limit=limit, offset=offset
+    )
+    return RejectsPage(
+        source_id=str(source_id),
+        total=total,
+        rejects=[RejectedRow(**row) for row in rows],
+    )
+
+
+@router.post("/{source_id}/rejects/retry", response_model=RejectRetryResponse)
+async def retry_rejected_rows(
+    source_id: UUID,
+    job_id: UUID | None = Query(None),
+    mode: str = Query("append", pattern="^(append|upsert)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Re-attempt quarantined rows against the current schema.
+
+    Rows that now convert are loaded and leave the quarantine; the rest
+    stay with an updated reason.
+    """
+    source = await get_project_info(db, source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+
+    try:
+        result = await retry_rejects(db, source, mode=mode, load_job_id=job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("reject_retry_failed", source_id=str(source_id))
+        raise HTTPException(status_code=500, detail="Retrying rejected rows failed.")
+
+    logger.info(
+        "rejects_retried",
         source_id=str(source_id),
         rows_loaded=result.rows_loaded,
         rows_failed=result.rows_failed,
     )
-    return DataLoadResponse(
+    return RejectRetryResponse(
         source_id=str(source_id),
+        mode=mode,
+        rows_retried=result.rows_loaded + result.rows_failed,
         rows_loaded=result.rows_loaded,
+        rows_inserted=result.rows_inserted,
+        rows_updated=result.rows_updated,
+        rows_duplicate=result.rows_duplicate,
+        rows_unchanged=result.rows_unchanged,
         rows_failed=result.rows_failed,
         errors=result.errors,
+        load_method=result.load_method,
+    )
+
+
+async def _partitioned_project(db: AsyncSession, source_id: UUID):
+    source = await get_project_info(db, source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    if source.partition_strategy is None:
+        raise HTTPException(status_code=400, detail="Project is not partitioned.")
+    return source
+
+
+async def _partitions_response(db: AsyncSession, source) -> PartitionsResponse:
+    return PartitionsResponse(
+        source_id=str(source.id),
+        strategy=source.partition_strategy,
+        column=source.partition_column,
+        interval=source.partition_interval,
+        partitions=[PartitionInfo(**p) for p in await list_partitions(db, source.table_name)],
+    )
+
+
+@router.get("/{source_id}/partitions", response_model=PartitionsResponse)
+async def list_project_partitions(
+    source_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """List a partitioned project's partitions, bounds and estimated row counts."""
+    source = await _partitioned_project(db, source_id)
+    return await _partitions_response(db, source)
+
+
+@router.post("/{source_id}/partitions", response_model=PartitionsResponse, status_code=201)
+async def add_project_partition(
+    source_id: UUID,
+    request: PartitionCreateRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Add the range partition for the month or year containing ``day``.
+
+    Rows of that period already in the DEFAULT partition move into it.
+    """
+    source = await _partitioned_project(db, source_id)
+    if source.partition_strategy != PARTITION_RANGE:
+        raise HTTPException(status_code=400, detail="Only range partitions can be added.")
+    try:
+        name = await add_range_partition(
+            db,
+            source.table_name,
+            source.partition_column,
+            request.day,
+            source.partition_interval,
+        )
+        await db.commit()
+    except DBAPIError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e.orig).strip().splitlines()[0])
+
+    logger.info("partition_added", source_id=str(source_id), partition=name)
+    return await _partitions_response(db, source)
+
+
+@router.delete("/{source_id}/partitions/{partition}", response_model=PartitionsResponse)
+async def remove_project_partition(
+    source_id: UUID,
+    partition: str,
+    drop: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+):
+    """Detach a range partition from the project, and drop it if ``drop=true``.
+
+    Its rows leave the project without a slow DELETE; a detached partition
+    stays behind as a standalone table.
+    """
+    source = await _partitioned_project(db, source_id)
+    if source.partition_strategy != PARTITION_RANGE:
+        raise HTTPException(status_code=400, detail="Only range partitions can be removed.")
+    try:
+        await detach_partition(db, source.table_name, partition, drop=drop)
+        await db.commit()
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except DBAPIError as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e.orig).strip().splitlines()[0])
+
+    logger.info("partition_removed", source_id=str(source_id), partition=partition, dropped=drop)
+    return await _partitions_response(db, source)
+
+
+def _change_response(change: SchemaChange) -> SchemaChangeResponse:
+    return SchemaChangeResponse(
+        change_id=str(change.id),
+        source_id=str(change.source_id),
+        column=change.physical_name,
+        from_type=change.from_type,
+        to_type=change.to_type,
+        status=change.status,
+        rows_done=change.rows_done,
+        rows_failed=change.rows_failed,
+        error_message=change.error_message,
+        created_at=change.created_at,
+        finished_at=change.finished_at,
+    )
+
+
+@router.post("/{source_id}/evolve", response_model=SchemaEvolutionResponse)
+async def evolve_project_schema(
+    source_id: UUID,
+    request: SchemaEvolutionRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Change a provisioned project's columns in place, without a reload.
+
+    Send every column as it should become.  New columns, renames
+    (``renamed_from``), display names and flags apply at once; index
+    changes are built concurrently; type changes are backfilled in the
+    background (poll ``GET /schema/changes/{change_id}``).  Agents keep
+    working throughout.
+    """
+    source = await load_project(db, source_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found.")
+
+    try:
+        plan, changes = await evolve_schema(db, source, request.columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DBAPIError as e:
+        await db.rollback()
+        logger.warning("schema_evolution_failed", source_id=str(source_id), error=str(e.orig))
+        raise HTTPException(
+            status_code=409, detail="The table is busy; retry the schema change shortly."
+        )
+
+    schedule_index_maintenance(source, plan)
+    for change in changes:
+        schedule_schema_change(change.id)
+    logger.info(
+        "schema_evolved",
+        source_id=str(source_id),
+        added=len(plan.added),
+        renamed=len(plan.renamed),
+        type_changes=len(changes),
+    )
+    return SchemaEvolutionResponse(
+        source_id=str(source_id),
+        added=[name for name, _ in plan.added],
+        renamed=plan.renamed,
+        updated=[meta.physical_name for meta, _ in plan.updated],
+        indexes_added=[index.index_name for index in plan.indexes_added],
+        indexes_dropped=[index.index_name for index in plan.indexes_dropped],
+        type_changes=[_change_response(change) for change in changes],
     )
+
+
+@router.get("/changes/{change_id}", response_model=SchemaChangeResponse)
+async def get_schema_change(
+    change_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """Report a column type change's backfill progress."""
+    change = await db.get(SchemaChange, change_id)
+    if change is None:
+        raise HTTPException(status_code=404, detail="Schema change not found.")
+    return _change_response(change)
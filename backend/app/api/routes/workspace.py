@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.schemas.workspace import (
     ProjectInfo,
     TaskRecord,
+    RecordPage,
     EnqueueResponse,
     QueueStatsResponse,
     NextTaskResponse,
@@ -86,23 +87,32 @@ async def get_project(source_id: UUID, db: AsyncSession = Depends(get_db)):
 # ── Raw record browsing (kept for admin use) ──────────────────
 
 
-@router.get("/projects/{source_id}/records", response_model=list[TaskRecord])
+@router.get("/projects/{source_id}/records", response_model=RecordPage)
 async def get_records(
     source_id: UUID,
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
+    order_by: str = Query("id", description="id, or an indexed column's physical name"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Fetch records from a project's dynamic table."""
+    """Fetch a page of records from a project's dynamic table."""
     source = await get_project_info(db, source_id)
     if source is None:
         raise HTTPException(status_code=404, detail="Project not found.")
 
-    rows = await fetch_records(db, source, limit=limit, offset=offset)
-    return [
-        TaskRecord(record=row, screen_pop_url=resolve_screen_pop_url(source, row))
-        for row in rows
-    ]
+    try:
+        rows, next_cursor = await fetch_records(
+            db, source, limit=limit, order_by=order_by, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RecordPage(
+        records=[
+            TaskRecord(record=row, screen_pop_url=resolve_screen_pop_url(source, row))
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/projects/{source_id}/records/{record_id}", response_model=TaskRecord)
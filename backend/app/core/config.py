@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 40
     DB_POOL_RECYCLE: int = 3600  # seconds
+    DB_STATEMENT_CACHE_SIZE: int = 500  # prepared statements kept per connection
 
     # ── Auth ───────────────────────────────────────────────────
     JWT_SECRET: str = "CHANGE-ME-IN-PRODUCTION"
@@ -36,8 +37,41 @@ class Settings(BaseSettings):
 
     # ── CSV Processing ─────────────────────────────────────────
     CSV_SAMPLE_ROWS: int = 100
-    MAX_CSV_SIZE_MB: int = 50
+    CSV_INFER_FULL_SCAN: bool = False  # type-check every row instead of the first sample
+    INFERENCE_CACHE_SIZE: int = 256  # inference results kept per process (0 disables)
+    MAX_CSV_SIZE_MB: int = 50  # inference upload limit, enforced as the body streams in
+    CSV_READ_CHUNK_SIZE: int = 64 * 1024  # bytes pulled from the upload per read
     DATA_LOAD_BATCH_SIZE: int = 500
+    DATA_LOAD_METHOD: str = "copy"  # copy | insert
+    DATA_LOAD_CONVERSION: str = "columnar"  # row | columnar
+    DATA_LOAD_QUEUE_DEPTH: int = 4  # converted batches buffered ahead of the writer
+    DATA_LOAD_COMMIT_EVERY: int = 20  # batches between checkpoint commits in load jobs
+    DATA_LOAD_WORKERS: int = 0  # >1 converts row-aligned chunks in a process pool
+    DATA_LOAD_CHUNK_BYTES: int = 4 * 1024 * 1024  # chunk size handed to each worker
+    DATA_LOAD_SWAP_LOCK_TIMEOUT_MS: int = 5000  # max wait for readers when a replace load swaps
+
+    # ── CPU executor ───────────────────────────────────────────
+    CPU_EXECUTOR_WORKERS: int = 4  # threads for inference and parsing (loads have their own)
+
+    # ── Background load jobs ───────────────────────────────────
+    LOAD_JOB_SPOOL_DIR: str = "/tmp/qlogic-load-jobs"  # uploads kept here until loaded
+    LOAD_JOB_SPOOL_SHARED: bool = False  # spool dir is shared storage: any process may run a job
+    LOAD_JOB_POLL_SECONDS: float = 5.0  # how often the worker looks for claimable jobs
+    LOAD_JOB_STALE_SECONDS: int = 300  # running job with an older heartbeat is resumed
+    LOAD_JOB_MAX_CONCURRENT: int = 2  # jobs (and load threads) run at once per API process
+
+    # ── Registry cache ─────────────────────────────────────────
+    REGISTRY_CACHE_TTL_SECONDS: float = 300.0  # project definitions cached per process (0 disables)
+
+    # ── Provisioning ───────────────────────────────────────────
+    PROVISION_COMPACT_TYPES: bool = False  # narrow SQL types from the profile (opt-in)
+
+    # ── Partitioning ───────────────────────────────────────────
+    PARTITION_AHEAD_PERIODS: int = 3  # range partitions kept ready past the current month or year
+
+    # ── Schema evolution ───────────────────────────────────────
+    SCHEMA_BACKFILL_BATCH_SIZE: int = 5000  # rows converted per transaction when retyping
+    SCHEMA_BACKFILL_PAUSE_MS: int = 50  # pause between backfill batches, to leave agents room
 
     # ── CORS ───────────────────────────────────────────────────
     CORS_ORIGINS: list[str] = ["http://localhost:4200"]
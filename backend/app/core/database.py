@@ -10,6 +10,9 @@ engine = create_async_engine(
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_pre_ping=True,
     pool_recycle=settings.DB_POOL_RECYCLE,
+    # asyncpg prepares every statement; keep room for each project's reads
+    # and loads (see app.services.statements).
+    connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
 )
 
 async_session_factory = async_sessionmaker(
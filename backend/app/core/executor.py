@@ -0,0 +1,130 @@
+"""CPU executor: runs parsing and inference off the event loop.
+
+Schema inference and CSV conversion are CPU-bound.  Run inline in a
+coroutine they freeze the event loop, and with it every request on the
+worker (agents polling ``/next`` included), until they finish.  They run
+in a bounded thread pool instead: the loop thread gets the GIL back at
+least every switch interval, so requests keep being served, and
+``CPU_EXECUTOR_WORKERS`` caps how many such tasks a worker runs at once.
+Tasks beyond that wait in the pool's queue; :func:`executor_stats`
+reports how saturated it is.
+
+A data load parses in a thread for as long as it runs, so loads get a
+pool of their own (:func:`run_load_producer`, one thread per
+``LOAD_JOB_MAX_CONCURRENT``) and never hold the threads inference needs.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_load_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+# Saturation counters, updated from the loop and the pool threads.
+_lock = threading.Lock()
+_queued = 0
+_busy = 0
+_completed = 0
+_max_wait = 0.0
+
+
+class _Submission:
+    __slots__ = ("submitted", "started", "abandoned")
+
+    def __init__(self) -> None:
+        self.submitted = time.perf_counter()
+        self.started = False
+        self.abandoned = False
+
+
+def get_cpu_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu"
+        )
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run ``func(*args, **kwargs)`` in the CPU executor and await its result.
+
+    Context variables (such as the structlog request id) are carried over.
+    """
+    global _queued
+    submission = _Submission()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def tracked() -> T:
+        global _queued, _busy, _completed, _max_wait
+        with _lock:
+            if not submission.abandoned:
+                _queued -= 1
+            submission.started = True
+            _busy += 1
+            _max_wait = max(_max_wait, time.perf_counter() - submission.submitted)
+        try:
+            return call()
+        finally:
+            with _lock:
+                _busy -= 1
+                _completed += 1
+
+    with _lock:
+        _queued += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_cpu_executor(), tracked)
+    finally:
+        with _lock:
+            if not submission.started:  # cancelled while still queued
+                submission.abandoned = True
+                _queued -= 1
+
+
+def get_load_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _load_executor
+    if _load_executor is None:
+        _load_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.LOAD_JOB_MAX_CONCURRENT, thread_name_prefix="load"
+        )
+    return _load_executor
+
+
+async def run_load_producer(func: Callable[..., T], /, *args: Any) -> T:
+    """Run a load's batch producer ``func(*args)`` in the load executor."""
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(get_load_executor(), call)
+
+
+def executor_stats() -> dict:
+    """Snapshot of the CPU executor's load, for the health endpoint."""
+    workers = settings.CPU_EXECUTOR_WORKERS
+    with _lock:
+        return {
+            "workers": workers,
+            "busy": _busy,
+            "queued": _queued,
+            "completed": _completed,
+            "saturation": round(_busy / workers, 2),
+            "max_queue_wait_ms": round(_max_wait * 1000, 1),
+        }
+
+
+def shutdown_cpu_executor() -> None:
+    global _executor, _load_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _load_executor is not None:
+        _load_executor.shutdown(wait=False, cancel_futures=True)
+        _load_executor = None
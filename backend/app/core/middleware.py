@@ -1,11 +1,14 @@
-"""Request lifecycle middleware: request IDs, logging, error boundary."""
+"""Request lifecycle middleware: request IDs, logging, error boundary, upload limits."""
 
 import time
 import uuid
 
+from fastapi import HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import Headers
 from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import structlog
 
 from app.core.config import settings
@@ -51,3 +54,60 @@ class ErrorBoundaryMiddleware(BaseHTTPMiddleware):
                 status_code=500,
                 content={"detail": detail},
             )
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies over a size limit without buffering them.
+
+    *limits* maps path prefixes to a maximum body size in bytes.  A declared
+    ``Content-Length`` over the limit is refused before the body is read;
+    otherwise bytes are counted as the route receives them and the request
+    fails with 413 as soon as the limit is passed.
+
+    A plain ASGI middleware, so the body stream reaches the route unbuffered.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int]) -> None:
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self._limit_for(scope) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = Headers(scope=scope).get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            logger.info("upload_too_large", path=scope["path"], content_length=int(declared))
+            await _too_large(limit)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.info("upload_too_large", path=scope["path"], received=received)
+                    raise HTTPException(status_code=413, detail=_too_large_detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _limit_for(self, scope: Scope) -> int | None:
+        path = scope["path"]
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"File exceeds maximum size of {limit // (1024 * 1024)} MB."
+
+
+def _too_large(limit: int) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"detail": _too_large_detail(limit)})
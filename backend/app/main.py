@@ -1,16 +1,27 @@
 """Q-Logic Dynamic Schema Orchestration — FastAPI application entry point."""
 
+import asyncio
 import structlog
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.executor import executor_stats, shutdown_cpu_executor
+from app.services.inference_cache import inference_cache
 from app.core.logging import setup_logging
-from app.core.middleware import RequestIdMiddleware, ErrorBoundaryMiddleware
+from app.core.middleware import (
+    RequestIdMiddleware,
+    ErrorBoundaryMiddleware,
+    UploadSizeLimitMiddleware,
+)
 from app.api.routes import auth, schema, workspace, employees, metrics
+from app.services.evolution import schema_change_worker
+from app.services.load_jobs import load_job_worker
+from app.services.registry_cache import registry_cache, registry_listener
+from app.services.statements import statement_registry
 
 setup_logging()
 logger = structlog.get_logger("app")
@@ -23,7 +34,18 @@ async def lifespan(app: FastAPI):
         # Dev convenience: auto-create tables. Production uses Alembic migrations.
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+    # Picks up queued load jobs and resumes ones interrupted by a crash.
+    worker = asyncio.create_task(load_job_worker())
+    # Resumes column type changes whose backfill was interrupted.
+    change_worker = asyncio.create_task(schema_change_worker())
+    # Drops cached project definitions when any process changes them.
+    listener = asyncio.create_task(registry_listener())
     yield
+    for task in (worker, change_worker, listener):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    shutdown_cpu_executor()
     logger.info("shutdown")
 
 
@@ -35,6 +57,11 @@ app = FastAPI(
 
 # Middleware ordering: outermost executes first.
 # ErrorBoundary catches anything unhandled, RequestId attaches traceability.
+# The upload size guard sits innermost, so its 413s still get CORS headers.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={"/api/schema/infer": settings.MAX_CSV_SIZE_MB * 1024 * 1024},
+)
 app.add_middleware(ErrorBoundaryMiddleware)
 app.add_middleware(RequestIdMiddleware)
 app.add_middleware(
@@ -58,6 +85,30 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/health/executor")
+async def executor_health():
+    """CPU executor saturation: busy/queued inference and parsing tasks."""
+    return executor_stats()
+
+
+@app.get("/api/health/inference-cache")
+async def inference_cache_health():
+    """Schema inference cache: size, hit/miss and eviction counters."""
+    return inference_cache.stats()
+
+
+@app.get("/api/health/registry-cache")
+async def registry_cache_health():
+    """Project registry cache: size, hit rate and whether invalidation is live."""
+    return registry_cache.stats()
+
+
+@app.get("/api/health/statements")
+async def statements_health():
+    """Prebuilt project statements: how many, and how often they were reused."""
+    return statement_registry.stats()
+
+
 @app.get("/api/health/ready")
 async def readiness():
     """Readiness probe — verifies database connectivity."""
@@ -1,14 +1,19 @@
-from app.models.registry import SourceMetadata, ColumnMetadata
+from app.models.registry import SourceMetadata, ColumnMetadata, IndexMetadata
 from app.models.employee import Employee, EmployeeStateLog, TaskLog
 from app.models.queue import RecordQueue
+from app.models.load_job import LoadJob
+from app.models.schema_change import SchemaChange
 from app.models.user import User
 
 __all__ = [
     "SourceMetadata",
     "ColumnMetadata",
+    "IndexMetadata",
     "Employee",
     "EmployeeStateLog",
     "TaskLog",
     "RecordQueue",
+    "LoadJob",
+    "SchemaChange",
     "User",
 ]
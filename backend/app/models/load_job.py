@@ -0,0 +1,126 @@
+import uuid
+import enum
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Enum,
+    Index,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class LoadJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class LoadJob(Base):
+    """A background CSV load and its last durable checkpoint.
+
+    ``byte_offset``/``rows_done`` are committed in the same transaction as
+    the rows they cover, so a crashed job resumes exactly where it stopped.
+    """
+
+    __tablename__ = "load_jobs"
+    __table_args__ = (
+        Index("ix_load_jobs_status", "status"),
+        Index("ix_load_jobs_source_id", "source_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    source_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("source_metadata.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    status: Mapped[LoadJobStatus] = mapped_column(
+        Enum(LoadJobStatus), default=LoadJobStatus.QUEUED, nullable=False
+    )
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+    # Queue loaded rows for agents in the same pipeline as the insert.
+    enqueue: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    spool_path: Mapped[str] = mapped_column(Text, nullable=False)
+    # Host whose local spool holds the upload; only it runs the job, unless
+    # LOAD_JOB_SPOOL_SHARED.  NULL for jobs created before it was recorded.
+    spool_host: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    total_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # Checkpoint
+    byte_offset: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_done: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_loaded: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_failed: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_inserted: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_updated: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_duplicate: Mapped[int] = mapped_column(BigInteger, default=0)
+    errors: Mapped[list[str]] = mapped_column(JSONB, default=list)
+
+    load_method: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    checkpoint_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Bumped by the runner while it is alive; stale heartbeats mark crashed runs.
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    @property
+    def rows_unchanged(self) -> int:
+        return self.rows_loaded - self.rows_inserted - self.rows_updated - self.rows_duplicate
+
+    @property
+    def percent_complete(self) -> float:
+        if self.status == LoadJobStatus.COMPLETED:
+            return 100.0
+        if not self.total_bytes:
+            return 0.0
+        return round(100 * self.byte_offset / self.total_bytes, 1)
+
+    def _elapsed_seconds(self) -> float:
+        end = self.finished_at or self.checkpoint_at
+        if self.started_at is None or end is None:
+            return 0.0
+        return max((end - self.started_at).total_seconds(), 0.0)
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self._elapsed_seconds()
+        if elapsed <= 0:
+            return 0.0
+        return round(self.rows_done / elapsed, 1)
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Remaining time extrapolated from bytes processed so far."""
+        if self.status != LoadJobStatus.RUNNING:
+            return None
+        elapsed = self._elapsed_seconds()
+        if elapsed <= 0 or not self.byte_offset:
+            return None
+        remaining = self.total_bytes - self.byte_offset
+        return round(remaining * elapsed / self.byte_offset, 1)
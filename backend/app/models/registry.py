@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import Index, String, Boolean, DateTime, ForeignKey, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -19,6 +19,12 @@ class SourceMetadata(Base):
     project_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     table_name: Mapped[str] = mapped_column(String(63), unique=True, nullable=False)
     screen_pop_url_template: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Fingerprint of the data columns, to recognise re-uploads of this layout.
+    layout_signature: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # Declarative partitioning of the table, if any (see app.services.partitioning).
+    partition_strategy: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    partition_column: Mapped[str | None] = mapped_column(String(63), nullable=True)
+    partition_interval: Mapped[str | None] = mapped_column(String(8), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -29,6 +35,9 @@ class SourceMetadata(Base):
     columns: Mapped[list["ColumnMetadata"]] = relationship(
         back_populates="source", cascade="all, delete-orphan"
     )
+    indexes: Mapped[list["IndexMetadata"]] = relationship(
+        back_populates="source", cascade="all, delete-orphan"
+    )
 
 
 class ColumnMetadata(Base):
@@ -48,6 +57,43 @@ class ColumnMetadata(Base):
     physical_name: Mapped[str] = mapped_column(String(63), nullable=False)
     display_name: Mapped[str] = mapped_column(String(255), nullable=False)
     data_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    # How the column is stored: _TYPE_MAP's type for data_type, or a narrower
+    # one chosen at provisioning (see app.services.storage_types).
+    sql_type: Mapped[str] = mapped_column(String(127), nullable=False)
     is_unique_id: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Detected layout for DATE columns (strptime pattern or "ISO8601").
+    date_format: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Profile of the inferred sample or file (see app.services.profiling).
+    profile: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
     source: Mapped["SourceMetadata"] = relationship(back_populates="columns")
+
+
+class IndexMetadata(Base):
+    """An index provisioning planned on a dynamic table, and whether it is built.
+
+    Indexes are built with ``CREATE INDEX CONCURRENTLY`` after loads (see
+    app.services.indexing), so a row stays ``pending`` until the first load
+    and is ``failed`` (with the reason) if, for example, a unique index
+    meets duplicate values.
+    """
+
+    __tablename__ = "index_metadata"
+    __table_args__ = (
+        Index("ix_index_metadata_source_id", "source_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    source_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("source_metadata.id", ondelete="CASCADE")
+    )
+    index_name: Mapped[str] = mapped_column(String(63), unique=True, nullable=False)
+    physical_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    is_unique: Mapped[bool] = mapped_column(Boolean, default=False)
+    status: Mapped[str] = mapped_column(String(16), default="pending", nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    built_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    source: Mapped["SourceMetadata"] = relationship(back_populates="indexes")
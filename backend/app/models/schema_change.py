@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DDL, BigInteger, String, Text, DateTime, ForeignKey, Index, event, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class SchemaChange(Base):
+    """A column type change being backfilled in the background.
+
+    The converted values go into ``shadow_column`` in batches of ids up to
+    ``backfill_max_id``; ``last_id`` is committed with each batch, so an
+    interrupted backfill resumes where it stopped.  A trigger converts rows
+    written meanwhile.  Once done, the shadow column replaces the original.
+    Status is queued | running | completed | failed.
+    """
+
+    __tablename__ = "schema_changes"
+    __table_args__ = (
+        Index("ix_schema_changes_status", "status"),
+        Index("ix_schema_changes_source_id", "source_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    source_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("source_metadata.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    physical_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    shadow_column: Mapped[str] = mapped_column(String(63), nullable=False)
+    from_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    to_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    date_format: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="queued", nullable=False)
+
+    # Backfill progress
+    backfill_max_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    rows_done: Mapped[int] = mapped_column(BigInteger, default=0)
+    # Non-empty values that did not convert and became NULL.
+    rows_failed: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Bumped by the runner with every batch; stale heartbeats mark crashed runs.
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+# Parses a date by to_timestamp pattern, NULL where it does not fit; used
+# by type changes to DATE (see app.services.evolution.convert_sql).
+# Migration 012 creates it in production; create_all does here.
+TRY_TIMESTAMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION qlogic_try_timestamp(value text, pattern text)
+RETURNS timestamp LANGUAGE plpgsql STABLE SET timezone = 'UTC' AS $$
+BEGIN
+    IF value IS NULL OR value = '' THEN
+        RETURN NULL;
+    END IF;
+    RETURN to_timestamp(value, pattern) AT TIME ZONE 'UTC';
+EXCEPTION WHEN data_exception THEN
+    RETURN NULL;
+END $$
+"""
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(TRY_TIMESTAMP_FUNCTION).execute_if(dialect="postgresql"),
+)
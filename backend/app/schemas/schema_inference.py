@@ -1,30 +1,105 @@
+from datetime import date, datetime
+from uuid import UUID
+
 from pydantic import BaseModel
 
 
+class TopValue(BaseModel):
+    value: str
+    count: int  # lower bound once many distinct values were seen
+
+
+class ColumnProfile(BaseModel):
+    null_rate: float  # share of rows with an empty value
+    distinct_count: int  # HyperLogLog estimate over non-empty values
+    min_value: str | None = None  # numeric, date or lexical range by type
+    max_value: str | None = None
+    max_length: int
+    top_values: list[TopValue]
+
+
 class InferredColumn(BaseModel):
     original_name: str
     inferred_type: str  # STRING, INTEGER, FLOAT, BOOLEAN, DATE
     suggested_display_name: str
     is_primary_key_candidate: bool
+    date_format: str | None = None  # detected layout for DATE columns
+    profile: ColumnProfile | None = None  # over the rows the inference read
 
 
 class SchemaInferenceResponse(BaseModel):
     filename: str
     row_count: int
     columns: list[InferredColumn]
+    # Set when the headers match a provisioned project, whose finalized
+    # schema is returned instead of an inferred one.
+    matched_source_id: str | None = None
+    matched_project_name: str | None = None
+    cached: bool = False  # result reused from an identical earlier upload
 
 
 class FinalizedColumn(BaseModel):
     original_name: str
     display_name: str
     data_type: str  # STRING, INTEGER, FLOAT, BOOLEAN, DATE
-    is_unique_id: bool = False
+    is_unique_id: bool = False  # gets a unique index
+    is_indexed: bool = False  # gets a lookup index
+    date_format: str | None = None
+    profile: ColumnProfile | None = None  # as returned by inference
+
+
+class EvolvedColumn(FinalizedColumn):
+    renamed_from: str | None = None  # physical name of the existing column to rename
+
+
+class SchemaEvolutionRequest(BaseModel):
+    columns: list[EvolvedColumn]  # every column of the project, as it should become
+
+
+class SchemaChangeResponse(BaseModel):
+    change_id: str
+    source_id: str
+    column: str
+    from_type: str
+    to_type: str
+    status: str  # queued | running | completed | failed
+    rows_done: int
+    rows_failed: int  # non-empty values that did not convert and became NULL
+    error_message: str | None = None
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class SchemaEvolutionResponse(BaseModel):
+    source_id: str
+    added: list[str]
+    renamed: dict[str, str]  # old -> new physical name
+    updated: list[str]  # display name, date format or flags changed
+    indexes_added: list[str]
+    indexes_dropped: list[str]
+    type_changes: list[SchemaChangeResponse]  # backfilled in the background
+
+
+class PartitionSpec(BaseModel):
+    strategy: str  # range (on a DATE column) | hash (on the unique ID column)
+    column: str  # original_name of the partition column
+    interval: str = "month"  # range: month | year
+    partitions: int = 8  # hash: number of partitions
 
 
 class ProvisionRequest(BaseModel):
     project_name: str
     screen_pop_url_template: str | None = None
     columns: list[FinalizedColumn]
+    partitioning: PartitionSpec | None = None
+
+
+class IndexInfo(BaseModel):
+    index_name: str
+    column: str
+    unique: bool
+    status: str  # pending | ready | failed
+    error: str | None = None
 
 
 class ProvisionResponse(BaseModel):
@@ -32,10 +107,83 @@ class ProvisionResponse(BaseModel):
     table_name: str
     source_id: str
     column_count: int
+    indexes: list[IndexInfo] = []
+    partitions: list[str] = []
+    column_types: dict[str, str] = {}  # physical name -> SQL type it is stored as
+    estimated_row_bytes: int = 0  # data bytes per row, assuming no NULLs
+    estimated_row_bytes_saved: int = 0  # versus the widest types in upload order
+
+
+class PartitionInfo(BaseModel):
+    name: str
+    bounds: str  # e.g. FOR VALUES FROM ('2024-01-01') TO ('2024-02-01'), or DEFAULT
+    estimated_rows: int
+
+
+class PartitionCreateRequest(BaseModel):
+    day: date  # any day of the month or year to add a range partition for
+
+
+class PartitionsResponse(BaseModel):
+    source_id: str
+    strategy: str
+    column: str
+    interval: str | None = None
+    partitions: list[PartitionInfo]
+
+
+class LoadJobResponse(BaseModel):
+    job_id: str
+    source_id: str
+    status: str  # queued | running | completed | failed
+    mode: str  # append | upsert | replace
+    enqueue: bool
+    filename: str
+    total_bytes: int
+    bytes_done: int
+    percent_complete: float
+    rows_done: int
+    rows_loaded: int
+    rows_inserted: int
+    rows_updated: int
+    rows_duplicate: int  # upserts: replaced by a later row with the same key
+    rows_unchanged: int
+    rows_failed: int
+    errors: list[str]
+    load_method: str | None
+    rows_per_second: float
+    eta_seconds: float | None
+    error_message: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class RejectedRow(BaseModel):
+    id: int
+    load_job_id: UUID | None
+    row_num: int
+    column_name: str | None
+    reason: str
+    raw_record: dict[str, str]
+    rejected_at: datetime
+
+
+class RejectsPage(BaseModel):
+    source_id: str
+    total: int
+    rejects: list[RejectedRow]
 
 
-class DataLoadResponse(BaseModel):
+class RejectRetryResponse(BaseModel):
     source_id: str
+    mode: str  # append | upsert
+    rows_retried: int
     rows_loaded: int
+    rows_inserted: int
+    rows_updated: int
+    rows_duplicate: int  # upserts: replaced by a later row with the same key
+    rows_unchanged: int
     rows_failed: int
     errors: list[str]
+    load_method: str  # copy | insert
@@ -19,6 +19,12 @@ class TaskRecord(BaseModel):
     screen_pop_url: str | None = None
 
 
+class RecordPage(BaseModel):
+    """A page of records; pass ``next_cursor`` back for the next one (None after the last)."""
+    records: list[TaskRecord]
+    next_cursor: str | None = None
+
+
 class EnqueueResponse(BaseModel):
     source_id: UUID
     records_enqueued: int
@@ -1,8 +1,22 @@
 """Data Loader: streams CSV rows into a provisioned dynamic table in batches."""
 
+import asyncio
+import codecs
+import collections
+import concurrent.futures
+import contextlib
 import csv
 import io
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
 from datetime import datetime
+from typing import BinaryIO
+from uuid import UUID
 
 from dateutil import parser as dateutil_parser
 from sqlalchemy import text
@@ -10,7 +24,30 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
+from app.core.executor import run_cpu_bound, run_load_producer
 from app.models.registry import SourceMetadata, ColumnMetadata
+from app.services.date_formats import DateParser
+from app.services.file_formats import (
+    import_pyarrow,
+    open_record_batches,
+    registry_type_for_arrow,
+)
+from app.services.partitioning import check_load_mode, ensure_range_partitions
+from app.services.provisioning import (
+    create_replacement_table,
+    ensure_unique_index,
+    prepare_replacement_table,
+    swap_replacement_table,
+)
+from app.services.queue_manager import queue_insert_sql, queue_params, queue_text
+from app.services.rejects import (
+    REJECT_COLUMNS,
+    REJECT_TYPES,
+    clear_job_rejects,
+    ensure_rejects_table,
+)
+from app.services.statements import statement_registry
+from app.services.storage_types import ValueLimit, add_enum_labels, is_enum_type, value_limit
 
 # Conversion functions keyed by the data type stored in column_metadata.
 # Each returns a Python value suitable for asyncpg parameterized queries.
@@ -34,11 +71,15 @@ def _to_float(value: str) -> float | None:
         return None
 
 
+_TRUE_WORDS = ("true", "yes", "1", "t", "y")
+_FALSE_WORDS = ("false", "no", "0", "f", "n")
+
+
 def _to_boolean(value: str) -> bool | None:
     v = value.strip().lower()
-    if v in ("true", "yes", "1", "t", "y"):
+    if v in _TRUE_WORDS:
         return True
-    if v in ("false", "no", "0", "f", "n"):
+    if v in _FALSE_WORDS:
         return False
     return None
 
@@ -50,6 +91,13 @@ def _to_timestamp(value: str) -> datetime | None:
         return None
 
 
+def _get_converter(data_type: str, date_format: str | None = None) -> Callable[[str], object]:
+    """Per-cell converter for a column; DATE columns with a known format parse fast."""
+    if data_type == "DATE" and date_format:
+        return DateParser(date_format)
+    return _CONVERTERS.get(data_type, _to_text)
+
+
 _CONVERTERS = {
     "STRING": _to_text,
     "INTEGER": _to_integer,
@@ -58,20 +106,152 @@ _CONVERTERS = {
     "DATE": _to_timestamp,
 }
 
+# ── Columnar conversion ────────────────────────────────────────
+#
+# Whole-column fast paths used by DATA_LOAD_CONVERSION=columnar.  Each one
+# converts every non-empty cell of a column with a C-level builtin inside a
+# single comprehension; if any cell raises, the column falls back to the
+# per-cell converter above so bad cells can be pinpointed.
+
+_BOOL_VALUES = {
+    **dict.fromkeys(_TRUE_WORDS, True),
+    **dict.fromkeys(_FALSE_WORDS, False),
+}
+
+
+def _column_to_text(values: list[str]) -> list:
+    return [v.strip() or None for v in values]
+
+
+def _column_to_integer(values: list[str]) -> list:
+    return [int(v) if v else None for v in values]
+
+
+def _column_to_float(values: list[str]) -> list:
+    return [float(v) if v else None for v in values]
+
+
+def _column_to_boolean(values: list[str]) -> list:
+    return [_BOOL_VALUES[v.strip().lower()] if v else None for v in values]
+
+
+def _column_to_timestamp(values: list[str]) -> list:
+    return [datetime.fromisoformat(v) if v else None for v in values]
+
+
+_COLUMN_CONVERTERS = {
+    "STRING": _column_to_text,
+    "INTEGER": _column_to_integer,
+    "FLOAT": _column_to_float,
+    "BOOLEAN": _column_to_boolean,
+    "DATE": _column_to_timestamp,
+}
+
+
+def convert_column(
+    values: list[str], data_type: str, date_format: str | None = None
+) -> tuple[list, list[int]]:
+    """Convert one column of raw CSV cells in bulk.
+
+    Returns ``(converted, bad)`` where *converted* holds ``None`` for empty
+    cells and *bad* lists the positions of non-empty cells that could not
+    be converted.
+    """
+    if data_type == "DATE" and date_format:
+        bulk = DateParser(date_format).parse_column
+    else:
+        bulk = _COLUMN_CONVERTERS.get(data_type, _column_to_text)
+    try:
+        return bulk(values), []
+    except (ValueError, TypeError, KeyError, OverflowError):
+        pass
+
+    converter = _get_converter(data_type, date_format)
+    converted: list = []
+    bad: list[int] = []
+    for pos, value in enumerate(values):
+        raw = value.strip()
+        if not raw:
+            converted.append(None)
+            continue
+        out = converter(raw)
+        if out is None:
+            bad.append(pos)
+        converted.append(out)
+    return converted, bad
+
+
+class ColumnBatch:
+    """A batch of converted rows stored column-wise (one list per column).
+
+    Iterating yields row tuples, which is what COPY consumes; the INSERT
+    writer binds ``columns`` directly as arrays.
+    """
+
+    __slots__ = ("columns", "row_count")
+
+    def __init__(self, columns: list[list], row_count: int) -> None:
+        self.columns = columns
+        self.row_count = row_count
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(*self.columns)
+
+    def __getitem__(self, rows: slice) -> "ColumnBatch":
+        columns = [col[rows] for col in self.columns]
+        return ColumnBatch(columns, len(columns[0]) if columns else 0)
+
 
 class LoadResult:
-    __slots__ = ("rows_loaded", "rows_failed", "errors")
+    __slots__ = (
+        "rows_loaded",
+        "rows_failed",
+        "rows_inserted",
+        "rows_updated",
+        "rows_duplicate",
+        "errors",
+        "rejected",
+        "load_method",
+        "elapsed_seconds",
+    )
 
     def __init__(self) -> None:
         self.rows_loaded: int = 0
         self.rows_failed: int = 0
+        self.rows_inserted: int = 0
+        self.rows_updated: int = 0
+        # Upserts: rows whose key a later row of the same batch repeats.
+        self.rows_duplicate: int = 0
         self.errors: list[str] = []
+        # Failed rows awaiting the rejects table: (row_num, column, reason, row).
+        self.rejected: list[tuple[int, str, str, list[str]]] = []
+        self.load_method: str = settings.DATA_LOAD_METHOD
+        self.elapsed_seconds: float = 0.0
+
+    @property
+    def rows_unchanged(self) -> int:
+        """Rows accepted but skipped because an identical row already existed."""
+        return self.rows_loaded - self.rows_inserted - self.rows_updated - self.rows_duplicate
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return round(self.rows_loaded / self.elapsed_seconds, 1)
 
     def record_error(self, row_num: int, col: str, raw: str, reason: str) -> None:
         if len(self.errors) < 50:  # cap error list to prevent memory bloat
             self.errors.append(f"Row {row_num}, column '{col}': {reason} (value: {raw!r})")
         self.rows_failed += 1
 
+    def reject(self, row_num: int, col: str, raw: str, reason: str, row: list[str]) -> None:
+        """Record an error and queue the whole row for the rejects table."""
+        self.record_error(row_num, col, raw, reason)
+        self.rejected.append((row_num, col, reason, row))
+
 
 def _build_column_map(
     source: SourceMetadata,
@@ -91,31 +271,457 @@ def _build_column_map(
     return result
 
 
+class _TextLines:
+    """Decode a binary stream incrementally, yielding lines for ``csv.reader``.
+
+    Reads ``chunk_size`` bytes at a time so memory stays bounded regardless of
+    file size.  Lines are split on the raw ``\\n`` byte (which never occurs
+    inside a UTF-8 multi-byte sequence) and decoded one at a time; the BOM is
+    stripped.  Line endings are kept so quoted fields with embedded newlines
+    parse correctly.
+
+    ``offset`` is the number of bytes consumed through the last line handed
+    out.  ``csv.reader`` never reads ahead, so right after it returns a row
+    ``offset`` marks the end of that record — a safe resume point.
+    """
+
+    def __init__(self, stream: BinaryIO, chunk_size: int, offset: int = 0) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = b""
+        while chunk := self._stream.read(self._chunk_size):
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                self.offset += len(line) + 1
+                yield decoder.decode(line + b"\n")
+        if pending:
+            self.offset += len(pending)
+            yield decoder.decode(pending, final=True)
+
+
+def _iter_text_lines(stream: BinaryIO, chunk_size: int) -> _TextLines:
+    return _TextLines(stream, chunk_size)
+
+
+class LoadCheckpoint:
+    """A resumable position in a load: everything before it is fully processed."""
+
+    __slots__ = ("byte_offset", "rows_done", "rows_failed")
+
+    def __init__(self, byte_offset: int, rows_done: int, rows_failed: int) -> None:
+        self.byte_offset = byte_offset
+        self.rows_done = rows_done
+        self.rows_failed = rows_failed
+
+
 async def load_csv(
     db: AsyncSession,
     source: SourceMetadata,
-    file_content: bytes,
+    stream: BinaryIO,
+    mode: str = "append",
+    *,
+    resume: LoadCheckpoint | None = None,
+    result: LoadResult | None = None,
+    on_checkpoint: Callable[[LoadCheckpoint, LoadResult], Awaitable[None]] | None = None,
+    load_job_id: UUID | None = None,
+    enqueue: bool = False,
 ) -> LoadResult:
     """
     Parse *all* rows of a CSV and insert them into the dynamic table.
 
-    Uses batched INSERT for throughput on large files.  Type conversion
-    errors are captured per-row and reported; valid rows still load.
+    ``mode="append"`` inserts every row.  ``mode="upsert"`` matches rows on
+    the column flagged ``is_unique_id``: new keys are inserted, changed rows
+    are updated and identical rows are skipped without writing.
+    ``mode="replace"`` is a full refresh: rows go into an UNLOGGED copy of
+    the table, which is indexed and analyzed once loaded and then swapped in
+    by rename in one short transaction, so readers never see a partial
+    table.  Rows appended to the live table during a replace are lost.
+
+    With *enqueue* every newly inserted row also gets a pending
+    ``record_queue`` entry, written by the same statements (or, for COPY,
+    the same transaction) as the batch, so new rows are workable as soon as
+    they commit.  A replace enqueues the new table in the swap transaction.
+
+    *stream* is a binary file object (e.g. the ``UploadFile`` spool).  It is
+    read and decoded incrementally, so peak memory is bounded by the batch
+    size rather than the file size.
+
+    Batches are written with PostgreSQL ``COPY ... FROM STDIN`` when the
+    driver supports it (``DATA_LOAD_METHOD=copy``), otherwise with an
+    executemany INSERT.  Rows that fail conversion are skipped and written,
+    raw, to the project's rejects table (tagged with *load_job_id*) through
+    the same writer path; valid rows still load.
+
+    When *on_checkpoint* is given the load commits every
+    ``DATA_LOAD_COMMIT_EVERY`` batches: the callback is awaited first (inside
+    the same transaction) so progress is persisted atomically with the data.
+    *resume* restarts from such a checkpoint (the stream must be seekable)
+    and *result* carries the counts accumulated before it; a replace load
+    cannot resume.  Periodic commits require a session bound to a single
+    connection.
     """
-    result = LoadResult()
+    result = result or LoadResult()
+    started = time.perf_counter()
+    source = await _with_columns(db, source)
+    if mode == "replace" and resume:
+        raise ValueError("A replace load cannot resume from a checkpoint.")
 
-    # Ensure columns are loaded
-    if not source.columns:
-        from sqlalchemy import select
+    # Parse CSV row by row straight off the stream.  In parallel mode the
+    # stream is cut into row-aligned byte chunks instead, and the header is
+    # read from the first chunk.
+    # The header is always read from the start of the file; when resuming,
+    # the stream is then repositioned at the checkpoint.
+    parallel = settings.DATA_LOAD_WORKERS > 1
+    start_offset = resume.byte_offset if resume else 0
+    start_row = resume.rows_done if resume else 0
+    if parallel:
+        chunks = _iter_row_aligned_chunks(stream, settings.DATA_LOAD_CHUNK_BYTES)
+        first_chunk = next(chunks, b"")
+        header_lines = _iter_text_lines(io.BytesIO(first_chunk), len(first_chunk) or 1)
+        csv_headers = next(csv.reader(header_lines), [])
+        if resume:
+            stream.seek(start_offset)
+            chunks = _iter_row_aligned_chunks(stream, settings.DATA_LOAD_CHUNK_BYTES)
+        else:
+            chunks = itertools.chain([first_chunk], chunks)
+    else:
+        lines = _TextLines(stream, settings.CSV_READ_CHUNK_SIZE)
+        reader = csv.reader(lines)
+        csv_headers = next(reader, [])
+        if resume:
+            stream.seek(start_offset)
+            lines = _TextLines(stream, settings.CSV_READ_CHUNK_SIZE, offset=start_offset)
+            reader = csv.reader(lines)
 
-        stmt = (
-            select(SourceMetadata)
-            .options(selectinload(SourceMetadata.columns))
-            .where(SourceMetadata.id == source.id)
+    def batches(plan: _LoadPlan) -> Iterator[tuple]:
+        if parallel:
+            return _convert_chunks_parallel(
+                chunks,
+                plan,
+                result,
+                settings.DATA_LOAD_BATCH_SIZE,
+                _get_conversion_pool(),
+                max_in_flight=settings.DATA_LOAD_WORKERS * 2,
+                start_offset=start_offset,
+                start_row=start_row,
+                has_header=resume is None,
+            )
+        return _checkpointed_batches(
+            lines, reader, plan, result, settings.DATA_LOAD_BATCH_SIZE, start_row
         )
-        res = await db.execute(stmt)
-        source = res.scalar_one()
 
+    return await _load_batches(
+        db,
+        source,
+        csv_headers,
+        batches,
+        mode,
+        result=result,
+        started=started,
+        on_checkpoint=on_checkpoint,
+        load_job_id=load_job_id,
+        enqueue=enqueue,
+    )
+
+
+async def load_arrow(
+    db: AsyncSession,
+    source: SourceMetadata,
+    path: str,
+    file_format: str,
+    mode: str = "append",
+    *,
+    resume: LoadCheckpoint | None = None,
+    result: LoadResult | None = None,
+    on_checkpoint: Callable[[LoadCheckpoint, LoadResult], Awaitable[None]] | None = None,
+    load_job_id: UUID | None = None,
+    enqueue: bool = False,
+) -> LoadResult:
+    """Load a Parquet or Arrow IPC file at *path* into the dynamic table.
+
+    Same modes, checkpointing and quarantine as :func:`load_csv`, but the
+    file's typed columns are handed to the writer as-is wherever the Arrow
+    type matches the registry type, skipping string-to-type conversion.
+    Mismatched columns are rendered as text and converted like CSV cells.
+    Checkpoint byte offsets are proportional to the rows done; *resume*
+    skips ``rows_done`` rows.
+    """
+    result = result or LoadResult()
+    started = time.perf_counter()
+    source = await _with_columns(db, source)
+    if mode == "replace" and resume:
+        raise ValueError("A replace load cannot resume from a checkpoint.")
+
+    schema, total_rows, record_batches = open_record_batches(
+        path, file_format, settings.DATA_LOAD_BATCH_SIZE
+    )
+    total_bytes = os.path.getsize(path)
+    start_row = resume.rows_done if resume else 0
+
+    def batches(plan: _LoadPlan) -> Iterator[tuple]:
+        return _convert_record_batches(
+            record_batches, plan, result, start_row, total_rows, total_bytes
+        )
+
+    return await _load_batches(
+        db,
+        source,
+        list(schema.names),
+        batches,
+        mode,
+        result=result,
+        started=started,
+        on_checkpoint=on_checkpoint,
+        load_job_id=load_job_id,
+        enqueue=enqueue,
+    )
+
+
+async def _with_columns(db: AsyncSession, source: SourceMetadata) -> SourceMetadata:
+    """Return *source* with its column metadata loaded."""
+    if source.columns:
+        return source
+    from sqlalchemy import select
+
+    stmt = (
+        select(SourceMetadata)
+        .options(selectinload(SourceMetadata.columns))
+        .where(SourceMetadata.id == source.id)
+    )
+    res = await db.execute(stmt)
+    return res.scalar_one()
+
+
+async def _load_batches(
+    db: AsyncSession,
+    source: SourceMetadata,
+    headers: list[str],
+    make_batches: Callable[["_LoadPlan"], Iterator[tuple]],
+    mode: str,
+    *,
+    result: LoadResult,
+    started: float,
+    on_checkpoint: Callable[[LoadCheckpoint, LoadResult], Awaitable[None]] | None,
+    load_job_id: UUID | None,
+    enqueue: bool,
+) -> LoadResult:
+    """Write the batches of one input file; shared by the CSV and Arrow loaders.
+
+    *make_batches* receives the load plan and returns the iterator of
+    ``(batch or None, rejects, checkpoint or None)`` items to write.
+    """
+    plan, key_column = _build_plan(source, headers, mode)
+    if plan is None:
+        result.errors.append("No CSV columns matched the provisioned schema.")
+        return result
+    check_load_mode(source, mode, key_column)
+    if await ensure_range_partitions(db, source):
+        # Committed before the load, so the parent is not locked while it runs.
+        await db.commit()
+
+    target = source.table_name
+    if mode == "replace":
+        target = await create_replacement_table(db, source.table_name)
+    writer = await _get_batch_writer(
+        db,
+        target,
+        plan.physical_names,
+        [plan.sql_types[p] for p in plan.physical_names],
+        key_column=key_column,
+        enqueue_source_id=source.id if enqueue and mode != "replace" else None,
+    )
+    result.load_method = writer.method
+    key_pos = plan.physical_names.index(key_column) if key_column else None
+    reject_writer = await _get_plain_writer(
+        db, await ensure_rejects_table(db, source.table_name), REJECT_COLUMNS, REJECT_TYPES
+    )
+    if mode == "replace" and load_job_id:
+        # A restarted replace reloads from the top; forget the last attempt's rejects.
+        await clear_job_rejects(db, source.table_name, load_job_id)
+
+    # Producer/consumer pipeline: a load executor thread parses and converts
+    # rows into batches while this coroutine writes completed batches, so
+    # parsing and database I/O overlap.  The bounded queue applies
+    # backpressure when the database is the bottleneck.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.DATA_LOAD_QUEUE_DEPTH)
+    stop = threading.Event()
+    producer = asyncio.create_task(
+        run_load_producer(
+            _produce_batches,
+            make_batches(plan),
+            queue,
+            asyncio.get_running_loop(),
+            stop,
+        )
+    )
+
+    last_checkpoint: LoadCheckpoint | None = None
+    batches_since_commit = 0
+    try:
+        while (item := await queue.get()) is not _END_OF_BATCHES:
+            batch, rejects, checkpoint = item
+            if batch is not None:
+                if batch:
+                    result.rows_loaded += len(batch)
+                    if key_pos is not None:
+                        batch, duplicates = _drop_duplicate_keys(batch, key_pos)
+                        result.rows_duplicate += duplicates
+                    inserted, updated = await writer.write(batch)
+                    result.rows_inserted += inserted
+                    result.rows_updated += updated
+                batches_since_commit += 1
+            if rejects:
+                await reject_writer.write([(load_job_id, *r) for r in rejects])
+            if checkpoint is None:
+                continue
+            last_checkpoint = checkpoint
+            if on_checkpoint and batches_since_commit >= settings.DATA_LOAD_COMMIT_EVERY:
+                await on_checkpoint(checkpoint, result)
+                await db.commit()
+                batches_since_commit = 0
+    finally:
+        # Unblocks the producer if the writer failed; no-op on success.
+        stop.set()
+        with contextlib.suppress(Exception):
+            await asyncio.shield(producer)
+
+    await producer  # re-raise any parse error from the worker thread
+    await writer.close()
+    if on_checkpoint and last_checkpoint is not None:
+        await on_checkpoint(last_checkpoint, result)
+    await db.commit()
+    if mode == "replace":
+        await prepare_replacement_table(db, source.table_name, target)
+        await db.commit()
+        await swap_replacement_table(db, source.table_name, target)
+        if enqueue:
+            await db.execute(
+                queue_text(queue_insert_sql(f'"{source.table_name}"')), queue_params(source.id)
+            )
+        await db.commit()
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
+
+
+async def retry_rejects(
+    db: AsyncSession,
+    source: SourceMetadata,
+    mode: str = "append",
+    load_job_id: UUID | None = None,
+) -> LoadResult:
+    """Replay quarantined rows through the project's current schema.
+
+    Intended for use after a schema fix: each reject is converted again with
+    the registry as it is now.  Rows that load are removed from the rejects
+    table; rows that still fail are re-quarantined with their new reason.
+    Only rejects present when the retry starts are processed.
+    """
+    result = LoadResult()
+    started = time.perf_counter()
+    rejects_table = await ensure_rejects_table(db, source.table_name)
+    job_filter = "AND load_job_id = :job_id" if load_job_id else ""
+    max_id = (
+        await db.execute(
+            text(f'SELECT max(id) FROM "{rejects_table}" WHERE true {job_filter}'),
+            {"job_id": load_job_id},
+        )
+    ).scalar()
+    if max_id is None:
+        return result
+    if await ensure_range_partitions(db, source):
+        # As for a load: committed first, so the parent is not locked meanwhile.
+        await db.commit()
+
+    page_query = text(
+        f'SELECT id, load_job_id, row_num, raw_record FROM "{rejects_table}"'
+        f" WHERE id > :after AND id <= :max_id {job_filter} ORDER BY id LIMIT :limit"
+    )
+    delete_query = text(f'DELETE FROM "{rejects_table}" WHERE id = ANY(:ids)')
+    reject_writer = await _get_plain_writer(db, rejects_table, REJECT_COLUMNS, REJECT_TYPES)
+    after = 0
+    while True:
+        page = (
+            await db.execute(
+                page_query,
+                {
+                    "after": after,
+                    "max_id": max_id,
+                    "job_id": load_job_id,
+                    "limit": settings.DATA_LOAD_BATCH_SIZE,
+                },
+            )
+        ).all()
+        if not page:
+            break
+        after = page[-1].id
+
+        # Rejects from different files may carry different headers.
+        groups: dict[tuple[str, ...], list] = collections.defaultdict(list)
+        for reject in page:
+            groups[tuple(reject.raw_record)].append(reject)
+
+        for headers, rejects in groups.items():
+            plan, key_column = _build_plan(source, list(headers), mode)
+            if plan is None:
+                result.rows_failed += len(rejects)
+                continue
+            rows = [list(reject.raw_record.values()) for reject in rejects]
+            errors = _ChunkErrors()
+            batches = await run_cpu_bound(
+                lambda: list(_convert_batches(iter(rows), plan, errors, len(rows) + 1))
+            )
+
+            # Map converter row numbers (1..n) back to the original rows.
+            for row_num, col, raw, reason in errors.errors:
+                result.record_error(rejects[row_num - 1].row_num, col, raw, reason)
+            result.rows_failed += errors.rows_failed - len(errors.errors)
+            still_failing = [
+                (rejects[row_num - 1].load_job_id, rejects[row_num - 1].row_num, *rest)
+                for row_num, *rest in _drain_rejects(errors, plan)
+            ]
+
+            writer = await _get_batch_writer(
+                db,
+                source.table_name,
+                plan.physical_names,
+                [plan.sql_types[p] for p in plan.physical_names],
+                key_column=key_column,
+            )
+            result.load_method = writer.method
+            key_pos = plan.physical_names.index(key_column) if key_column else None
+            for batch in batches:
+                if batch:
+                    result.rows_loaded += len(batch)
+                    if key_pos is not None:
+                        batch, duplicates = _drop_duplicate_keys(batch, key_pos)
+                        result.rows_duplicate += duplicates
+                    inserted, updated = await writer.write(batch)
+                    result.rows_inserted += inserted
+                    result.rows_updated += updated
+            await writer.close()
+
+            await db.execute(delete_query, {"ids": [reject.id for reject in rejects]})
+            if still_failing:
+                await reject_writer.write(still_failing)
+
+    await db.commit()
+    result.elapsed_seconds = time.perf_counter() - started
+    return result
+
+
+def _build_plan(
+    source: SourceMetadata, csv_headers: list[str], mode: str
+) -> tuple["_LoadPlan | None", str | None]:
+    """Match CSV headers to the registry and build the conversion plan.
+
+    Returns ``(plan, upsert key column)``, or ``(None, None)`` when no header
+    matches a provisioned column.  Raises ``ValueError`` when an upsert has
+    no usable key column.
+    """
     # Build mapping: csv original_name -> (physical_name, converter)
     # physical_name was derived from original_name via _sanitize_identifier
     # in provisioning.  We need to match CSV headers to column_metadata.
@@ -128,84 +734,820 @@ async def load_csv(
 
     col_lookup: dict[str, tuple[str, callable]] = {}
     for col_meta in source.columns:
-        converter = _CONVERTERS.get(col_meta.data_type, _to_text)
+        converter = _get_converter(col_meta.data_type, col_meta.date_format)
         col_lookup[col_meta.physical_name] = (col_meta.physical_name, converter)
 
-    # Parse CSV
-    text_content = file_content.decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(text_content))
-    csv_headers = reader.fieldnames or []
-
-    # Map each CSV header to its physical column
-    header_to_physical: dict[str, tuple[str, callable]] = {}
-    for hdr in csv_headers:
+    # Map each CSV header position to its physical column
+    header_to_physical: dict[int, tuple[str, callable]] = {}
+    for idx, hdr in enumerate(csv_headers):
         sanitized = _sanitize(hdr)
         if sanitized in col_lookup:
-            header_to_physical[hdr] = col_lookup[sanitized]
+            header_to_physical[idx] = col_lookup[sanitized]
 
     if not header_to_physical:
-        result.errors.append("No CSV columns matched the provisioned schema.")
-        return result
+        return None, None
 
-    # Ordered list for consistent INSERT column order
     physical_names = [phys for phys, _ in header_to_physical.values()]
-    csv_keys = list(header_to_physical.keys())
-    converters = [header_to_physical[k][1] for k in csv_keys]
+    sql_types = {c.physical_name: c.sql_type for c in source.columns}
+    key_column: str | None = None
+    if mode == "upsert":
+        key_column = next((c.physical_name for c in source.columns if c.is_unique_id), None)
+        if key_column is None:
+            raise ValueError("Upsert requires a column flagged as the unique ID.")
+        if key_column not in physical_names:
+            raise ValueError(f"Upsert key column '{key_column}' is missing from the CSV.")
+
+    plan = _LoadPlan(
+        csv_indexes=list(header_to_physical.keys()),
+        csv_keys=[csv_headers[idx] for idx in header_to_physical],
+        headers=list(csv_headers),
+        physical_names=physical_names,
+        converters=[conv for _, conv in header_to_physical.values()],
+        data_types={c.physical_name: c.data_type for c in source.columns},
+        sql_types=sql_types,
+        limits=[value_limit(sql_types[p]) for p in physical_names],
+        date_formats={c.physical_name: c.date_format for c in source.columns},
+        conversion=settings.DATA_LOAD_CONVERSION,
+        required=frozenset([physical_names.index(key_column)] if key_column else []),
+    )
+    return plan, key_column
+
+
+class _LoadPlan:
+    """Column routing for one load: which CSV positions go where, and how."""
+
+    __slots__ = (
+        "csv_indexes",
+        "csv_keys",
+        "headers",
+        "physical_names",
+        "converters",
+        "data_types",
+        "sql_types",
+        "limits",
+        "date_formats",
+        "conversion",
+        "required",
+    )
+
+    def __init__(
+        self,
+        csv_indexes: list[int],
+        csv_keys: list[str],
+        physical_names: list[str],
+        converters: list[Callable[[str], object]],
+        data_types: dict[str, str],
+        date_formats: dict[str, str | None] | None = None,
+        conversion: str = "row",
+        sql_types: dict[str, str] | None = None,
+        limits: list[ValueLimit | None] | None = None,
+        required: frozenset[int] = frozenset(),
+        headers: list[str] | None = None,
+    ) -> None:
+        self.csv_indexes = csv_indexes
+        self.csv_keys = csv_keys
+        self.headers = headers or []  # every CSV header, for reject records
+        self.physical_names = physical_names
+        self.converters = converters
+        self.data_types = data_types
+        self.sql_types = sql_types or {}
+        # Per plan position: what a compact SQL type holds (see app.services.storage_types).
+        self.limits = limits or [None] * len(physical_names)
+        self.date_formats = date_formats or {}
+        self.conversion = conversion
+        self.required = required  # plan positions that may not be empty
 
-    table_name = source.table_name
-    placeholders = ", ".join(f":p{i}" for i in range(len(physical_names)))
-    col_list = ", ".join(f'"{p}"' for p in physical_names)
-    insert_sql = f'INSERT INTO "{table_name}" ({col_list}) VALUES ({placeholders})'
 
-    batch: list[dict] = []
-    row_num = 0
+def _convert_batches(
+    rows: Iterator[list[str]],
+    plan: _LoadPlan,
+    result: "LoadResult | _ChunkErrors",
+    batch_size: int,
+    start_row: int = 0,
+) -> Iterator[list[tuple] | ColumnBatch]:
+    """Dispatch to the row-wise or columnar converter chosen in *plan*."""
+    if plan.conversion == "columnar":
+        return _convert_rows_columnar(rows, plan, result, batch_size, start_row)
+    return _convert_rows(rows, plan, result, batch_size, start_row)
+
+
+def _drain_rejects(result: "LoadResult | _ChunkErrors", plan: _LoadPlan) -> list[tuple]:
+    """Take the rows rejected so far as ``(row_num, column, reason, raw JSON)``.
+
+    Must run on the thread that converts rows into *result*.
+    """
+    rejected, result.rejected = result.rejected, []
+    headers = plan.headers
+    return [
+        (row_num, col, reason, json.dumps(dict(zip(headers, row))))
+        for row_num, col, reason, row in rejected
+    ]
+
+
+def _checkpointed_batches(
+    lines: _TextLines,
+    reader: Iterator[list[str]],
+    plan: _LoadPlan,
+    result: LoadResult,
+    batch_size: int,
+    start_row: int,
+) -> Iterator[tuple[list[tuple] | ColumnBatch | None, list[tuple], LoadCheckpoint]]:
+    """Pair every converted batch with its rejects and the checkpoint just past it.
+
+    A final ``(None, rejects, checkpoint)`` item marks the end of input.
+    """
+    rows_read = start_row
 
-    for row in reader:
+    def counted() -> Iterator[list[str]]:
+        nonlocal rows_read
+        for row in reader:
+            if row:
+                rows_read += 1
+            yield row
+
+    for batch in _convert_batches(counted(), plan, result, batch_size, start_row):
+        checkpoint = LoadCheckpoint(lines.offset, rows_read, result.rows_failed)
+        yield batch, _drain_rejects(result, plan), checkpoint
+    checkpoint = LoadCheckpoint(lines.offset, rows_read, result.rows_failed)
+    yield None, _drain_rejects(result, plan), checkpoint
+
+
+_MISSING_REQUIRED = "Missing value for unique ID column"
+
+
+def _convert_rows(
+    rows: Iterator[list[str]],
+    plan: _LoadPlan,
+    result: "LoadResult | _ChunkErrors",
+    batch_size: int,
+    start_row: int = 0,
+) -> Iterator[list[tuple]]:
+    """Convert raw CSV rows into batches of typed tuples.
+
+    Rows with a non-empty value that fails conversion, or an empty value in
+    a required column, are rejected on *result* and skipped.  Each batch
+    covers ``batch_size`` input rows, so it may be short (or empty) when
+    rows were rejected.  Row numbers continue from *start_row*.
+    """
+    batch: list[tuple] = []
+    batch_rows = 0
+    row_num = start_row
+
+    for row in rows:
+        if not row:  # blank line
+            continue
         row_num += 1
-        params: dict = {}
+        batch_rows += 1
+        values: list = []
         row_ok = True
 
-        for i, csv_key in enumerate(csv_keys):
-            raw = (row.get(csv_key) or "").strip()
+        for i, idx in enumerate(plan.csv_indexes):
+            raw = row[idx].strip() if idx < len(row) else ""
             if not raw:
-                params[f"p{i}"] = None
+                if i in plan.required:
+                    result.reject(row_num, plan.csv_keys[i], raw, _MISSING_REQUIRED, row)
+                    row_ok = False
+                    break
+                values.append(None)
                 continue
-            converted = converters[i](raw)
+            converted = plan.converters[i](raw)
             if converted is None and raw:
                 # Conversion failed on a non-empty value
-                result.record_error(
+                result.reject(
                     row_num,
-                    csv_key,
+                    plan.csv_keys[i],
                     raw,
-                    f"Cannot convert to {source.columns[i].data_type}",
+                    f"Cannot convert to {plan.data_types[plan.physical_names[i]]}",
+                    row,
                 )
                 row_ok = False
                 break
-            params[f"p{i}"] = converted
+            limit = plan.limits[i]
+            if limit is not None and limit.refuses(converted):
+                result.reject(row_num, plan.csv_keys[i], raw, limit.reason, row)
+                row_ok = False
+                break
+            values.append(converted)
+
+        if row_ok:
+            batch.append(tuple(values))
+
+        if batch_rows >= batch_size:
+            yield batch
+            batch, batch_rows = [], 0
+
+    if batch_rows:
+        yield batch
+
+
+def _refused(values: list, limit: ValueLimit) -> list[int]:
+    """Positions of converted values that *limit* refuses."""
+    return [pos for pos, value in enumerate(values) if value is not None and limit.refuses(value)]
 
-        if not row_ok:
+
+def _convert_rows_columnar(
+    rows: Iterator[list[str]],
+    plan: _LoadPlan,
+    result: "LoadResult | _ChunkErrors",
+    batch_size: int,
+    start_row: int = 0,
+) -> Iterator[ColumnBatch]:
+    """Columnar counterpart of :func:`_convert_rows`.
+
+    Each batch of raw rows is transposed and converted one column at a time.
+    Failed rows are rejected against their first bad column (in column
+    order), matching the row-wise converter.
+    """
+    raw_batch: list[list[str]] = []
+    row_nums: list[int] = []
+    row_num = start_row
+
+    def flush() -> ColumnBatch:
+        transposed = list(itertools.zip_longest(*raw_batch, fillvalue=""))
+        width = len(transposed)
+        columns: list[list] = []
+        failed: dict[int, tuple[int, str]] = {}  # batch position -> (first bad column, reason)
+        for i, idx in enumerate(plan.csv_indexes):
+            values = list(transposed[idx]) if idx < width else [""] * len(raw_batch)
+            phys = plan.physical_names[i]
+            converted, bad = convert_column(
+                values, plan.data_types[phys], plan.date_formats.get(phys)
+            )
+            for pos in bad:
+                failed.setdefault(pos, (i, f"Cannot convert to {plan.data_types[phys]}"))
+            if plan.limits[i] is not None:
+                for pos in _refused(converted, plan.limits[i]):
+                    failed.setdefault(pos, (i, plan.limits[i].reason))
+            if i in plan.required:
+                for pos, value in enumerate(converted):
+                    if value is None:
+                        failed.setdefault(pos, (i, _MISSING_REQUIRED))
+            columns.append(converted)
+
+        for pos in sorted(failed):
+            i, reason = failed[pos]
+            idx = plan.csv_indexes[i]
+            row = raw_batch[pos]
+            raw = row[idx].strip() if idx < len(row) else ""
+            result.reject(row_nums[pos], plan.csv_keys[i], raw, reason, row)
+        if failed:
+            keep = [pos for pos in range(len(raw_batch)) if pos not in failed]
+            columns = [[col[pos] for pos in keep] for col in columns]
+        return ColumnBatch(columns, len(raw_batch) - len(failed))
+
+    for row in rows:
+        if not row:  # blank line
             continue
+        row_num += 1
+        raw_batch.append(row)
+        row_nums.append(row_num)
+        if len(raw_batch) >= batch_size:
+            yield flush()
+            raw_batch, row_nums = [], []
 
-        batch.append(params)
+    if raw_batch:
+        yield flush()
 
-        if len(batch) >= settings.DATA_LOAD_BATCH_SIZE:
-            await _flush_batch(db, insert_sql, batch)
-            result.rows_loaded += len(batch)
-            batch = []
 
-    # Flush remaining rows
-    if batch:
-        await _flush_batch(db, insert_sql, batch)
-        result.rows_loaded += len(batch)
+# ── Parallel conversion ────────────────────────────────────────
+#
+# For wide, date-heavy files conversion is CPU-bound, so the file is cut
+# into row-aligned byte chunks that worker processes decode, parse and
+# convert independently.  Results are merged back in file order.
 
-    await db.commit()
-    return result
+_conversion_pool: concurrent.futures.ProcessPoolExecutor | None = None
+
+
+def _get_conversion_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _conversion_pool
+    if _conversion_pool is None:
+        _conversion_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=settings.DATA_LOAD_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _conversion_pool
+
+
+def _row_boundary(buf: bytes) -> int:
+    """Return the offset just past the last record-ending newline in *buf*.
+
+    A newline ends a record only when it is outside a quoted field, i.e.
+    when the number of quote characters before it is even (escaped quotes
+    come in pairs).  Returns 0 when *buf* holds no complete record.
+    """
+    total_quotes = buf.count(b'"')
+    pos = buf.rfind(b"\n")
+    while pos != -1:
+        if (total_quotes - buf.count(b'"', pos)) % 2 == 0:
+            return pos + 1
+        pos = buf.rfind(b"\n", 0, pos)
+    return 0
+
+
+def _iter_row_aligned_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Read *stream* in roughly ``chunk_size`` pieces that end on record boundaries."""
+    carry = b""
+    while block := stream.read(chunk_size):
+        buf = carry + block
+        cut = _row_boundary(buf)
+        if cut == 0:  # a single record longer than the block; keep reading
+            carry = buf
+            continue
+        yield buf[:cut]
+        carry = buf[cut:]
+    if carry:
+        yield carry
+
+
+class _ChunkErrors:
+    """Error collector used inside worker processes (row numbers are chunk-local)."""
+
+    __slots__ = ("errors", "rows_failed", "rejected")
+
+    def __init__(self) -> None:
+        self.errors: list[tuple[int, str, str, str]] = []
+        self.rows_failed: int = 0
+        self.rejected: list[tuple] = []
+
+    def record_error(self, row_num: int, col: str, raw: str, reason: str) -> None:
+        if len(self.errors) < 50:
+            self.errors.append((row_num, col, raw, reason))
+        self.rows_failed += 1
+
+    def reject(self, row_num: int, col: str, raw: str, reason: str, row: list[str]) -> None:
+        self.record_error(row_num, col, raw, reason)
+        self.rejected.append((row_num, col, reason, row))
+
+
+def _convert_chunk(
+    chunk: bytes, has_header: bool, plan: _LoadPlan
+) -> tuple[list[tuple] | ColumnBatch, _ChunkErrors, int]:
+    """Worker entry point: convert one chunk, returning (rows, errors, row_count)."""
+    reader = csv.reader(_iter_text_lines(io.BytesIO(chunk), len(chunk) or 1))
+    if has_header:
+        next(reader, None)
+    row_count = 0
+
+    def counted() -> Iterator[list[str]]:
+        nonlocal row_count
+        for row in reader:
+            if row:
+                row_count += 1
+            yield row
+
+    errors = _ChunkErrors()
+    # One batch per chunk; the parent re-slices it to DATA_LOAD_BATCH_SIZE.
+    batches = list(_convert_batches(counted(), plan, errors, len(chunk) + 1))
+    errors.rejected = _drain_rejects(errors, plan)
+    return (batches[0] if batches else []), errors, row_count
+
+
+def _convert_chunks_parallel(
+    chunks: Iterator[bytes],
+    plan: _LoadPlan,
+    result: LoadResult,
+    batch_size: int,
+    pool: concurrent.futures.Executor,
+    max_in_flight: int,
+    start_offset: int = 0,
+    start_row: int = 0,
+    has_header: bool = True,
+) -> Iterator[tuple[list[tuple] | ColumnBatch | None, list[tuple], LoadCheckpoint | None]]:
+    """Fan chunks out to *pool* and yield converted batches in file order.
+
+    At most ``max_in_flight`` chunks are outstanding, which bounds memory.
+    Chunk-local row numbers in errors and rejects are rebased onto the file.
+    Checkpoints fall on chunk boundaries: each chunk's batches are followed
+    by a ``(None, rejects, checkpoint)`` item.
+    """
+    pending: collections.deque[tuple[concurrent.futures.Future, int]] = collections.deque()
+    rows_before = start_row
+
+    def merge(
+        future: concurrent.futures.Future, end_offset: int
+    ) -> Iterator[tuple[list[tuple] | ColumnBatch | None, list[tuple], LoadCheckpoint | None]]:
+        nonlocal rows_before
+        rows, errors, row_count = future.result()
+        for row_num, col, raw, reason in errors.errors:
+            result.record_error(rows_before + row_num, col, raw, reason)
+        result.rows_failed += errors.rows_failed - len(errors.errors)
+        rejects = [(rows_before + row_num, *rest) for row_num, *rest in errors.rejected]
+        rows_before += row_count
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size], [], None
+        yield None, rejects, LoadCheckpoint(end_offset, rows_before, result.rows_failed)
+
+    offset = start_offset
+    try:
+        for i, chunk in enumerate(chunks):
+            offset += len(chunk)
+            future = pool.submit(_convert_chunk, chunk, has_header and i == 0, plan)
+            pending.append((future, offset))
+            if len(pending) >= max_in_flight:
+                yield from merge(*pending.popleft())
+        while pending:
+            yield from merge(*pending.popleft())
+    finally:
+        for future, _ in pending:
+            future.cancel()
+
+
+# ── Arrow conversion ───────────────────────────────────────────
+#
+# Parquet/Arrow columns are already typed.  Where a column's Arrow type maps
+# onto its registry type the values go to the writer as they are; other
+# columns are rendered as text and converted like CSV cells.
+
+
+def _arrow_column(column, data_type: str, date_format: str | None) -> tuple[list, list[int]]:
+    """Convert one Arrow column; returns ``(values, bad positions)`` like :func:`convert_column`."""
+    pa = import_pyarrow()
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if registry_type_for_arrow(column.type) == data_type:
+        if data_type == "FLOAT" and not pa.types.is_floating(column.type):
+            column = column.cast(pa.float64())
+        elif data_type == "DATE" and not pa.types.is_timestamp(column.type):
+            column = column.cast(pa.timestamp("us"))
+        elif data_type == "DATE" and column.type.tz is not None:
+            column = column.cast(pa.timestamp(column.type.unit))  # TIMESTAMP holds UTC
+        return column.to_pylist(), []
+    if data_type == "STRING":
+        return column.cast(pa.string()).to_pylist(), []
+    values = ["" if v is None else str(v) for v in column.to_pylist()]
+    return convert_column(values, data_type, date_format)
+
+
+def _convert_record_batches(
+    record_batches: Iterator,
+    plan: _LoadPlan,
+    result: LoadResult,
+    start_row: int,
+    total_rows: int,
+    total_bytes: int,
+) -> Iterator[tuple[ColumnBatch | None, list[tuple], LoadCheckpoint]]:
+    """Turn Arrow record batches into ColumnBatches, each with its checkpoint.
+
+    Rows before *start_row* are skipped.  Checkpoint offsets map rows done
+    proportionally onto *total_bytes* for progress reporting.
+    """
+    rows_done = 0
+    for record_batch in record_batches:
+        if rows_done + record_batch.num_rows <= start_row:
+            rows_done += record_batch.num_rows
+            continue
+        if rows_done < start_row:
+            record_batch = record_batch.slice(start_row - rows_done)
+            rows_done = start_row
+
+        columns: list[list] = []
+        failed: dict[int, tuple[int, str]] = {}  # batch position -> (first bad column, reason)
+        for i, idx in enumerate(plan.csv_indexes):
+            phys = plan.physical_names[i]
+            data_type = plan.data_types[phys]
+            converted, bad = _arrow_column(
+                record_batch.column(idx), data_type, plan.date_formats.get(phys)
+            )
+            for pos in bad:
+                failed.setdefault(pos, (i, f"Cannot convert to {data_type}"))
+            if plan.limits[i] is not None:
+                for pos in _refused(converted, plan.limits[i]):
+                    failed.setdefault(pos, (i, plan.limits[i].reason))
+            if i in plan.required:
+                for pos, value in enumerate(converted):
+                    if value is None or value == "":
+                        failed.setdefault(pos, (i, _MISSING_REQUIRED))
+            columns.append(converted)
+
+        for pos in sorted(failed):
+            i, reason = failed[pos]
+            row = [
+                "" if (value := record_batch.column(j)[pos].as_py()) is None else str(value)
+                for j in range(record_batch.num_columns)
+            ]
+            result.reject(
+                rows_done + pos + 1, plan.csv_keys[i], row[plan.csv_indexes[i]], reason, row
+            )
+        if failed:
+            keep = [pos for pos in range(record_batch.num_rows) if pos not in failed]
+            columns = [[col[pos] for pos in keep] for col in columns]
+
+        rows_done += record_batch.num_rows
+        offset = total_bytes * rows_done // total_rows if total_rows else total_bytes
+        checkpoint = LoadCheckpoint(offset, rows_done, result.rows_failed)
+        batch = ColumnBatch(columns, record_batch.num_rows - len(failed))
+        yield batch, _drain_rejects(result, plan), checkpoint
+    yield None, [], LoadCheckpoint(total_bytes, rows_done, result.rows_failed)
 
 
-async def _flush_batch(
-    db: AsyncSession, insert_sql: str, batch: list[dict]
+_END_OF_BATCHES = object()
+
+
+def _produce_batches(
+    batches: Iterator[tuple[list[tuple] | ColumnBatch | None, list[tuple], LoadCheckpoint | None]],
+    queue: asyncio.Queue,
+    loop: asyncio.AbstractEventLoop,
+    stop: threading.Event,
 ) -> None:
-    """Execute a batch of INSERT statements."""
-    stmt = text(insert_sql)
-    for params in batch:
-        await db.execute(stmt, params)
+    """Run in a worker thread: push converted batches onto the event-loop queue.
+
+    Always terminates the stream with ``_END_OF_BATCHES`` (unless the
+    consumer has gone away) so the writer never waits forever, even when
+    parsing raises.
+    """
+
+    def put(item: object) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    try:
+        for batch in batches:
+            if not put(batch):
+                return
+    finally:
+        put(_END_OF_BATCHES)
+
+
+# ── Batch writers ──────────────────────────────────────────────
+#
+# A writer receives batches of converted rows (in ``physical_names`` order),
+# either as a list of row tuples or as a ColumnBatch, persists them inside
+# the session's current transaction and returns ``(inserted, updated)``.
+# The COPY writer streams each batch over the binary COPY protocol in a
+# single round trip; the INSERT writer is the portable fallback and binds
+# each column as one array.  The upsert writer stages each batch through
+# one of those and merges it into the target with a set-based statement.
+# Given an ``enqueue_source_id``, project writers also queue the rows they
+# insert (see :func:`queue_insert_sql`).
+
+
+class _InsertBatchWriter:
+    method = "insert"
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        table_name: str,
+        physical_names: list[str],
+        sql_types: list[str],
+        enqueue_source_id: UUID | None = None,
+    ) -> None:
+        self._db = db
+        self._width = len(physical_names)
+        self._stmt = statement_registry.insert(
+            table_name, physical_names, sql_types, enqueue=enqueue_source_id is not None
+        )
+        self._params = {} if enqueue_source_id is None else queue_params(enqueue_source_id)
+
+    async def write(self, batch: list[tuple] | ColumnBatch) -> tuple[int, int]:
+        if isinstance(batch, ColumnBatch):
+            columns = batch.columns
+        else:
+            columns = [list(col) for col in zip(*batch)] or [[] for _ in range(self._width)]
+        params = {f"c{i}": col for i, col in enumerate(columns)}
+        await self._db.execute(self._stmt, {**params, **self._params})
+        return len(batch), 0
+
+    async def close(self) -> None:
+        pass
+
+
+class _CopyBatchWriter:
+    method = "copy"
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        driver_conn,
+        table_name: str,
+        physical_names: list[str],
+        enqueue_source_id: UUID | None = None,
+    ) -> None:
+        self._db = db
+        self._conn = driver_conn
+        self._table_name = table_name
+        self._columns = physical_names
+        # COPY cannot return generated ids, so when queueing, ids are drawn
+        # from the table's sequence up front and copied with the rows.
+        self._enqueue_source_id = enqueue_source_id
+        self._next_ids = text(
+            "SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)"
+        )
+        self._queue = queue_text(
+            queue_insert_sql("(SELECT unnest(CAST(:ids AS BIGINT[])) AS id)")
+        )
+
+    async def write(self, batch: list[tuple] | ColumnBatch) -> tuple[int, int]:
+        if not self._conn.is_in_transaction():
+            # SQLAlchemy's asyncpg adapter sends BEGIN lazily with the next
+            # statement, so after a checkpoint commit a bare COPY would
+            # autocommit outside the transaction that records the checkpoint.
+            await self._db.execute(text("SELECT 1"))
+        if self._enqueue_source_id is None or not len(batch):
+            await self._conn.copy_records_to_table(
+                self._table_name, records=batch, columns=self._columns
+            )
+            return len(batch), 0
+
+        ids = (
+            await self._db.execute(
+                self._next_ids, {"table": f'"{self._table_name}"', "n": len(batch)}
+            )
+        ).scalars().all()
+        await self._conn.copy_records_to_table(
+            self._table_name,
+            records=[(record_id, *row) for record_id, row in zip(ids, batch)],
+            columns=["id", *self._columns],
+        )
+        await self._db.execute(
+            self._queue, {"ids": ids, **queue_params(self._enqueue_source_id)}
+        )
+        return len(batch), 0
+
+    async def close(self) -> None:
+        pass
+
+
+class _UpsertBatchWriter:
+    """Stage each batch in a temp table, then merge it keyed on the unique ID.
+
+    A batch must not repeat a key (see :func:`_drop_duplicate_keys`).
+    Existing rows are only rewritten when at least one loaded column
+    differs, so unchanged rows cost no writes (and no dead tuples).
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        staging: _InsertBatchWriter | _CopyBatchWriter,
+        staging_table: str,
+        table_name: str,
+        physical_names: list[str],
+        key_column: str,
+        enqueue_source_id: UUID | None = None,
+    ) -> None:
+        self.method = staging.method
+        self._db = db
+        self._staging = staging
+        self._staging_table = staging_table
+
+        cols = ", ".join(f'"{p}"' for p in physical_names)
+        non_key = [p for p in physical_names if p != key_column]
+        if non_key:
+            assignments = ", ".join(f'"{p}" = EXCLUDED."{p}"' for p in non_key)
+            target_row = ", ".join(f't."{p}"' for p in non_key)
+            excluded_row = ", ".join(f'EXCLUDED."{p}"' for p in non_key)
+            on_conflict = (
+                f"DO UPDATE SET {assignments} "
+                f"WHERE ROW({target_row}) IS DISTINCT FROM ROW({excluded_row})"
+            )
+        else:
+            on_conflict = "DO NOTHING"
+
+        queued = ""
+        self._params = {}
+        if enqueue_source_id is not None:
+            queued = f", queued AS ({queue_insert_sql('(SELECT id FROM merged WHERE inserted)')})"
+            self._params = queue_params(enqueue_source_id)
+
+        self._truncate = text(f'TRUNCATE "{staging_table}"')
+        merge = (
+            f"WITH merged AS ("
+            f'  INSERT INTO "{table_name}" AS t ({cols}) SELECT {cols} FROM "{staging_table}"'
+            f'  ON CONFLICT ("{key_column}") {on_conflict}'
+            f"  RETURNING t.id, (xmax = 0) AS inserted"
+            f"){queued} SELECT count(*) FILTER (WHERE inserted) AS inserted,"
+            f"         count(*) FILTER (WHERE NOT inserted) AS updated FROM merged"
+        )
+        self._merge = queue_text(merge) if enqueue_source_id is not None else text(merge)
+
+    async def write(self, batch: list[tuple] | ColumnBatch) -> tuple[int, int]:
+        await self._db.execute(self._truncate)
+        await self._staging.write(batch)
+        row = (await self._db.execute(self._merge, self._params)).one()
+        return row.inserted, row.updated
+
+    async def close(self) -> None:
+        await self._db.execute(text(f'DROP TABLE IF EXISTS "{self._staging_table}"'))
+
+
+def _drop_duplicate_keys(
+    batch: list[tuple] | ColumnBatch, key_pos: int
+) -> tuple[list[tuple] | ColumnBatch, int]:
+    """Keep the last row of each key in *batch*; returns it and the rows dropped.
+
+    An upsert merges a batch in one statement, which cannot update a row
+    twice.  Rows without a key never conflict, so all of them are kept.
+    """
+    if isinstance(batch, ColumnBatch):
+        keys = batch.columns[key_pos]
+    else:
+        keys = [row[key_pos] for row in batch]
+    last = {key: i for i, key in enumerate(keys) if key is not None}
+    keep = [i for i, key in enumerate(keys) if key is None or last[key] == i]
+    if len(keep) == len(keys):
+        return batch, 0
+    if isinstance(batch, ColumnBatch):
+        batch = ColumnBatch([[col[i] for i in keep] for col in batch.columns], len(keep))
+    else:
+        batch = [batch[i] for i in keep]
+    return batch, len(keys) - len(keep)
+
+
+class _EnumLabelWriter:
+    """Add the labels a batch brings to its enum columns, then write it.
+
+    Enum types start with the values the inference profile saw (see
+    app.services.storage_types); new categories are added as they arrive.
+    """
+
+    def __init__(self, writer, enums: dict[int, tuple[str, set[str]]]) -> None:
+        self.method = writer.method
+        self._writer = writer
+        self._enums = enums  # plan position -> (enum type, its labels)
+
+    async def write(self, batch: list[tuple] | ColumnBatch) -> tuple[int, int]:
+        for pos, (sql_type, labels) in self._enums.items():
+            if isinstance(batch, ColumnBatch):
+                values = batch.columns[pos]
+            else:
+                values = (row[pos] for row in batch)
+            new = {value for value in values if value is not None} - labels
+            if new:
+                await add_enum_labels(sql_type, new, labels)
+                labels |= new
+        return await self._writer.write(batch)
+
+    async def close(self) -> None:
+        await self._writer.close()
+
+
+async def _get_plain_writer(
+    db: AsyncSession,
+    table_name: str,
+    physical_names: list[str],
+    sql_types: list[str],
+    enqueue_source_id: UUID | None = None,
+) -> _InsertBatchWriter | _CopyBatchWriter:
+    """Pick the COPY writer when configured and the driver is asyncpg."""
+    if settings.DATA_LOAD_METHOD == "copy":
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        driver_conn = raw.driver_connection
+        if hasattr(driver_conn, "copy_records_to_table"):
+            return _CopyBatchWriter(
+                db, driver_conn, table_name, physical_names, enqueue_source_id
+            )
+    return _InsertBatchWriter(db, table_name, physical_names, sql_types, enqueue_source_id)
+
+
+async def _get_batch_writer(
+    db: AsyncSession,
+    table_name: str,
+    physical_names: list[str],
+    sql_types: list[str],
+    key_column: str | None = None,
+    enqueue_source_id: UUID | None = None,
+) -> _InsertBatchWriter | _CopyBatchWriter | _UpsertBatchWriter | _EnumLabelWriter:
+    """Build the writer for a project table (see :func:`_get_plain_writer`).
+
+    With a *key_column* the chosen writer targets a temp staging table and
+    is wrapped in an upsert writer, which then does any queueing itself.
+    If the table has enum columns, the writer extends their types first.
+    """
+    target = table_name
+    if key_column is not None:
+        target = f"stg_{table_name}"[:63]
+        col_list = ", ".join(f'"{p}"' for p in physical_names)
+        await ensure_unique_index(db, table_name, key_column)
+        await db.execute(text(f'DROP TABLE IF EXISTS pg_temp."{target}"'))
+        await db.execute(
+            text(f'CREATE TEMP TABLE "{target}" AS SELECT {col_list} FROM "{table_name}" WITH NO DATA')
+        )
+
+    if key_column is None:
+        writer = await _get_plain_writer(
+            db, target, physical_names, sql_types, enqueue_source_id
+        )
+    else:
+        staging = await _get_plain_writer(db, target, physical_names, sql_types)
+        writer = _UpsertBatchWriter(
+            db, staging, target, table_name, physical_names, key_column, enqueue_source_id
+        )
+
+    enums = {}
+    for pos, sql_type in enumerate(sql_types):
+        if is_enum_type(sql_type):
+            labels = await db.execute(
+                text("SELECT enumlabel FROM pg_enum WHERE enumtypid = CAST(:type AS regtype)"),
+                {"type": sql_type},
+            )
+            enums[pos] = (sql_type, set(labels.scalars().all()))
+    return _EnumLabelWriter(writer, enums) if enums else writer
@@ -0,0 +1,183 @@
+"""Date Format Detection: picks an explicit format per column for fast parsing.
+
+``dateutil`` can parse almost anything but is slow because it re-discovers
+the layout of every value.  Exported columns almost always use a single
+layout, so we detect it once from a sample and parse the rest with
+``datetime.fromisoformat`` / ``strptime``, falling back to ``dateutil`` only
+for the odd value that does not match.
+"""
+
+import re
+from datetime import datetime
+
+from dateutil import parser as dateutil_parser
+
+# Pseudo-format for anything ``datetime.fromisoformat`` accepts
+# (dates, date-times with "T" or space, fractional seconds, UTC offsets).
+ISO_8601 = "ISO8601"
+
+# Candidate formats in preference order.  Month-first comes before day-first
+# to match dateutil's default (dayfirst=False) on ambiguous samples.
+_CANDIDATE_FORMATS = (
+    ISO_8601,
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%y",
+    "%d/%m/%y",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y/%m/%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%b %d %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%d %B %Y",
+)
+
+_DETECT_SAMPLE_SIZE = 50
+_DETECT_MIN_RATIO = 0.6
+
+_NUMERIC_DIRECTIVES = frozenset("dmyYHIMS")
+
+
+def _shape(fmt: str) -> re.Pattern:
+    """Compile a loose pattern that every value *fmt* parses is sure to match.
+
+    Numbers become runs of digits and names any text, so a value that
+    fails the pattern can be rejected without the cost of a strptime error.
+    """
+    if fmt == ISO_8601:
+        return re.compile(r"\d{4}")  # fromisoformat always starts with the year
+    parts = []
+    for token in re.split(r"(%.|\s+)", fmt):
+        if token[:1] == "%" and len(token) == 2:
+            parts.append(r"\s?\d+" if token[1] in _NUMERIC_DIRECTIVES else ".+?")
+        elif token.isspace():
+            parts.append(r"\s+")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts) + "$", re.DOTALL)
+
+
+_SHAPES = {fmt: _shape(fmt) for fmt in _CANDIDATE_FORMATS}
+
+
+def _parse_exact(value: str, fmt: str) -> datetime | None:
+    shape = _SHAPES.get(fmt)
+    if shape is not None and shape.match(value) is None:
+        return None
+    try:
+        if fmt == ISO_8601:
+            return datetime.fromisoformat(value)
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+def detect_date_format(values: list[str]) -> str | None:
+    """Return the candidate format that parses the most sampled values.
+
+    Returns ``None`` when no format covers at least 60% of the sample.
+    """
+    sample = [v.strip() for v in values[:_DETECT_SAMPLE_SIZE] if v.strip()]
+    if not sample:
+        return None
+
+    best_format: str | None = None
+    best_count = 0
+    for fmt in _CANDIDATE_FORMATS:
+        count = 0
+        for pos, value in enumerate(sample):
+            # Give up once this format can no longer beat the current best.
+            if count + (len(sample) - pos) <= best_count:
+                break
+            if _parse_exact(value, fmt) is not None:
+                count += 1
+        if count > best_count:
+            best_format, best_count = fmt, count
+            if count == len(sample):
+                break
+
+    if best_count / len(sample) < _DETECT_MIN_RATIO:
+        return None
+    return best_format
+
+
+# strptime directives and the to_timestamp() fields that read them alike.
+_PG_FIELDS = {
+    "Y": "YYYY",
+    "y": "YY",
+    "m": "MM",
+    "d": "DD",
+    "H": "HH24",
+    "I": "HH12",
+    "M": "MI",
+    "S": "SS",
+    "f": "US",
+    "p": "AM",
+    "b": "Mon",
+    "B": "Month",
+    "%": "%",
+}
+
+
+def pg_pattern(fmt: str) -> str:
+    """The PostgreSQL ``to_timestamp`` pattern that reads what strptime *fmt* does.
+
+    Literal letters are double-quoted so they are not taken for fields.
+    Raises ValueError for directives without an equivalent.
+    """
+    parts = []
+    for token in re.split(r"(%.)", fmt):
+        if token[:1] == "%" and len(token) == 2:
+            if token[1] not in _PG_FIELDS:
+                raise ValueError(f"Date format {fmt!r}: {token} cannot be read in the database.")
+            parts.append(_PG_FIELDS[token[1]])
+        else:
+            parts.append(re.sub(r"[A-Za-z]+", lambda m: f'"{m.group()}"', token))
+    return "".join(parts)
+
+
+class DateParser:
+    """Parse values with a known format, falling back to dateutil.
+
+    Instances are picklable so they can be shipped to loader worker
+    processes as part of a load plan.
+    """
+
+    __slots__ = ("fmt",)
+
+    def __init__(self, fmt: str | None) -> None:
+        self.fmt = fmt
+
+    def __reduce__(self):
+        return (DateParser, (self.fmt,))
+
+    def __call__(self, value: str) -> datetime | None:
+        value = value.strip()
+        if self.fmt is not None:
+            parsed = _parse_exact(value, self.fmt)
+            if parsed is not None:
+                return parsed
+        try:
+            return dateutil_parser.parse(value, fuzzy=False)
+        except (ValueError, OverflowError):
+            return None
+
+    def parse_column(self, values: list[str]) -> list[datetime | None]:
+        """Bulk fast path: raises ``ValueError`` if any non-empty value misses the format."""
+        if self.fmt == ISO_8601:
+            return [datetime.fromisoformat(v) if v else None for v in values]
+        if self.fmt is not None:
+            fmt = self.fmt
+            return [datetime.strptime(v.strip(), fmt) if v else None for v in values]
+        raise ValueError("no known format")
@@ -0,0 +1,620 @@
+"""Schema Evolution: change a provisioned project's columns without reloading it.
+
+``POST /schema/{id}/evolve`` takes the project's full column list as it
+should become and diffs it against the registry by physical name:
+
+* new columns are added with ``ADD COLUMN`` (nullable, no default: a
+  catalog-only change, no table rewrite);
+* ``renamed_from`` renames a column, and its indexes, in the catalog;
+* display names, date formats and the unique-ID / lookup flags are
+  registry updates; index changes are applied concurrently afterwards;
+* a changed data type cannot be done in place without rewriting the table
+  under an exclusive lock, so it becomes a :class:`SchemaChange`.
+
+A type change adds a shadow column of the new type and a trigger that
+fills it for rows written meanwhile, then a background runner converts
+existing rows in batches of ``SCHEMA_BACKFILL_BATCH_SIZE`` ids, one short
+transaction each, committing its progress with every batch so a crashed
+run resumes.  Indexes on the column are rebuilt concurrently on the shadow
+column.  Finally a short transaction drops the original column and
+renames the shadow into its place.  Values are converted the way the
+loader parses them (see :func:`convert_sql`); those that cannot be (see
+``pg_input_is_valid``, PostgreSQL 16+) become NULL and are counted.
+Added and retyped columns get the wide SQL type of their registry type.
+
+DDL takes its table lock with ``DATA_LOAD_SWAP_LOCK_TIMEOUT_MS`` as the
+lock timeout, so it never queues agents' reads behind a long wait.
+"""
+
+import asyncio
+from datetime import timedelta
+from uuid import UUID
+
+import structlog
+from sqlalchemy import and_, func, or_, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import async_session_factory, engine
+from app.models.registry import ColumnMetadata, IndexMetadata, SourceMetadata
+from app.models.schema_change import SchemaChange
+from app.schemas.schema_inference import EvolvedColumn
+from app.services.data_loader import _FALSE_WORDS, _TRUE_WORDS
+from app.services.date_formats import pg_pattern
+from app.services.indexing import INDEX_PENDING, build_indexes, index_columns
+from app.services.partitioning import list_partitions
+from app.services.provisioning import (
+    _TYPE_MAP,
+    _index_name,
+    _sanitize_identifier,
+    layout_signature,
+    plan_indexes,
+)
+from app.services.registry_cache import notify_project_changed
+from app.services.storage_types import is_enum_type
+
+logger = structlog.get_logger("services.evolution")
+
+CHANGE_QUEUED = "queued"
+CHANGE_RUNNING = "running"
+CHANGE_COMPLETED = "completed"
+CHANGE_FAILED = "failed"
+
+# Swap attempts before a type change gives up waiting for readers.
+_SWAP_ATTEMPTS = 5
+
+# Runner tasks owned by this process, keyed by change id.
+_active: dict[UUID, asyncio.Task] = {}
+# Index drops and builds following an evolution.
+_maintenance: set[asyncio.Task] = set()
+
+
+class EvolutionPlan:
+    """What :func:`plan_evolution` found to change, by physical name."""
+
+    def __init__(self) -> None:
+        self.added: list[tuple[str, EvolvedColumn]] = []
+        self.renamed: dict[str, str] = {}
+        self.updated: list[tuple[ColumnMetadata, EvolvedColumn]] = []
+        self.retyped: list[tuple[ColumnMetadata, EvolvedColumn]] = []
+        self.indexes_added: list[IndexMetadata] = []
+        self.indexes_dropped: list[IndexMetadata] = []
+        self.physical_names: list[str] = []
+
+
+def _shadow_name(physical_name: str) -> str:
+    return f"evo_{physical_name}"[:63]
+
+
+def _trigger_name(table_name: str, physical_name: str) -> str:
+    return _index_name(table_name, physical_name, "evo")
+
+
+def convert_sql(expr: str, to_type: str, date_format: str | None = None) -> str:
+    """SQL converting *expr* to the column type for *to_type*, NULL where invalid.
+
+    Values are read as the loader reads them (see app.services.data_loader):
+    trimmed, numbers without thousands separators, its true/false words, and
+    dates in *date_format* first (``qlogic_try_timestamp``, see
+    app.models.schema_change), then in any form PostgreSQL accepts.
+    """
+    sql_type = _TYPE_MAP[to_type]
+    if sql_type == "TEXT":
+        return f"{expr}::text"
+    value = f"btrim({expr}::text)"
+    if to_type in ("INTEGER", "FLOAT"):
+        value = f"replace({value}, ',', '')"
+    if to_type == "BOOLEAN":
+        true_words = ", ".join(f"'{w}'" for w in _TRUE_WORDS)
+        false_words = ", ".join(f"'{w}'" for w in _FALSE_WORDS)
+        return (
+            f"CASE WHEN lower({value}) IN ({true_words}) THEN true"
+            f" WHEN lower({value}) IN ({false_words}) THEN false END"
+        )
+    cast = f"CASE WHEN pg_input_is_valid({value}, '{sql_type}') THEN {value}::{sql_type} END"
+    if to_type == "DATE" and date_format:
+        pattern = pg_pattern(date_format).replace("'", "''")
+        return f"coalesce(qlogic_try_timestamp({value}, '{pattern}'), {cast})"
+    return cast
+
+
+def _date_format(col: EvolvedColumn) -> str | None:
+    return col.date_format if col.data_type.upper() == "DATE" else None
+
+
+def plan_evolution(source: SourceMetadata, columns: list[EvolvedColumn]) -> EvolutionPlan:
+    """Diff *columns* against the project's registry rows.
+
+    Raises ValueError for unsupported types, unknown renames, duplicate
+    names, dropped columns, changes to the partition column, or a retype
+    to DATE whose date format the database cannot read.
+    """
+    plan = EvolutionPlan()
+    existing = {meta.physical_name: meta for meta in source.columns}
+    seen: set[str] = set()
+    flagged = []
+
+    for col in columns:
+        data_type = col.data_type.upper()
+        if data_type not in _TYPE_MAP:
+            raise ValueError(
+                f"Unsupported data type: {col.data_type}. "
+                f"Allowed: {', '.join(_TYPE_MAP.keys())}"
+            )
+        phys_name = _sanitize_identifier(col.original_name)
+        current = col.renamed_from or phys_name
+        if phys_name in seen or current in seen:
+            raise ValueError(f"Column {phys_name!r} appears more than once.")
+        seen.update((phys_name, current))
+        plan.physical_names.append(phys_name)
+
+        meta = existing.get(current)
+        if meta is None:
+            if col.renamed_from:
+                raise ValueError(f"Cannot rename {col.renamed_from!r}: no such column.")
+            plan.added.append((phys_name, col))
+            flagged.append((col, phys_name))
+            continue
+
+        if current == source.partition_column and (
+            phys_name != current or data_type != meta.data_type
+        ):
+            raise ValueError("The partition column cannot be renamed or retyped.")
+        if phys_name != current:
+            if phys_name in existing:
+                raise ValueError(f"Cannot rename {current!r} to existing column {phys_name!r}.")
+            plan.renamed[current] = phys_name
+        if data_type != meta.data_type:
+            if data_type == "DATE" and col.date_format:
+                pg_pattern(col.date_format)
+            plan.retyped.append((meta, col))
+        elif (
+            col.display_name != meta.display_name
+            or col.is_unique_id != meta.is_unique_id
+            or (data_type == "DATE" and col.date_format != meta.date_format)
+        ):
+            plan.updated.append((meta, col))
+        flagged.append((col, phys_name))
+
+    dropped = set(existing) - seen
+    if dropped:
+        raise ValueError(
+            f"Columns missing from the new schema: {', '.join(sorted(dropped))}. "
+            "Dropping columns is not supported."
+        )
+
+    # Indexes: wanted per the new flags, against those in the registry.
+    wanted = {
+        index.physical_name: index
+        for index in plan_indexes(
+            source.table_name,
+            [col for col, _ in flagged],
+            [phys for _, phys in flagged],
+            source.partition_column,
+        )
+    }
+    have = {}
+    for index in source.indexes:
+        have[plan.renamed.get(index.physical_name, index.physical_name)] = index
+    for phys_name, index in wanted.items():
+        current = have.get(phys_name)
+        if current is None or current.is_unique != index.is_unique:
+            plan.indexes_added.append(index)
+    for phys_name, index in have.items():
+        if phys_name not in wanted or wanted[phys_name].is_unique != index.is_unique:
+            plan.indexes_dropped.append(index)
+    return plan
+
+
+async def _lock_timeout(db: AsyncSession) -> None:
+    await db.execute(
+        text(f"SET LOCAL lock_timeout = {int(settings.DATA_LOAD_SWAP_LOCK_TIMEOUT_MS)}")
+    )
+
+
+async def has_active_change(db: AsyncSession, source_id: UUID) -> bool:
+    """Whether a type change is still being backfilled for the project."""
+    active = await db.execute(
+        select(SchemaChange.id)
+        .where(
+            SchemaChange.source_id == source_id,
+            SchemaChange.status.in_([CHANGE_QUEUED, CHANGE_RUNNING]),
+        )
+        .limit(1)
+    )
+    return active.scalar_one_or_none() is not None
+
+
+async def evolve_schema(
+    db: AsyncSession, source: SourceMetadata, columns: list[EvolvedColumn]
+) -> tuple[EvolutionPlan, list[SchemaChange]]:
+    """Apply the online part of an evolution in one short transaction.
+
+    Returns the plan and the queued type changes; the caller schedules
+    those with :func:`schedule_schema_change` and the index changes with
+    :func:`schedule_index_maintenance`.  Raises ValueError (see
+    :func:`plan_evolution`) or if a type change is still running.
+    """
+    if await has_active_change(db, source.id):
+        raise ValueError("A type change is still running for this project.")
+    await db.refresh(source, attribute_names=["indexes"])
+    plan = plan_evolution(source, columns)
+    table = source.table_name
+
+    await _lock_timeout(db)
+    for old, new in plan.renamed.items():
+        await db.execute(text(f'ALTER TABLE "{table}" RENAME COLUMN "{old}" TO "{new}"'))
+    for meta in source.columns:
+        meta.physical_name = plan.renamed.get(meta.physical_name, meta.physical_name)
+    await _rename_indexes(db, source, plan.renamed)
+
+    for phys_name, col in plan.added:
+        sql_type = _TYPE_MAP[col.data_type.upper()]
+        await db.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{phys_name}" {sql_type}'))
+        db.add(
+            ColumnMetadata(
+                source_id=source.id,
+                physical_name=phys_name,
+                display_name=col.display_name,
+                data_type=col.data_type.upper(),
+                sql_type=sql_type,
+                is_unique_id=col.is_unique_id,
+                date_format=_date_format(col),
+                profile=col.profile.model_dump() if col.profile else None,
+            )
+        )
+
+    for meta, col in plan.updated + plan.retyped:
+        meta.display_name = col.display_name
+        meta.is_unique_id = col.is_unique_id
+    for meta, col in plan.updated:
+        if meta.data_type == "DATE":
+            meta.date_format = col.date_format
+
+    changes = []
+    for meta, col in plan.retyped:
+        change = SchemaChange(
+            source_id=source.id,
+            physical_name=meta.physical_name,
+            shadow_column=_shadow_name(meta.physical_name),
+            from_type=meta.data_type,
+            to_type=col.data_type.upper(),
+            date_format=_date_format(col),
+            status=CHANGE_QUEUED,
+            last_id=0,
+            rows_done=0,
+            rows_failed=0,
+        )
+        await _add_shadow(db, table, change)
+        # The table stays locked until commit, so later rows get the trigger.
+        change.backfill_max_id = (
+            await db.execute(text(f'SELECT coalesce(max("id"), 0) FROM "{table}"'))
+        ).scalar()
+        db.add(change)
+        changes.append(change)
+
+    for index in plan.indexes_dropped:
+        await db.delete(index)
+    for index in plan.indexes_added:
+        index.source_id = source.id
+        db.add(index)
+
+    source.layout_signature = layout_signature(plan.physical_names)
+    await notify_project_changed(db, source.id)
+    await db.commit()
+    return plan, changes
+
+
+async def _rename_indexes(
+    db: AsyncSession, source: SourceMetadata, renamed: dict[str, str]
+) -> None:
+    """Rename the indexes of renamed columns, so their names follow :func:`_index_name`.
+
+    Upserts look their unique index up by that name (see
+    ``ensure_unique_index``); under the old one they would build a second.
+    """
+    table = source.table_name
+    partitions = []
+    if source.partition_strategy is not None and renamed:
+        partitions = [p["name"] for p in await list_partitions(db, table)]
+    for index in source.indexes:
+        new = renamed.get(index.physical_name)
+        if new is None:
+            continue
+        name = _index_name(table, new, "key" if index.is_unique else "idx")
+        await db.execute(text(f'ALTER INDEX IF EXISTS "{index.index_name}" RENAME TO "{name}"'))
+        for partition in partitions:
+            await db.execute(
+                text(
+                    f'ALTER INDEX IF EXISTS "{_index_name(partition, index.physical_name, "idx")}"'
+                    f' RENAME TO "{_index_name(partition, new, "idx")}"'
+                )
+            )
+        index.index_name, index.physical_name = name, new
+
+
+async def _add_shadow(db: AsyncSession, table: str, change: SchemaChange) -> None:
+    """Add the shadow column and the trigger keeping it current for new writes."""
+    shadow, column = change.shadow_column, change.physical_name
+    trigger = _trigger_name(table, column)
+    convert = convert_sql(f'NEW."{column}"', change.to_type, change.date_format)
+    await db.execute(
+        text(f'ALTER TABLE "{table}" ADD COLUMN "{shadow}" {_TYPE_MAP[change.to_type]}')
+    )
+    await db.execute(
+        text(
+            f'CREATE OR REPLACE FUNCTION "{trigger}"() RETURNS trigger LANGUAGE plpgsql AS $$'
+            f' BEGIN NEW."{shadow}" := {convert};'
+            " RETURN NEW; END $$"
+        )
+    )
+    await db.execute(
+        text(
+            f'CREATE TRIGGER "{trigger}" BEFORE INSERT OR UPDATE OF "{column}"'
+            f' ON "{table}" FOR EACH ROW EXECUTE FUNCTION "{trigger}"()'
+        )
+    )
+
+
+async def _drop_trigger(db: AsyncSession, table: str, change: SchemaChange) -> None:
+    trigger = _trigger_name(table, change.physical_name)
+    await db.execute(text(f'DROP TRIGGER IF EXISTS "{trigger}" ON "{table}"'))
+    await db.execute(text(f'DROP FUNCTION IF EXISTS "{trigger}"()'))
+
+
+def _claimable():
+    stale_before = func.now() - timedelta(seconds=settings.LOAD_JOB_STALE_SECONDS)
+    return or_(
+        SchemaChange.status == CHANGE_QUEUED,
+        and_(SchemaChange.status == CHANGE_RUNNING, SchemaChange.heartbeat_at < stale_before),
+    )
+
+
+async def _claim(change_id: UUID) -> bool:
+    """Atomically mark the change running; False if another runner owns it."""
+    async with async_session_factory() as db:
+        claimed = await db.execute(
+            update(SchemaChange)
+            .where(SchemaChange.id == change_id, _claimable())
+            .values(status=CHANGE_RUNNING, heartbeat_at=func.now())
+            .returning(SchemaChange.id)
+        )
+        await db.commit()
+        return claimed.scalar_one_or_none() is not None
+
+
+async def _load(db: AsyncSession, change_id: UUID) -> tuple[SchemaChange, SourceMetadata]:
+    change = await db.get(SchemaChange, change_id)
+    source = (
+        await db.execute(
+            select(SourceMetadata)
+            .options(selectinload(SourceMetadata.columns), selectinload(SourceMetadata.indexes))
+            .where(SourceMetadata.id == change.source_id)
+        )
+    ).scalar_one()
+    return change, source
+
+
+def _column_indexes(source: SourceMetadata, change: SchemaChange) -> list[IndexMetadata]:
+    return [i for i in source.indexes if i.physical_name == change.physical_name]
+
+
+async def _backfill(db: AsyncSession, table: str, change: SchemaChange) -> None:
+    """Convert existing rows into the shadow column, one committed batch at a time."""
+    column, shadow = f'"{change.physical_name}"', f'"{change.shadow_column}"'
+    convert = convert_sql(column, change.to_type, change.date_format)
+    while change.last_id < change.backfill_max_id:
+        upper = (
+            await db.execute(
+                text(
+                    f'SELECT "id" FROM "{table}" WHERE "id" > :last ORDER BY "id"'
+                    " OFFSET :skip LIMIT 1"
+                ),
+                {"last": change.last_id, "skip": settings.SCHEMA_BACKFILL_BATCH_SIZE - 1},
+            )
+        ).scalar()
+        upper = min(upper or change.backfill_max_id, change.backfill_max_id)
+        converted = await db.execute(
+            text(
+                f'UPDATE "{table}" SET {shadow} = {convert}'
+                ' WHERE "id" > :last AND "id" <= :upper'
+            ),
+            {"last": change.last_id, "upper": upper},
+        )
+        change.rows_done += converted.rowcount
+        change.last_id = upper
+        change.heartbeat_at = func.now()
+        await db.commit()
+        await asyncio.sleep(settings.SCHEMA_BACKFILL_PAUSE_MS / 1000)
+
+    change.rows_failed = (
+        await db.execute(
+            text(
+                f'SELECT count(*) FROM "{table}"'
+                f" WHERE {column} IS NOT NULL AND {shadow} IS NULL"
+            )
+        )
+    ).scalar()
+    await db.commit()
+
+
+async def _index_shadow(source: SourceMetadata, change: SchemaChange) -> None:
+    """Build the column's indexes on the shadow column concurrently, under temporary names.
+
+    Partitioned tables rebuild theirs after the swap (see app.services.indexing).
+    """
+    if source.partition_strategy is not None:
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for index in _column_indexes(source, change):
+            unique = "UNIQUE " if index.is_unique else ""
+            await conn.execute(
+                text(
+                    f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS"
+                    f' "{_shadow_name(index.index_name)}"'
+                    f' ON "{source.table_name}" ({index_columns(index, change.shadow_column)})'
+                )
+            )
+
+
+async def _swap(db: AsyncSession, change_id: UUID) -> SchemaChange:
+    """Replace the original column with the backfilled shadow, in one short transaction."""
+    change, source = await _load(db, change_id)
+    table = source.table_name
+    await _lock_timeout(db)
+    await _drop_trigger(db, table, change)
+    await db.execute(text(f'ALTER TABLE "{table}" DROP COLUMN "{change.physical_name}"'))
+    await db.execute(
+        text(
+            f'ALTER TABLE "{table}" RENAME COLUMN "{change.shadow_column}"'
+            f' TO "{change.physical_name}"'
+        )
+    )
+    for index in _column_indexes(source, change):
+        if source.partition_strategy is None:
+            await db.execute(
+                text(
+                    f'ALTER INDEX "{_shadow_name(index.index_name)}"'
+                    f' RENAME TO "{index.index_name}"'
+                )
+            )
+        else:
+            index.status = INDEX_PENDING  # dropped with the column; rebuilt next
+    meta = next(c for c in source.columns if c.physical_name == change.physical_name)
+    if is_enum_type(meta.sql_type):
+        await db.execute(text(f"DROP TYPE IF EXISTS {meta.sql_type}"))
+    meta.data_type = change.to_type
+    meta.sql_type = _TYPE_MAP[change.to_type]
+    meta.date_format = change.date_format
+    change.status = CHANGE_COMPLETED
+    change.finished_at = func.now()
+    await notify_project_changed(db, source.id)
+    await db.commit()
+    return change
+
+
+async def _fail(change_id: UUID, error: Exception) -> None:
+    """Undo a failed change (trigger, shadow column and indexes) and record why."""
+    async with async_session_factory() as db:
+        change, source = await _load(db, change_id)
+        names = [_shadow_name(i.index_name) for i in _column_indexes(source, change)]
+        await db.commit()
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for name in names:
+                await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        await _lock_timeout(db)
+        await _drop_trigger(db, source.table_name, change)
+        await db.execute(
+            text(
+                f'ALTER TABLE "{source.table_name}"'
+                f' DROP COLUMN IF EXISTS "{change.shadow_column}"'
+            )
+        )
+        change.status = CHANGE_FAILED
+        change.error_message = (
+            str(error.orig).strip().splitlines()[0]
+            if isinstance(error, DBAPIError) and error.orig
+            else "Type change failed."
+        )
+        change.finished_at = func.now()
+        await db.commit()
+
+
+async def run_schema_change(change_id: UUID) -> None:
+    """Claim a type change, then backfill, index and swap it; a no-op if owned elsewhere."""
+    if not await _claim(change_id):
+        return
+    try:
+        async with async_session_factory() as db:
+            change, source = await _load(db, change_id)
+            await _backfill(db, source.table_name, change)
+            await _index_shadow(source, change)
+
+        for attempt in range(_SWAP_ATTEMPTS):
+            try:
+                async with async_session_factory() as db:
+                    change = await _swap(db, change_id)
+                break
+            except DBAPIError:
+                # Most likely the lock timeout behind long-running readers.
+                if attempt == _SWAP_ATTEMPTS - 1:
+                    raise
+                logger.info("schema_change_swap_retry", change_id=str(change_id))
+                await asyncio.sleep(settings.LOAD_JOB_POLL_SECONDS)
+    except Exception as e:
+        logger.exception("schema_change_failed", change_id=str(change_id))
+        try:
+            await _fail(change_id, e)
+        except Exception:
+            logger.exception("schema_change_cleanup_failed", change_id=str(change_id))
+        return
+
+    logger.info(
+        "schema_change_completed",
+        change_id=str(change_id),
+        column=change.physical_name,
+        to_type=change.to_type,
+        rows_done=change.rows_done,
+        rows_failed=change.rows_failed,
+    )
+    if source.partition_strategy is not None:
+        await build_indexes(source.id)
+
+
+def schedule_schema_change(change_id: UUID) -> None:
+    """Start a runner task for the change unless this process already runs it."""
+    if change_id in _active:
+        return
+    task = asyncio.create_task(run_schema_change(change_id))
+    _active[change_id] = task
+    task.add_done_callback(lambda _: _active.pop(change_id, None))
+
+
+async def apply_index_changes(source_id: UUID, dropped: list[str], partitioned: bool) -> None:
+    """Drop de-flagged indexes and build newly planned ones, concurrently where possible."""
+    concurrently = "" if partitioned else "CONCURRENTLY "
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for name in dropped:
+                await conn.execute(text(f'DROP INDEX {concurrently}IF EXISTS "{name}"'))
+        await build_indexes(source_id)
+    except Exception:
+        logger.exception("index_maintenance_failed", source_id=str(source_id))
+
+
+def schedule_index_maintenance(source: SourceMetadata, plan: EvolutionPlan) -> None:
+    if not plan.indexes_added and not plan.indexes_dropped:
+        return
+    task = asyncio.create_task(
+        apply_index_changes(
+            source.id,
+            [index.index_name for index in plan.indexes_dropped],
+            source.partition_strategy is not None,
+        )
+    )
+    _maintenance.add(task)
+    task.add_done_callback(_maintenance.discard)
+
+
+async def schema_change_worker() -> None:
+    """Poll for queued type changes and for running ones whose runner has died."""
+    while True:
+        try:
+            async with async_session_factory() as db:
+                change_ids = (
+                    await db.execute(
+                        select(SchemaChange.id)
+                        .where(_claimable())
+                        .order_by(SchemaChange.created_at)
+                    )
+                ).scalars().all()
+            for change_id in change_ids:
+                schedule_schema_change(change_id)
+        except Exception:
+            logger.exception("schema_change_poll_failed")
+        await asyncio.sleep(settings.LOAD_JOB_POLL_SECONDS)
@@ -0,0 +1,237 @@
+"""Upload Formats: recognise uploaded files and open them for reading.
+
+CSV may arrive plain, gzip- or zstd-compressed; compressed uploads are
+decompressed as a stream, so the inference engine and the loader see the
+same CSV bytes either way.  Parquet and Arrow IPC files carry typed
+columns and are read with pyarrow instead of the CSV parser.
+"""
+
+import gzip
+import zlib
+from collections.abc import AsyncIterator
+from typing import BinaryIO
+
+FORMAT_CSV = "csv"
+FORMAT_CSV_GZIP = "csv.gz"
+FORMAT_CSV_ZSTD = "csv.zst"
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+
+# Filename suffix -> format.  Longest suffixes first so ".csv.gz" wins over ".gz".
+_SUFFIXES = (
+    (".csv.gz", FORMAT_CSV_GZIP),
+    (".csv.zst", FORMAT_CSV_ZSTD),
+    (".csv", FORMAT_CSV),
+    (".parquet", FORMAT_PARQUET),
+    (".arrow", FORMAT_ARROW),
+    (".feather", FORMAT_ARROW),
+)
+
+CSV_FORMATS = frozenset({FORMAT_CSV, FORMAT_CSV_GZIP, FORMAT_CSV_ZSTD})
+ARROW_FORMATS = frozenset({FORMAT_PARQUET, FORMAT_ARROW})
+
+ACCEPTED_SUFFIXES = ", ".join(suffix for suffix, _ in _SUFFIXES)
+
+
+class UploadFormatError(ValueError):
+    """An upload cannot be read: its codec is not installed or it is corrupt."""
+
+
+def detect_format(filename: str | None) -> str | None:
+    """Return the upload format implied by *filename*, or None if unsupported."""
+    lower = (filename or "").lower()
+    for suffix, fmt in _SUFFIXES:
+        if lower.endswith(suffix):
+            return fmt
+    return None
+
+
+def open_csv_stream(stream: BinaryIO, fmt: str) -> BinaryIO:
+    """Wrap *stream* so reads return decompressed CSV bytes.
+
+    The wrapper never closes *stream*.  Raises :class:`UploadFormatError`
+    if the zstd codec is not installed.
+    """
+    if fmt == FORMAT_CSV_GZIP:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if fmt == FORMAT_CSV_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise UploadFormatError("Reading .csv.zst files requires the 'zstandard' package.")
+        return zstandard.ZstdDecompressor().stream_reader(
+            stream, read_across_frames=True, closefd=False
+        )
+    return stream
+
+
+class CsvHeadScanner:
+    """Find where the header and the first *max_rows* records of a CSV end.
+
+    Feed it the (decompressed) CSV bytes in order.  A record ends at a
+    newline outside quotes; blank lines are not counted, as the CSV reader
+    skips them.
+    """
+
+    def __init__(self, max_rows: int) -> None:
+        self.max_rows = max_rows
+        self.buffer = bytearray()
+        self.complete = False
+        self._records = 0
+        self._in_quotes = False
+        self._line_start = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Append *chunk*; True once the sample is complete (the buffer then ends with it)."""
+        buf = self.buffer
+        pos = len(buf)
+        buf += chunk
+        while (newline := buf.find(b"\n", pos)) != -1:
+            self._in_quotes ^= buf.count(b'"', pos, newline) % 2 == 1
+            pos = newline + 1
+            if self._in_quotes:
+                continue
+            if buf[self._line_start : newline].rstrip(b"\r"):
+                self._records += 1
+                if self._records > self.max_rows:
+                    del buf[pos:]
+                    self.complete = True
+                    return True
+            self._line_start = pos
+        self._in_quotes ^= buf.count(b'"', pos) % 2 == 1
+        return False
+
+    def result(self) -> tuple[bytes, int]:
+        """``(bytes, records after the header)``, once complete or at end of input."""
+        records = self._records
+        if not self.complete and self.buffer[self._line_start :].strip(b"\r\n"):
+            records += 1  # last record without a trailing newline
+        return bytes(self.buffer), max(records - 1, 0)
+
+
+def read_csv_head(stream: BinaryIO, max_rows: int, chunk_size: int) -> tuple[bytes, int]:
+    """Read the header and the first *max_rows* records of a CSV stream.
+
+    Stops pulling from *stream* as soon as they are complete, so the cost
+    depends on the sample size rather than the file size.  Returns
+    ``(bytes, records after the header)``.
+    """
+    scanner = CsvHeadScanner(max_rows)
+    while chunk := stream.read(chunk_size):
+        if scanner.feed(chunk):
+            break
+    return scanner.result()
+
+
+async def read_csv_head_from_chunks(
+    chunks: AsyncIterator[bytes], fmt: str, max_rows: int
+) -> tuple[bytes, int]:
+    """Like :func:`read_csv_head`, for an upload arriving as (compressed) chunks.
+
+    Stops iterating *chunks* once the sample is complete, so the rest of
+    the upload is never received.
+    """
+    decompressor = _csv_decompressor(fmt)
+    scanner = CsvHeadScanner(max_rows)
+    try:
+        async for chunk in chunks:
+            if scanner.feed(decompressor.decompress(chunk) if decompressor else chunk):
+                break
+    except decompression_errors():
+        raise UploadFormatError("The compressed upload is corrupt or truncated.")
+    return scanner.result()
+
+
+class _GzipDecompressor:
+    """Incremental gzip decoding across concatenated members."""
+
+    def __init__(self) -> None:
+        self._member = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = []
+        while data:
+            out.append(self._member.decompress(data))
+            if not self._member.eof:
+                break
+            data = self._member.unused_data
+            self._member = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        return b"".join(out)
+
+
+def _csv_decompressor(fmt: str):
+    """Incremental decompressor for a compressed CSV format, None for plain CSV."""
+    if fmt == FORMAT_CSV_GZIP:
+        return _GzipDecompressor()
+    if fmt == FORMAT_CSV_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise UploadFormatError("Reading .csv.zst files requires the 'zstandard' package.")
+        return zstandard.ZstdDecompressor().decompressobj(read_across_frames=True)
+    return None
+
+
+def decompression_errors() -> tuple[type[Exception], ...]:
+    """Exception types the CSV decompressors raise on corrupt or truncated input."""
+    errors: tuple[type[Exception], ...] = (EOFError, gzip.BadGzipFile, zlib.error)
+    try:
+        import zstandard
+    except ImportError:
+        return errors
+    return errors + (zstandard.ZstdError,)
+
+
+def import_pyarrow():
+    """Import pyarrow for Parquet/Arrow uploads; :class:`UploadFormatError` if missing."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise UploadFormatError("Reading Parquet/Arrow files requires the 'pyarrow' package.")
+    return pyarrow
+
+
+def open_record_batches(source: BinaryIO | str, fmt: str, batch_size: int):
+    """Return ``(schema, total_rows, iterator of RecordBatches)`` for a Parquet/Arrow file.
+
+    Parquet is read one row group at a time, so memory is bounded by
+    *batch_size* and the row group size rather than the file size.
+    """
+    pa = import_pyarrow()
+    if fmt == FORMAT_PARQUET:
+        parquet = pa.parquet.ParquetFile(source)
+        return (
+            parquet.schema_arrow,
+            parquet.metadata.num_rows,
+            parquet.iter_batches(batch_size=batch_size),
+        )
+
+    reader = pa.ipc.open_file(pa.memory_map(source) if isinstance(source, str) else source)
+
+    def batches():
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size)
+
+    total_rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return reader.schema, total_rows, batches()
+
+
+def registry_type_for_arrow(arrow_type) -> str:
+    """Map an Arrow column type onto the registry's STRING/INTEGER/... types."""
+    pa = import_pyarrow()
+    types = pa.types
+    if types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if types.is_integer(arrow_type):
+        return "INTEGER"
+    if types.is_floating(arrow_type) or types.is_decimal(arrow_type):
+        return "FLOAT"
+    if types.is_timestamp(arrow_type) or types.is_date(arrow_type):
+        return "DATE"
+    if types.is_dictionary(arrow_type):
+        return registry_type_for_arrow(arrow_type.value_type)
+    return "STRING"
@@ -0,0 +1,138 @@
+"""Index Provisioning: the unique-ID and lookup indexes of project tables.
+
+Provisioning plans the indexes and records them in ``index_metadata``
+(see ``provisioning.plan_indexes``):
+
+* a unique index on each column flagged ``is_unique_id``, which screen
+  pops and agent searches look up and upserts use as their conflict key;
+* a plain B-tree on each column the Schema Designer marked ``is_indexed``,
+  on ``(column, id)`` so it also serves record pages ordered by the column
+  (see ``workspace.fetch_records``).
+
+They are built after loads rather than at ``CREATE TABLE``: bulk loading
+an unindexed table and indexing the finished data once is much cheaper
+than maintaining the indexes row by row.  Builds use
+``CREATE INDEX CONCURRENTLY``, so agents keep reading and writing the
+table meanwhile.  A failed build (say, duplicate unique IDs) leaves no
+invalid index behind; the registry row records the reason and the next
+load, or ``POST /schema/{id}/indexes/build``, retries it.
+
+A partitioned parent cannot be indexed concurrently, so its index is
+created ``ON ONLY`` the parent (invalid, and instant), each partition is
+indexed concurrently, and the partition indexes are attached; the parent
+index becomes valid once all are.
+"""
+
+from uuid import UUID
+
+import structlog
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.orm import selectinload
+
+from app.core.database import async_session_factory, engine
+from app.models.registry import IndexMetadata, SourceMetadata
+from app.services.partitioning import list_partitions
+from app.services.provisioning import _index_name
+
+logger = structlog.get_logger("services.indexing")
+
+INDEX_PENDING = "pending"
+INDEX_READY = "ready"
+INDEX_FAILED = "failed"
+
+
+def index_columns(index: IndexMetadata, column: str | None = None) -> str:
+    """The indexed columns of *index*, on *column* if given (a shadow column)."""
+    column = f'"{column or index.physical_name}"'
+    return column if index.is_unique else f'{column}, "id"'
+
+
+def _create_index_sql(
+    table_name: str, index: IndexMetadata, index_name: str | None = None, *, only: bool = False
+) -> str:
+    unique = "UNIQUE " if index.is_unique else ""
+    how = 'IF NOT EXISTS "{}" ON ONLY' if only else 'CONCURRENTLY IF NOT EXISTS "{}" ON'
+    return (
+        f"CREATE {unique}INDEX {how.format(index_name or index.index_name)}"
+        f' "{table_name}" ({index_columns(index)})'
+    )
+
+
+async def _build(conn: AsyncConnection, source: SourceMetadata, index: IndexMetadata) -> None:
+    if source.partition_strategy is None:
+        await _drop_if_invalid(conn, index.index_name)
+        await conn.execute(text(_create_index_sql(source.table_name, index)))
+        return
+
+    await conn.execute(text(_create_index_sql(source.table_name, index, only=True)))
+    for partition in await list_partitions(conn, source.table_name):
+        child_index = _index_name(partition["name"], index.physical_name, "idx")
+        await _drop_if_invalid(conn, child_index)
+        await conn.execute(text(_create_index_sql(partition["name"], index, child_index)))
+        await conn.execute(
+            text(f'ALTER INDEX "{index.index_name}" ATTACH PARTITION "{child_index}"')
+        )
+
+
+async def _drop_if_invalid(conn: AsyncConnection, index_name: str) -> None:
+    """Drop an index left INVALID by an interrupted or failed concurrent build."""
+    invalid = (
+        await conn.execute(
+            text(
+                "SELECT NOT x.indisvalid FROM pg_index x"
+                " JOIN pg_class c ON c.oid = x.indexrelid"
+                " WHERE c.relname = :name"
+            ),
+            {"name": index_name},
+        )
+    ).scalar()
+    if invalid:
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+
+
+async def build_indexes(source_id: UUID) -> list[IndexMetadata]:
+    """Build the project's indexes that are not ready yet; returns all of them.
+
+    Must run outside any open transaction that holds a snapshot (such as
+    a load's session): a concurrent build waits for those to finish.
+    """
+    async with async_session_factory() as db:
+        source = (
+            await db.execute(
+                select(SourceMetadata)
+                .options(selectinload(SourceMetadata.indexes))
+                .where(SourceMetadata.id == source_id)
+            )
+        ).scalar_one_or_none()
+        if source is None:
+            return []
+        todo = [index for index in source.indexes if index.status != INDEX_READY]
+        await db.commit()  # end the snapshot before building
+        if not todo:
+            return source.indexes
+
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for index in todo:
+                try:
+                    await _build(conn, source, index)
+                except DBAPIError as e:
+                    if source.partition_strategy is None:
+                        await _drop_if_invalid(conn, index.index_name)
+                    index.status = INDEX_FAILED
+                    index.error = str(e.orig).strip().splitlines()[0] if e.orig else str(e)
+                    logger.warning(
+                        "index_build_failed", index=index.index_name, error=index.error
+                    )
+                else:
+                    index.status = INDEX_READY
+                    index.error = None
+                    index.built_at = func.now()
+                    logger.info("index_built", index=index.index_name, table=source.table_name)
+
+        await db.commit()
+        for index in todo:
+            await db.refresh(index)
+        return source.indexes
@@ -1,13 +1,27 @@
 """Schema Inference Engine: reads CSV and detects column data types."""
 
+import contextlib
 import csv
 import io
+import itertools
+import math
+import random
 import re
+from collections.abc import Iterator
 from datetime import datetime
+from typing import BinaryIO
 
 from dateutil import parser as dateutil_parser
 
 from app.schemas.schema_inference import InferredColumn
+from app.services.date_formats import (
+    _CANDIDATE_FORMATS,
+    DateParser,
+    _parse_exact,
+    detect_date_format,
+)
+from app.services.file_formats import open_record_batches, registry_type_for_arrow
+from app.services.profiling import ColumnProfiler
 
 # Allowed inferred types
 TYPE_STRING = "STRING"
@@ -18,10 +32,22 @@ TYPE_DATE = "DATE"
 
 _BOOL_TRUE = {"true", "yes", "1", "t", "y"}
 _BOOL_FALSE = {"false", "no", "0", "f", "n"}
+_BOOL_VALUES = _BOOL_TRUE | _BOOL_FALSE
 
+# Plain ASCII spellings, which make up nearly every CSV value.  The patterns
+# accept nothing that int()/float() reject; a value they miss is re-checked
+# with int()/float(), so "1,000", "1_000" or "inf" still count as numbers.
+_INTEGER_RE = re.compile(r"[+-]?\d+", re.ASCII)
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?", re.ASCII)
 
-def _is_boolean(value: str) -> bool:
-    return value.strip().lower() in _BOOL_TRUE | _BOOL_FALSE
+# dateutil finds no date in a value without a digit or a month/weekday name,
+# so such values are rejected without calling it.
+_DATE_HINT_RE = re.compile(
+    r"\d|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|mon|tue|wed|thu|fri|sat|sun",
+    re.IGNORECASE,
+)
+
+_DATE_MIN_RATIO = 0.6
 
 
 def _is_integer(value: str) -> bool:
@@ -41,36 +67,70 @@ def _is_float(value: str) -> bool:
 
 
 def _is_date(value: str) -> bool:
+    value = value.strip()
+    if not _DATE_HINT_RE.search(value):
+        return False
     try:
-        dateutil_parser.parse(value.strip(), fuzzy=False)
+        dateutil_parser.parse(value, fuzzy=False)
         return True
     except (ValueError, OverflowError):
         return False
 
 
 def _infer_type(values: list[str]) -> str:
-    """Infer the best data type from a sample of non-empty values."""
+    """Infer the best data type from a sample of non-empty values.
+
+    A single pass narrows BOOLEAN, INTEGER and FLOAT value by value and
+    stops at the first value none of them can hold; dates are only
+    considered for what is left.
+    """
     if not values:
         return TYPE_STRING
 
-    # Check boolean first (most restrictive pattern)
-    if all(_is_boolean(v) for v in values):
-        return TYPE_BOOLEAN
+    boolean = integer = floating = True
+    for value in values:
+        value = value.strip()
+        if boolean:
+            boolean = value.lower() in _BOOL_VALUES
+        if integer:
+            integer = _INTEGER_RE.fullmatch(value) is not None or _is_integer(value)
+        if floating and not integer:  # every integer is also a float
+            floating = _FLOAT_RE.fullmatch(value) is not None or _is_float(value)
+        if not (boolean or floating):
+            break
 
-    # Check integer
-    if all(_is_integer(v) for v in values):
+    if boolean:
+        return TYPE_BOOLEAN
+    if integer:
         return TYPE_INTEGER
-
-    # Check float
-    if all(_is_float(v) for v in values):
+    if floating:
         return TYPE_FLOAT
+    return TYPE_DATE if _mostly_dates(values) else TYPE_STRING
+
 
-    # Check date — require at least 60% to parse as dates
-    date_count = sum(1 for v in values if _is_date(v))
-    if date_count / len(values) >= 0.6:
-        return TYPE_DATE
+def _mostly_dates(values: list[str]) -> bool:
+    """True if at least 60% of *values* parse as dates.
+
+    When the column has a consistent layout, values are parsed with it and
+    only the ones that do not match go to dateutil.  Stops as soon as too
+    many values have missed for the column to reach 60%.
+    """
+    total = len(values)
+    if sum(1 for v in values if _DATE_HINT_RE.search(v)) / total < _DATE_MIN_RATIO:
+        return False
 
-    return TYPE_STRING
+    date_format = detect_date_format(values)
+    misses = 0
+    for value in values:
+        value = value.strip()
+        if date_format is not None and _parse_exact(value, date_format) is not None:
+            continue
+        if _is_date(value):
+            continue
+        misses += 1
+        if (total - misses) / total < _DATE_MIN_RATIO:
+            return False
+    return True
 
 
 def _slugify(name: str) -> str:
@@ -91,14 +151,39 @@ def _is_primary_key_candidate(col_name: str, values: list[str]) -> bool:
     return has_name_hint and all_unique
 
 
-def infer_schema(file_content: bytes, max_rows: int = 100) -> tuple[list[InferredColumn], int]:
+def infer_schema(
+    file_content: bytes | BinaryIO, max_rows: int = 100
+) -> tuple[list[InferredColumn], int]:
     """
     Analyze a CSV file and return inferred column schemas.
 
+    *file_content* is the whole file, or a binary stream (such as a
+    decompressing reader) of which only the sampled rows are read.
+
+    Each column carries a profile of the sampled rows.
+
     Returns (columns, total_row_count_in_sample).
     """
-    text = file_content.decode("utf-8-sig")  # handle BOM
-    reader = csv.DictReader(io.StringIO(text))
+    with _open_text(file_content) as text_stream:
+        return _infer_from_text(text_stream, max_rows)
+
+
+@contextlib.contextmanager
+def _open_text(file_content: bytes | BinaryIO) -> Iterator[io.TextIOBase]:
+    if isinstance(file_content, bytes):
+        yield io.StringIO(file_content.decode("utf-8-sig"))  # handle BOM
+        return
+    text_stream = io.TextIOWrapper(file_content, encoding="utf-8-sig", newline="")
+    try:
+        yield text_stream
+    finally:
+        text_stream.detach()  # leave the caller's stream open
+
+
+def _infer_from_text(
+    text_stream: io.TextIOBase, max_rows: int
+) -> tuple[list[InferredColumn], int]:
+    reader = csv.DictReader(text_stream)
     fieldnames = reader.fieldnames or []
 
     # Collect samples per column
@@ -116,13 +201,309 @@ def infer_schema(file_content: bytes, max_rows: int = 100) -> tuple[list[Inferre
     columns: list[InferredColumn] = []
     for name in fieldnames:
         values = samples[name]
+        inferred_type = _infer_type(values)
+        date_format = detect_date_format(values) if inferred_type == TYPE_DATE else None
+        profiler = ColumnProfiler()
+        profiler.add(values, row_count)
         columns.append(
             InferredColumn(
                 original_name=name,
-                inferred_type=_infer_type(values),
+                inferred_type=inferred_type,
                 suggested_display_name=_slugify(name),
                 is_primary_key_candidate=_is_primary_key_candidate(name, values),
+                date_format=date_format,
+                profile=profiler.profile(
+                    inferred_type, _value_range(values, inferred_type, date_format)
+                ),
+            )
+        )
+
+    return columns, row_count
+
+
+def _value_range(values: list[str], inferred_type: str, date_format: str | None) -> tuple | None:
+    """``(min, max)`` of sampled values parsed as *inferred_type*, for the profile."""
+    if inferred_type == TYPE_INTEGER:
+        parsed = _integers(values)
+    elif inferred_type == TYPE_FLOAT:
+        parsed = _floats(values)
+    elif inferred_type == TYPE_DATE:
+        parsed = [d for d in map(DateParser(date_format), values) if d is not None]
+    else:
+        return None
+    return (min(parsed), max(parsed)) if parsed else None
+
+
+def _widen(value_range: tuple | None, parsed: list) -> tuple:
+    low, high = min(parsed), max(parsed)
+    if value_range is not None:
+        low, high = min(low, value_range[0]), max(high, value_range[1])
+    return low, high
+
+
+# ── Full-file inference ────────────────────────────────────────
+#
+# Every value is checked against a per-column type lattice
+# (BOOLEAN < INTEGER < FLOAT, plus DATE), using the same rules as the
+# loader's converters, so the chosen type loads every row.  Rows are read
+# in chunks and checked a column at a time: each check first tries the
+# whole chunk in one comprehension and only walks it value by value when
+# that fails.  A type drops out at the first value it cannot hold and is
+# never checked again, so columns settle after a few rows.  Every column
+# is still profiled (see app.services.profiling), and a reservoir sample
+# of rows feeds the primary key heuristic.
+
+_SCAN_CHUNK_ROWS = 1024
+
+
+def _integers(values: list[str]) -> list[int] | None:
+    """*values* as integers, or None if one is not an integer."""
+    try:
+        return [int(v) for v in values]
+    except ValueError:
+        pass
+    try:
+        return [int(v.replace(",", "")) for v in values]  # thousands separators
+    except ValueError:
+        return None
+
+
+def _floats(values: list[str]) -> list[float] | None:
+    try:
+        return [float(v) for v in values]
+    except ValueError:
+        pass
+    try:
+        return [float(v.replace(",", "")) for v in values]
+    except ValueError:
+        return None
+
+
+def _parse_all(values: list[str], fmt: str) -> list[datetime] | None:
+    try:
+        return DateParser(fmt).parse_column(values)
+    except ValueError:
+        return None
+
+
+class _ColumnLattice:
+    """Running type evidence for one column over the whole file."""
+
+    __slots__ = (
+        "non_empty", "boolean", "integer", "float", "date",
+        "date_formats", "date_format", "numeric_range", "date_ranges",
+    )
+
+    def __init__(self) -> None:
+        self.non_empty = 0
+        self.boolean = True
+        self.integer = True
+        self.float = True
+        self.date = True
+        # Exact formats that have parsed every value so far, in preference order.
+        self.date_formats = list(_CANDIDATE_FORMATS)
+        # Once none is left: the last one standing, which parsed every value
+        # before the first mismatch.  Later values need dateutil.
+        self.date_format: str | None = None
+        # (min, max) of the values while they are all numbers.
+        self.numeric_range: tuple | None = None
+        # (min, max) per format in date_formats while every value has been
+        # parsed in bulk; None once values are checked one by one.
+        self.date_ranges: dict[str, tuple[datetime, datetime]] | None = {}
+
+    @property
+    def settled(self) -> bool:
+        """True once only STRING is left, so further values cannot matter."""
+        return not (self.boolean or self.integer or self.float or self.date)
+
+    def add(self, values: list[str]) -> None:
+        """Fold in a chunk of stripped, non-empty values."""
+        if not values:
+            return
+        seen_before = self.non_empty
+        self.non_empty += len(values)
+        if self.boolean:
+            self.boolean = _BOOL_VALUES.issuperset(map(str.lower, values))
+        numbers = None
+        if self.integer:
+            numbers = _integers(values)
+            self.integer = numbers is not None
+        if self.float and numbers is None:
+            numbers = _floats(values)
+            self.float = numbers is not None
+        if numbers is not None:
+            self.numeric_range = _widen(self.numeric_range, numbers)
+        if self.date:
+            self._add_dates(values, seen_before)
+
+    def _add_dates(self, values: list[str], seen_before: int) -> None:
+        if self.date_formats:
+            parsed = {f: p for f in self.date_formats if (p := _parse_all(values, f)) is not None}
+            if parsed:
+                self.date_formats = list(parsed)
+                if self.date_ranges is not None:
+                    self.date_ranges = {
+                        f: _widen(self.date_ranges.get(f), p) for f, p in parsed.items()
+                    }
+                return
+            self.date_ranges = None
+        for pos, value in enumerate(values):
+            if self.date_formats:
+                formats = [f for f in self.date_formats if _parse_exact(value, f) is not None]
+                if formats:
+                    self.date_formats = formats
+                    continue
+                self.date_format = self.date_formats[0] if seen_before + pos else None
+                self.date_formats = []
+            elif self.date_format and _parse_exact(value, self.date_format) is not None:
+                continue
+            # No single layout fits: the loader falls back to dateutil.
+            # Numbers are not checked that way (dateutil reads most of them
+            # as dates and it is slow), so a number rules DATE out.
+            if _is_float(value) or not _is_date(value):
+                self.date = False
+                return
+
+    def inferred_type(self) -> tuple[str, str | None]:
+        """Return ``(type, date format)`` that every value converts to."""
+        if not self.non_empty:
+            return TYPE_STRING, None
+        if self.boolean:
+            return TYPE_BOOLEAN, None
+        if self.integer:
+            return TYPE_INTEGER, None
+        if self.float:
+            return TYPE_FLOAT, None
+        if self.date:
+            return TYPE_DATE, self.date_formats[0] if self.date_formats else self.date_format
+        return TYPE_STRING, None
+
+    def value_range(self) -> tuple | None:
+        """``(min, max)`` of the values as the inferred type, if known.
+
+        Dates only have a range when one layout parsed every value.
+        """
+        inferred_type, _ = self.inferred_type()
+        if inferred_type in (TYPE_INTEGER, TYPE_FLOAT):
+            return self.numeric_range
+        if inferred_type == TYPE_DATE and self.date_formats and self.date_ranges:
+            return self.date_ranges.get(self.date_formats[0])
+        return None
+
+
+class _Reservoir:
+    """Uniform sample of *size* items from a stream (Li's Algorithm L)."""
+
+    __slots__ = ("size", "items", "_seen", "_next", "_w", "_random")
+
+    def __init__(self, size: int, seed: int | None = None) -> None:
+        self.size = size
+        self.items: list = []
+        self._seen = 0
+        self._random = random.Random(seed)
+        self._w = 1.0
+        self._next = size
+        self._advance()
+
+    def _advance(self) -> None:
+        # 1 - random() lies in (0, 1], so the logs are finite.
+        self._w *= math.exp(math.log(1.0 - self._random.random()) / self.size)
+        skip = math.log(1.0 - self._random.random()) / math.log1p(-self._w) if self._w < 1 else 0
+        self._next += int(skip) + (1 if self.items else 0)
+
+    def extend(self, items: list) -> None:
+        fill = max(self.size - len(self.items), 0)
+        self.items.extend(items[:fill])
+        # Jump straight to the items that replace a sampled one.
+        end = self._seen + len(items)
+        while self._next < end:
+            self.items[self._random.randrange(self.size)] = items[self._next - self._seen]
+            self._advance()
+        self._seen = end
+
+
+def infer_schema_full(
+    file_content: bytes | BinaryIO, sample_size: int = 100
+) -> tuple[list[InferredColumn], int]:
+    """Infer column types from every row of a CSV file, in one streaming pass.
+
+    Unlike :func:`infer_schema`, a type is only chosen if every non-empty
+    value in the column converts to it, so files sorted by date or id
+    cannot be mistyped.  Memory is constant: per-column counters and
+    profiles plus a reservoir of *sample_size* rows for the primary key
+    heuristic.
+
+    Returns (columns, total_row_count).
+    """
+    with _open_text(file_content) as text_stream:
+        reader = csv.reader(text_stream)
+        fieldnames = next(reader, [])
+        lattices = [_ColumnLattice() for _ in fieldnames]
+        profilers = [ColumnProfiler() for _ in fieldnames]
+        reservoir = _Reservoir(sample_size)
+        row_count = 0
+
+        while chunk := list(itertools.islice(reader, _SCAN_CHUNK_ROWS)):
+            chunk = [row for row in chunk if row]  # skip blank lines
+            row_count += len(chunk)
+            reservoir.extend(chunk)
+            transposed = list(itertools.zip_longest(*chunk, fillvalue=""))
+            for i, lattice in enumerate(lattices):
+                column = transposed[i] if i < len(transposed) else ()
+                values = [v for v in map(str.strip, column) if v]
+                profilers[i].add(values, len(chunk))
+                if not lattice.settled:
+                    lattice.add(values)
+
+    columns: list[InferredColumn] = []
+    for i, name in enumerate(fieldnames):
+        inferred_type, date_format = lattices[i].inferred_type()
+        sample = [row[i].strip() if i < len(row) else "" for row in reservoir.items]
+        columns.append(
+            InferredColumn(
+                original_name=name,
+                inferred_type=inferred_type,
+                suggested_display_name=_slugify(name),
+                is_primary_key_candidate=(
+                    profilers[i].non_empty == row_count and _is_primary_key_candidate(name, sample)
+                ),
+                date_format=date_format,
+                profile=profilers[i].profile(inferred_type, lattices[i].value_range()),
             )
         )
 
     return columns, row_count
+
+
+def infer_arrow_schema(
+    source: BinaryIO | str, file_format: str, max_rows: int = 100
+) -> tuple[list[InferredColumn], int]:
+    """Schema of a Parquet/Arrow file, typed from its own column types.
+
+    Only the first *max_rows* rows are read, for the primary key heuristic.
+    Returns (columns, total_row_count_in_sample).
+    """
+    schema, _, batches = open_record_batches(source, file_format, max_rows)
+    sample = next(batches, None)
+
+    columns: list[InferredColumn] = []
+    for i, field in enumerate(schema):
+        inferred_type = registry_type_for_arrow(field.type)
+        objects = sample.column(i).to_pylist() if sample is not None else []
+        values = ["" if v is None else str(v) for v in objects]
+        profiler = ColumnProfiler()
+        profiler.add([v for v in values if v], len(values))
+        dates = [v for v in objects if v is not None] if inferred_type == TYPE_DATE else []
+        columns.append(
+            InferredColumn(
+                original_name=field.name,
+                inferred_type=inferred_type,
+                suggested_display_name=_slugify(field.name),
+                is_primary_key_candidate=_is_primary_key_candidate(field.name, values),
+                profile=profiler.profile(
+                    inferred_type, (min(dates), max(dates)) if dates else None
+                ),
+            )
+        )
+
+    return columns, sample.num_rows if sample is not None else 0
@@ -0,0 +1,212 @@
+"""Inference Cache: answer repeat uploads without re-running inference.
+
+Teams re-upload the same export layouts daily, so ``/api/schema/infer``
+takes two shortcuts before paying for inference:
+
+* **Layout templates** — a sampled CSV whose headers sanitize to exactly
+  the columns of a provisioned project gets that project's finalized
+  schema back (matched by ``SourceMetadata.layout_signature``).
+* **Result cache** — a bounded LRU of inference results, keyed by a
+  SHA-256 of what inference reads: the header plus the sampled rows, or
+  the whole upload for full scans and Parquet/Arrow files.
+
+The cache is per process and counts hits, misses and evictions.
+"""
+
+import collections
+import csv
+import hashlib
+import io
+from typing import BinaryIO
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.executor import run_cpu_bound
+from app.models.registry import SourceMetadata
+from app.schemas.schema_inference import InferredColumn
+from app.services.file_formats import ARROW_FORMATS, open_csv_stream, read_csv_head
+from app.services.inference import infer_arrow_schema, infer_schema, infer_schema_full
+from app.services.provisioning import _sanitize_identifier, layout_signature
+
+
+class InferenceCache:
+    """Bounded LRU of ``key -> (columns, row_count)``."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict[str, tuple[list[InferredColumn], int]] = (
+            collections.OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.template_matches = 0
+
+    def get(self, key: str) -> tuple[list[InferredColumn], int] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: tuple[list[InferredColumn], int]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "template_matches": self.template_matches,
+        }
+
+
+inference_cache = InferenceCache(settings.INFERENCE_CACHE_SIZE)
+
+
+class InferenceOutcome:
+    """What ``/api/schema/infer`` returns, and where it came from."""
+
+    def __init__(
+        self,
+        columns: list[InferredColumn],
+        row_count: int,
+        template: SourceMetadata | None = None,
+        cached: bool = False,
+    ) -> None:
+        self.columns = columns
+        self.row_count = row_count
+        self.template = template
+        self.cached = cached
+
+
+def _content_key(kind: str, content: bytes) -> str:
+    return hashlib.sha256(kind.encode() + b"\0" + content).hexdigest()
+
+
+def _upload_key(kind: str, upload: BinaryIO) -> str:
+    """Hash the whole upload, then rewind it for inference."""
+    digest = hashlib.sha256(kind.encode() + b"\0")
+    upload.seek(0)
+    while chunk := upload.read(settings.CSV_READ_CHUNK_SIZE):
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+async def find_template(db: AsyncSession, headers: list[str]) -> SourceMetadata | None:
+    """The newest project whose columns are exactly the sanitized *headers*."""
+    try:
+        signature = layout_signature(_sanitize_identifier(h) for h in headers)
+    except ValueError:
+        return None
+    stmt = (
+        select(SourceMetadata)
+        .options(selectinload(SourceMetadata.columns))
+        .where(SourceMetadata.layout_signature == signature)
+        .order_by(SourceMetadata.created_at.desc())
+        .limit(1)
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+def template_columns(source: SourceMetadata, headers: list[str]) -> list[InferredColumn]:
+    """The project's finalized schema, in the upload's header order."""
+    by_name = {col.physical_name: col for col in source.columns}
+    columns = []
+    for header in headers:
+        meta = by_name[_sanitize_identifier(header)]
+        columns.append(
+            InferredColumn(
+                original_name=header,
+                inferred_type=meta.data_type,
+                suggested_display_name=meta.display_name,
+                is_primary_key_candidate=meta.is_unique_id,
+                date_format=meta.date_format,
+                profile=meta.profile,
+            )
+        )
+    return columns
+
+
+async def infer_upload(
+    db: AsyncSession,
+    upload: BinaryIO,
+    file_format: str,
+    *,
+    full_scan: bool,
+    sample_rows: int,
+) -> InferenceOutcome:
+    """Infer the schema of an upload, reusing a template or cached result.
+
+    Layout templates apply to sampled CSV and to Parquet/Arrow files; a
+    full scan is an explicit request to check every row, so it always
+    infers (though its result is cached like any other).
+    """
+    if file_format in ARROW_FORMATS:
+        key = await run_cpu_bound(_upload_key, f"{file_format}:{sample_rows}", upload)
+        infer = (infer_arrow_schema, upload, file_format, sample_rows)
+    elif full_scan:
+        key = await run_cpu_bound(_upload_key, f"{file_format}:full:{sample_rows}", upload)
+        infer = (infer_schema_full, open_csv_stream(upload, file_format), sample_rows)
+    else:
+        head, rows = await run_cpu_bound(
+            read_csv_head,
+            open_csv_stream(upload, file_format),
+            sample_rows,
+            settings.CSV_READ_CHUNK_SIZE,
+        )
+        return await infer_csv_head(db, head, rows, sample_rows=sample_rows)
+
+    columns, row_count, cached = await _cached_inference(key, *infer)
+    if file_format in ARROW_FORMATS:
+        headers = [col.original_name for col in columns]
+        template = await find_template(db, headers)
+        if template is not None:
+            inference_cache.template_matches += 1
+            return InferenceOutcome(template_columns(template, headers), row_count, template)
+    return InferenceOutcome(columns, row_count, cached=cached)
+
+
+async def infer_csv_head(
+    db: AsyncSession, head: bytes, rows: int, *, sample_rows: int
+) -> InferenceOutcome:
+    """Infer from a CSV sample already read (see :func:`read_csv_head`).
+
+    *rows* is the number of records after the header in *head*.
+    """
+    headers = next(csv.reader(io.StringIO(head.decode("utf-8-sig"))), [])
+    template = await find_template(db, headers)
+    if template is not None:
+        inference_cache.template_matches += 1
+        return InferenceOutcome(template_columns(template, headers), rows, template)
+    key = _content_key(f"sample:{sample_rows}", head)
+    columns, row_count, cached = await _cached_inference(key, infer_schema, head, sample_rows)
+    return InferenceOutcome(columns, row_count, cached=cached)
+
+
+async def _cached_inference(key: str, infer, *args) -> tuple[list[InferredColumn], int, bool]:
+    entry = inference_cache.get(key)
+    if entry is not None:
+        return (*entry, True)
+    entry = await run_cpu_bound(infer, *args)
+    inference_cache.put(key, entry)
+    return (*entry, False)
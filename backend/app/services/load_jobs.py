@@ -0,0 +1,321 @@
+"""Background Load Jobs: run CSV loads outside the request and survive crashes.
+
+The upload is spooled to ``LOAD_JOB_SPOOL_DIR`` (compressed CSV is
+decompressed on the way) and a ``load_jobs`` row is created; the request
+returns immediately.  A runner claims the job with a
+conditional UPDATE, so several API processes can share one queue, and calls
+``load_csv`` with a checkpoint callback: every ``DATA_LOAD_COMMIT_EVERY``
+batches the byte offset and counts are committed together with the rows.
+A job whose runner dies stops heart-beating and is resumed from its last
+checkpoint by the next worker poll.  The spool directory is local unless
+``LOAD_JOB_SPOOL_SHARED`` says every replica mounts it, so by default a
+job records the host that spooled it and only that host claims it, for as
+long as it keeps heart-beating the job; a job left by a host that is gone
+is claimed elsewhere and fails on its missing spool.
+Replace loads build a fresh table that
+only becomes visible at the end, so an interrupted one starts over instead.
+After a completed load the project's pending indexes are built concurrently.
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO
+from uuid import UUID
+
+import structlog
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session_factory, engine
+from app.core.executor import run_cpu_bound
+from app.models.load_job import LoadJob, LoadJobStatus
+from app.models.registry import SourceMetadata
+from app.services.data_loader import LoadCheckpoint, LoadResult, load_arrow, load_csv
+from app.services.file_formats import (
+    ARROW_FORMATS,
+    FORMAT_CSV,
+    UploadFormatError,
+    decompression_errors,
+    detect_format,
+    open_csv_stream,
+)
+from app.services.indexing import build_indexes
+from app.services.workspace import get_project_info
+
+logger = structlog.get_logger("services.load_jobs")
+
+# Runner tasks owned by this process, keyed by job id.
+_active: dict[UUID, asyncio.Task] = {}
+
+_HOST = socket.gethostname()
+
+
+def _spool_upload(upload: BinaryIO, path: Path, file_format: str) -> int:
+    """Copy the upload to *path*, decompressing CSV; returns the bytes written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    upload.seek(0)
+    source = upload if file_format in ARROW_FORMATS else open_csv_stream(upload, file_format)
+    try:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(source, out, settings.CSV_READ_CHUNK_SIZE)
+            return out.tell()
+    except decompression_errors():
+        path.unlink(missing_ok=True)
+        raise UploadFormatError("The compressed upload is corrupt or truncated.")
+
+
+async def create_load_job(
+    db: AsyncSession,
+    source: SourceMetadata,
+    upload: BinaryIO,
+    filename: str,
+    mode: str = "append",
+    enqueue: bool = False,
+) -> LoadJob:
+    """Spool *upload* to disk and queue a load job for it.
+
+    The format comes from *filename*; gzip/zstd CSV is stored decompressed
+    so checkpoints are plain CSV byte offsets.
+    """
+    job_id = uuid.uuid4()
+    file_format = detect_format(filename) or FORMAT_CSV
+    suffix = file_format if file_format in ARROW_FORMATS else FORMAT_CSV
+    path = Path(settings.LOAD_JOB_SPOOL_DIR) / f"{job_id}.{suffix}"
+    total_bytes = await run_cpu_bound(_spool_upload, upload, path, file_format)
+
+    job = LoadJob(
+        id=job_id,
+        source_id=source.id,
+        mode=mode,
+        enqueue=enqueue,
+        filename=filename,
+        spool_path=str(path),
+        spool_host=_HOST,
+        heartbeat_at=func.now(),
+        total_bytes=total_bytes,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_load_job(db: AsyncSession, job_id: UUID) -> LoadJob | None:
+    return await db.get(LoadJob, job_id)
+
+
+def _claimable():
+    stale_before = func.now() - timedelta(seconds=settings.LOAD_JOB_STALE_SECONDS)
+    stale = LoadJob.heartbeat_at < stale_before
+    claimable = or_(
+        LoadJob.status == LoadJobStatus.QUEUED,
+        and_(LoadJob.status == LoadJobStatus.RUNNING, stale),
+    )
+    if settings.LOAD_JOB_SPOOL_SHARED:
+        return claimable
+    # Another host's job once that host stops heart-beating it: it is gone,
+    # and the job fails on its missing spool instead of waiting forever.
+    local = or_(LoadJob.spool_host == _HOST, LoadJob.spool_host.is_(None))
+    return and_(claimable, or_(local, stale))
+
+
+async def _heartbeat_queued(db: AsyncSession) -> None:
+    """Keep this host's queued jobs fresh, so other hosts leave them alone."""
+    await db.execute(
+        update(LoadJob)
+        .where(LoadJob.status == LoadJobStatus.QUEUED, LoadJob.spool_host == _HOST)
+        .values(heartbeat_at=func.now())
+    )
+    await db.commit()
+
+
+def _open_spool(job: LoadJob):
+    """Open the job's spooled upload; ValueError if it is not on this host."""
+    try:
+        return open(job.spool_path, "rb")
+    except FileNotFoundError:
+        raise ValueError(
+            f"The uploaded file is missing from {job.spool_path} on {_HOST}"
+            f" (spooled on {job.spool_host or 'an unknown host'}); upload it again."
+        ) from None
+
+
+async def _claim(job_id: UUID) -> bool:
+    """Atomically mark the job running; False if another runner owns it."""
+    async with async_session_factory() as db:
+        claimed = await db.execute(
+            update(LoadJob)
+            .where(LoadJob.id == job_id, _claimable())
+            .values(
+                status=LoadJobStatus.RUNNING,
+                started_at=func.coalesce(LoadJob.started_at, func.now()),
+                heartbeat_at=func.now(),
+            )
+            .returning(LoadJob.id)
+        )
+        await db.commit()
+        return claimed.scalar_one_or_none() is not None
+
+
+async def _heartbeat(job_id: UUID) -> None:
+    while True:
+        await asyncio.sleep(settings.LOAD_JOB_POLL_SECONDS)
+        try:
+            async with async_session_factory() as db:
+                await db.execute(
+                    update(LoadJob)
+                    .where(LoadJob.id == job_id)
+                    .values(heartbeat_at=func.now())
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("load_job_heartbeat_failed", job_id=str(job_id))
+
+
+def _save_progress(job: LoadJob, checkpoint: LoadCheckpoint, result: LoadResult) -> None:
+    job.byte_offset = checkpoint.byte_offset
+    job.rows_done = checkpoint.rows_done
+    job.rows_failed = checkpoint.rows_failed
+    job.rows_loaded = result.rows_loaded
+    job.rows_inserted = result.rows_inserted
+    job.rows_updated = result.rows_updated
+    job.rows_duplicate = result.rows_duplicate
+    job.errors = list(result.errors)
+    job.load_method = result.load_method
+    job.checkpoint_at = func.now()
+
+
+async def _run_claimed(job_id: UUID) -> UUID | None:
+    """Run the job; returns the project id if it completed."""
+    # A session pinned to one connection: periodic commits must not hand the
+    # COPY driver connection or the upsert staging table back to the pool.
+    async with engine.connect() as conn, AsyncSession(bind=conn, expire_on_commit=False) as db:
+        job = await db.get(LoadJob, job_id)
+        spool_path = job.spool_path
+
+        result = LoadResult()
+        resume = None
+        completed = False
+        if job.mode == "replace":
+            if job.byte_offset:
+                logger.info("load_job_restarted", job_id=str(job_id))
+        elif job.byte_offset:
+            result.rows_loaded = job.rows_loaded
+            result.rows_failed = job.rows_failed
+            result.rows_inserted = job.rows_inserted
+            result.rows_updated = job.rows_updated
+            result.rows_duplicate = job.rows_duplicate
+            result.errors = list(job.errors or [])
+            resume = LoadCheckpoint(job.byte_offset, job.rows_done, job.rows_failed)
+            logger.info("load_job_resumed", job_id=str(job_id), byte_offset=job.byte_offset)
+
+        async def on_checkpoint(checkpoint: LoadCheckpoint, result: LoadResult) -> None:
+            _save_progress(job, checkpoint, result)
+            await db.flush()
+
+        try:
+            source = await get_project_info(db, job.source_id)
+            if source is None:
+                raise ValueError("Project not found.")
+            options = dict(
+                mode=job.mode,
+                resume=resume,
+                result=result,
+                on_checkpoint=on_checkpoint,
+                load_job_id=job_id,
+                enqueue=job.enqueue,
+            )
+            file_format = detect_format(job.filename)
+            with await run_cpu_bound(_open_spool, job) as stream:
+                if file_format in ARROW_FORMATS:
+                    await load_arrow(db, source, spool_path, file_format, **options)
+                else:
+                    await load_csv(db, source, stream, **options)
+        except Exception as e:
+            await db.rollback()
+            if isinstance(e, ValueError):
+                job.error_message = str(e)
+            else:
+                logger.exception("load_job_failed", job_id=str(job_id))
+                job.error_message = "Data load failed."
+            job.status = LoadJobStatus.FAILED
+        else:
+            job.status = LoadJobStatus.COMPLETED
+            completed = True
+            logger.info(
+                "load_job_completed",
+                job_id=str(job_id),
+                rows_loaded=result.rows_loaded,
+                rows_failed=result.rows_failed,
+                load_method=result.load_method,
+            )
+        job.finished_at = func.now()
+        await db.commit()
+
+    with suppress(FileNotFoundError):
+        os.remove(spool_path)
+    return job.source_id if completed else None
+
+
+async def run_load_job(job_id: UUID) -> None:
+    """Claim and run a job to completion; a no-op if another runner owns it."""
+    if not await _claim(job_id):
+        return
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        loaded_source_id = await _run_claimed(job_id)
+    finally:
+        heartbeat.cancel()
+        with suppress(asyncio.CancelledError):
+            await heartbeat
+    if loaded_source_id is not None:
+        # Outside the load's transaction: concurrent builds wait for open ones.
+        try:
+            await build_indexes(loaded_source_id)
+        except Exception:
+            logger.exception("index_build_failed", source_id=str(loaded_source_id))
+
+
+def schedule_load_job(job_id: UUID) -> bool:
+    """Start a runner task unless this process is at its concurrency limit.
+
+    Jobs that are not started here stay queued for the next worker poll.
+    """
+    if job_id in _active:
+        return True
+    if len(_active) >= settings.LOAD_JOB_MAX_CONCURRENT:
+        return False
+    task = asyncio.create_task(run_load_job(job_id))
+    _active[job_id] = task
+    task.add_done_callback(lambda _: _active.pop(job_id, None))
+    return True
+
+
+async def load_job_worker() -> None:
+    """Poll for queued jobs and for running jobs whose runner has died."""
+    while True:
+        try:
+            async with async_session_factory() as db:
+                if not settings.LOAD_JOB_SPOOL_SHARED:
+                    await _heartbeat_queued(db)
+                job_ids = (
+                    await db.execute(
+                        select(LoadJob.id)
+                        .where(_claimable())
+                        .order_by(LoadJob.created_at)
+                        .limit(settings.LOAD_JOB_MAX_CONCURRENT)
+                    )
+                ).scalars().all()
+            for job_id in job_ids:
+                if not schedule_load_job(job_id):
+                    break
+        except Exception:
+            logger.exception("load_job_poll_failed")
+        await asyncio.sleep(settings.LOAD_JOB_POLL_SECONDS)
@@ -0,0 +1,298 @@
+"""Partitioned Project Tables: declarative partitioning for very large sources.
+
+A project can ask at provisioning time (``ProvisionRequest.partitioning``)
+for its ``src_*`` table to be a partitioned parent:
+
+* ``range`` on a DATE column, one partition per month or year plus a
+  DEFAULT partition for rows outside them (and empty dates).  Every load
+  first makes sure the current period and the next
+  ``PARTITION_AHEAD_PERIODS`` exist; a partition added for a period the
+  DEFAULT partition already holds rows of takes those rows over.  Old
+  partitions can be detached or dropped without touching the rest.
+* ``hash`` on the unique-ID column, into a fixed number of partitions, so
+  each one stays small enough to vacuum and index quickly.
+
+PostgreSQL routes inserted and copied rows to their partition, so the
+loader needs no changes; readers query the parent.  A partitioned table
+has no primary key (it would have to include the partition column), so
+``id`` gets a plain index instead, and a range-partitioned table cannot
+hold a unique index on its unique-ID column alone.
+"""
+
+from collections.abc import Sequence
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.models.registry import SourceMetadata
+from app.schemas.schema_inference import FinalizedColumn, PartitionSpec
+
+PARTITION_RANGE = "range"
+PARTITION_HASH = "hash"
+RANGE_INTERVALS = ("month", "year")
+
+# Initial range partitions created from the column's profiled date range;
+# later ones come from loads (see ensure_range_partitions) and from
+# POST /schema/{id}/partitions.
+_MAX_INITIAL_RANGES = 120
+
+
+def _lock_timeout_sql() -> str:
+    return f"SET LOCAL lock_timeout = {int(settings.DATA_LOAD_SWAP_LOCK_TIMEOUT_MS)}"
+
+
+def _child_name(table_name: str, suffix: str) -> str:
+    tail = f"_{suffix}"
+    return table_name[: 63 - len(tail)] + tail
+
+
+def _range_start(day: date, interval: str) -> date:
+    return date(day.year, 1 if interval == "year" else day.month, 1)
+
+
+def _next_start(start: date, interval: str) -> date:
+    if interval == "year" or start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def range_partition_name(table_name: str, start: date, interval: str) -> str:
+    label = f"{start:%Y}" if interval == "year" else f"{start:%Y%m}"
+    return _child_name(table_name, f"p{label}")
+
+
+def ahead_range_starts(today: date, interval: str, periods: int) -> list[date]:
+    """The period containing *today* and the *periods* after it."""
+    starts = [_range_start(today, interval)]
+    for _ in range(periods):
+        starts.append(_next_start(starts[-1], interval))
+    return starts
+
+
+def initial_range_starts(low: date | None, high: date | None, interval: str) -> list[date]:
+    """Partition starts covering ``[low, high]`` (the current period if unknown).
+
+    Capped at the most recent ``_MAX_INITIAL_RANGES``; older rows land in
+    the DEFAULT partition.
+    """
+    if low is None or high is None or low > high:
+        low = high = date.today()
+    starts = []
+    start = _range_start(low, interval)
+    while start <= high:
+        starts.append(start)
+        start = _next_start(start, interval)
+    return starts[-_MAX_INITIAL_RANGES:]
+
+
+def _profile_date(value: str | None) -> date | None:
+    try:
+        return datetime.fromisoformat(value).date() if value else None
+    except ValueError:
+        return None
+
+
+def validate_partitioning(
+    spec: PartitionSpec, columns: list[FinalizedColumn], physical_names: list[str]
+) -> str:
+    """Check *spec* against the finalized columns; returns the partition column.
+
+    Raises ValueError if the column is missing or unsuitable.
+    """
+    by_name = {col.original_name: (col, phys) for col, phys in zip(columns, physical_names)}
+    if spec.column not in by_name:
+        raise ValueError(f"Partition column {spec.column!r} is not one of the columns.")
+    col, phys_name = by_name[spec.column]
+    if spec.strategy == PARTITION_RANGE:
+        if col.data_type.upper() != "DATE":
+            raise ValueError("Range partitioning needs a DATE column.")
+        if spec.interval not in RANGE_INTERVALS:
+            raise ValueError(f"Range interval must be one of: {', '.join(RANGE_INTERVALS)}.")
+    elif spec.strategy == PARTITION_HASH:
+        if not col.is_unique_id:
+            raise ValueError("Hash partitioning needs the unique ID column.")
+        if not 2 <= spec.partitions <= 64:
+            raise ValueError("Hash partitioning needs between 2 and 64 partitions.")
+    else:
+        raise ValueError(f"Unsupported partitioning strategy: {spec.strategy}.")
+    return phys_name
+
+
+def range_starts_for(spec: PartitionSpec, columns: list[FinalizedColumn]) -> list[date]:
+    """Initial range partitions, from the partition column's profiled range."""
+    col = next(c for c in columns if c.original_name == spec.column)
+    profile = col.profile
+    return initial_range_starts(
+        _profile_date(profile.min_value if profile else None),
+        _profile_date(profile.max_value if profile else None),
+        spec.interval,
+    )
+
+
+def check_load_mode(source: SourceMetadata, mode: str, key_column: str | None) -> None:
+    """Raise ValueError for load modes a partitioned table cannot support.
+
+    A replace builds an unlogged, unpartitioned copy, and an upsert needs a
+    unique index on its key, which must then be the partition column.
+    """
+    if source.partition_strategy is None:
+        return
+    if mode == "replace":
+        raise ValueError(
+            "Replace loads are not supported on partitioned projects; "
+            "detach or drop partitions instead."
+        )
+    if mode == "upsert" and key_column != source.partition_column:
+        raise ValueError(
+            "Upsert on a partitioned project needs it hash-partitioned on the unique ID."
+        )
+
+
+def partition_clause(strategy: str, column: str) -> str:
+    return f'PARTITION BY {strategy.upper()} ("{column}")'
+
+
+async def create_partitions(
+    db: AsyncSession,
+    table_name: str,
+    strategy: str,
+    *,
+    interval: str = "month",
+    range_starts: Sequence[date] = (),
+    hash_partitions: int = 0,
+) -> None:
+    """Create the partitions of a freshly created parent, and its ``id`` index."""
+    if strategy == PARTITION_HASH:
+        for remainder in range(hash_partitions):
+            await db.execute(
+                text(
+                    f'CREATE TABLE "{_child_name(table_name, f"h{remainder}")}"'
+                    f' PARTITION OF "{table_name}"'
+                    f" FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {remainder})"
+                )
+            )
+    else:
+        for start in range_starts:
+            await _create_range_partition(db, table_name, start, interval)
+        await db.execute(
+            text(
+                f'CREATE TABLE "{_child_name(table_name, "default")}"'
+                f' PARTITION OF "{table_name}" DEFAULT'
+            )
+        )
+    await db.execute(
+        text(f'CREATE INDEX "{_child_name(table_name, "id_idx")}" ON "{table_name}" ("id")')
+    )
+
+
+async def _create_range_partition(
+    db: AsyncSession, table_name: str, start: date, interval: str
+) -> str:
+    name = range_partition_name(table_name, start, interval)
+    end = _next_start(start, interval)
+    await db.execute(
+        text(
+            f'CREATE TABLE "{name}" PARTITION OF "{table_name}"'
+            f" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+    return name
+
+
+async def _add_range_partition(
+    db: AsyncSession, table_name: str, column: str, start: date, interval: str
+) -> str:
+    """Create the partition starting at *start*, moving its rows out of DEFAULT.
+
+    PostgreSQL refuses a partition whose rows the DEFAULT partition holds,
+    so in that case DEFAULT is detached while the rows move, then attached
+    again (which re-checks it).  The parent's lock waits at most
+    ``DATA_LOAD_SWAP_LOCK_TIMEOUT_MS`` behind open readers.
+    """
+    default = _child_name(table_name, "default")
+    end = _next_start(start, interval)
+    in_range = f""""{column}" >= '{start.isoformat()}' AND "{column}" < '{end.isoformat()}'"""
+    await db.execute(text(_lock_timeout_sql()))
+    stranded = (
+        await db.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_range})'))
+    ).scalar()
+    if not stranded:
+        return await _create_range_partition(db, table_name, start, interval)
+
+    await db.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{default}"'))
+    name = await _create_range_partition(db, table_name, start, interval)
+    await db.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE {in_range} RETURNING *)'
+            f' INSERT INTO "{name}" SELECT * FROM moved'
+        )
+    )
+    await db.execute(text(f'ALTER TABLE "{table_name}" ATTACH PARTITION "{default}" DEFAULT'))
+    return name
+
+
+async def add_range_partition(
+    db: AsyncSession, table_name: str, column: str, day: date, interval: str
+) -> str:
+    """Create the partition for the period containing *day*; returns its name.
+
+    Rows of that period already in the DEFAULT partition move into it.
+    Indexes of the parent are created on the new partition.
+    """
+    return await _add_range_partition(
+        db, table_name, column, _range_start(day, interval), interval
+    )
+
+
+async def ensure_range_partitions(db: AsyncSession, source: SourceMetadata) -> list[str]:
+    """Create the missing partitions of the current and next ``PARTITION_AHEAD_PERIODS``.
+
+    Returns the names created (none for other projects); the caller commits.
+    """
+    if source.partition_strategy != PARTITION_RANGE:
+        return []
+    interval = source.partition_interval
+    existing = {p["name"] for p in await list_partitions(db, source.table_name)}
+    created = []
+    for start in ahead_range_starts(date.today(), interval, settings.PARTITION_AHEAD_PERIODS):
+        if range_partition_name(source.table_name, start, interval) not in existing:
+            created.append(
+                await _add_range_partition(
+                    db, source.table_name, source.partition_column, start, interval
+                )
+            )
+    return created
+
+
+async def list_partitions(db: AsyncSession | AsyncConnection, table_name: str) -> list[dict]:
+    """Partitions of *table_name* with their bounds and estimated row counts."""
+    rows = await db.execute(
+        text(
+            "SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bounds,"
+            "       greatest(c.reltuples, 0)::bigint AS estimated_rows"
+            " FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = to_regclass(:table)"
+            " ORDER BY c.relname"
+        ),
+        {"table": f'"{table_name}"'},
+    )
+    return [dict(row) for row in rows.mappings()]
+
+
+async def detach_partition(
+    db: AsyncSession, table_name: str, partition: str, *, drop: bool
+) -> None:
+    """Detach *partition* from *table_name*, dropping it if *drop*.
+
+    Detaching only changes the catalog; the brief lock on the parent waits
+    at most ``DATA_LOAD_SWAP_LOCK_TIMEOUT_MS`` behind open readers.
+    """
+    partitions = {p["name"] for p in await list_partitions(db, table_name)}
+    if partition not in partitions:
+        raise ValueError(f"{partition!r} is not a partition of this project.")
+    await db.execute(text(_lock_timeout_sql()))
+    await db.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{partition}"'))
+    if drop:
+        await db.execute(text(f'DROP TABLE "{partition}"'))
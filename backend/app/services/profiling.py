@@ -0,0 +1,142 @@
+"""Column Profiling: summary statistics gathered while a schema is inferred.
+
+A :class:`ColumnProfiler` is fed the same chunks of values the type
+inference sees and keeps constant-size state, so it works for the sampled
+and the full-file pass alike:
+
+* empty-value count, for the null rate;
+* a HyperLogLog sketch, for the approximate number of distinct values;
+* the lexical range, and the longest value;
+* a Misra-Gries summary, for the most frequent values.
+
+Numeric and date ranges come from the caller, which parses the values to
+infer their type anyway.
+
+Provisioning stores the profile with the column's registry row.
+"""
+
+import collections
+import math
+from datetime import date, datetime
+
+from app.schemas.schema_inference import ColumnProfile, TopValue
+
+# HyperLogLog with 2**12 registers: ~1.6% standard error in 4 KiB.  Counts
+# stay exact (in a set) until a column has more distinct values than that.
+_HLL_PRECISION = 12
+_HLL_REGISTERS = 1 << _HLL_PRECISION
+_HLL_ALPHA = 0.7213 / (1 + 1.079 / _HLL_REGISTERS)
+_HASH_MASK = (1 << 64) - 1
+
+# Frequent values are tracked exactly until this many are seen, then the
+# rarest are folded away (Misra-Gries), so counts are lower bounds.
+_TOP_CAPACITY = 64
+_TOP_K = 5
+
+
+class HyperLogLog:
+    """Approximate distinct counter over strings.
+
+    Uses Python's built-in (SipHash) string hash, so estimates are only
+    comparable within one process; that is all inference needs.
+    """
+
+    __slots__ = ("registers", "exact")
+
+    def __init__(self) -> None:
+        self.registers = bytearray(_HLL_REGISTERS)
+        self.exact: set[str] | None = set()
+
+    def update(self, values) -> None:
+        if self.exact is not None:
+            self.exact.update(values)
+            if len(self.exact) <= _HLL_REGISTERS:
+                return
+            values, self.exact = self.exact, None
+
+        registers = self.registers
+        width = 64 - _HLL_PRECISION
+        floor = min(registers)
+        hashes = (hash(v) & _HASH_MASK for v in values)
+        if floor:
+            # Only hashes below this can beat the lowest register.
+            limit = 1 << (64 - floor)
+            hashes = (h for h in map(hash, values) if 0 <= h < limit)
+        for h in hashes:
+            index = h & (_HLL_REGISTERS - 1)
+            rank = width - (h >> _HLL_PRECISION).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def estimate(self) -> int:
+        if self.exact is not None:
+            return len(self.exact)
+        registers = self.registers
+        raw = _HLL_ALPHA * _HLL_REGISTERS**2 / sum(2.0**-r for r in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * _HLL_REGISTERS and zeros:
+            return round(_HLL_REGISTERS * math.log(_HLL_REGISTERS / zeros))  # linear counting
+        return round(raw)
+
+
+class ColumnProfiler:
+    """Running profile of one column; see the module docstring."""
+
+    __slots__ = ("rows", "non_empty", "max_length", "distinct", "frequent", "low", "high")
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.non_empty = 0
+        self.max_length = 0
+        self.distinct = HyperLogLog()
+        self.frequent: collections.Counter = collections.Counter()
+        self.low: str | None = None
+        self.high: str | None = None
+
+    def add(self, values: list[str], rows: int) -> None:
+        """Fold in the stripped, non-empty *values* of a chunk of *rows* rows."""
+        self.rows += rows
+        if not values:
+            return
+        self.non_empty += len(values)
+        self.max_length = max(self.max_length, max(map(len, values)))
+        self.distinct.update(values)
+
+        self.frequent.update(values)
+        if len(self.frequent) > 2 * _TOP_CAPACITY:
+            kept = self.frequent.most_common(_TOP_CAPACITY + 1)
+            floor = kept.pop()[1]
+            self.frequent = collections.Counter({v: c - floor for v, c in kept if c > floor})
+
+        low, high = min(values), max(values)
+        if self.low is None or low < self.low:
+            self.low = low
+        if self.high is None or high > self.high:
+            self.high = high
+
+    def profile(self, data_type: str, value_range: tuple | None = None) -> ColumnProfile:
+        """Build the profile for the column's final *data_type*.
+
+        *value_range* is the ``(min, max)`` of the parsed values for
+        INTEGER, FLOAT and DATE columns; STRING columns use the lexical
+        range and BOOLEAN columns have none.
+        """
+        if data_type == "STRING" and self.non_empty:
+            value_range = (self.low, self.high)
+        elif data_type not in ("INTEGER", "FLOAT", "DATE"):
+            value_range = None
+
+        return ColumnProfile(
+            null_rate=round(1 - self.non_empty / self.rows, 4) if self.rows else 0.0,
+            distinct_count=min(self.distinct.estimate(), self.non_empty),
+            min_value=None if value_range is None else _format(value_range[0]),
+            max_value=None if value_range is None else _format(value_range[1]),
+            max_length=self.max_length,
+            top_values=[
+                TopValue(value=v, count=c) for v, c in self.frequent.most_common(_TOP_K)
+            ],
+        )
+
+
+def _format(value) -> str:
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
@@ -1,15 +1,36 @@
 """Dynamic Table Provisioning: creates PostgreSQL tables from finalized schemas."""
 
+import hashlib
 import re
 import uuid
+from collections.abc import Iterable
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.registry import SourceMetadata, ColumnMetadata
-from app.schemas.schema_inference import FinalizedColumn
+from app.core.config import settings
+from app.models.registry import SourceMetadata, ColumnMetadata, IndexMetadata
+from app.schemas.schema_inference import FinalizedColumn, PartitionSpec
+from app.services.partitioning import (
+    PARTITION_RANGE,
+    create_partitions,
+    partition_clause,
+    range_starts_for,
+    validate_partitioning,
+)
+from app.services.registry_cache import notify_project_changed
+from app.services.rejects import ensure_rejects_table
+from app.services.storage_types import (
+    column_width,
+    compact_type,
+    create_enum_sql,
+    row_bytes,
+    storage_order,
+)
 
-# Whitelist of allowed SQL types to prevent injection via type field
+# Whitelist of allowed SQL types to prevent injection via type field.
+# These are the widest; provisioning may store a column as a narrower type
+# (see app.services.storage_types), recorded in ColumnMetadata.sql_type.
 _TYPE_MAP = {
     "STRING": "TEXT",
     "INTEGER": "BIGINT",
@@ -34,25 +55,217 @@ def _make_table_name(project_name: str) -> str:
     return "src_" + _sanitize_identifier(project_name)
 
 
+def layout_signature(physical_names: Iterable[str]) -> str:
+    """Order-independent fingerprint of a table's data columns.
+
+    A CSV whose sanitized headers give the same signature loads into the
+    table column for column.
+    """
+    return hashlib.sha256(",".join(sorted(set(physical_names))).encode()).hexdigest()
+
+
+def _index_name(table_name: str, column: str, suffix: str) -> str:
+    """Build an index name that fits PostgreSQL's 63-character limit."""
+    tail = f"_{column}_{suffix}"
+    return table_name[: 63 - len(tail)] + tail
+
+
+def plan_indexes(
+    table_name: str,
+    columns: list[FinalizedColumn],
+    physical_names: list[str],
+    partition_column: str | None = None,
+) -> list[IndexMetadata]:
+    """Registry rows for a new table's indexes, built after loads (app.services.indexing).
+
+    A unique index per unique-ID column, named like :func:`ensure_unique_index`'s
+    so upserts reuse it, and a lookup index per column marked ``is_indexed``.
+    On a partitioned table only the partition column can be unique; other
+    unique-ID columns get a lookup index.
+    """
+    indexes = []
+    for col, phys_name in zip(columns, physical_names):
+        unique_allowed = partition_column is None or phys_name == partition_column
+        if col.is_unique_id and unique_allowed:
+            name, unique = _index_name(table_name, phys_name, "key"), True
+        elif col.is_indexed or col.is_unique_id:
+            name, unique = _index_name(table_name, phys_name, "idx"), False
+        else:
+            continue
+        indexes.append(
+            IndexMetadata(index_name=name, physical_name=phys_name, is_unique=unique)
+        )
+    return indexes
+
+
+async def ensure_unique_index(db: AsyncSession, table_name: str, column: str) -> None:
+    """Create the unique index used as the upsert conflict target, if missing.
+
+    Fails if the table already holds duplicate values in *column*.
+    """
+    index_name = _index_name(table_name, column, "key")
+    await db.execute(
+        text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ("{column}")')
+    )
+
+
+def _enum_type_name(table_name: str, column: str) -> str:
+    """Name of a column's enum type, outside the namespace of table row types."""
+    tail = f"_{column}"
+    return ("enm_" + table_name.removeprefix("src_"))[: 63 - len(tail)] + tail
+
+
+def _column_widths(sql_types: list[str], profiles: list[dict | None]) -> list[tuple[int, int]]:
+    return [
+        column_width(sql_type, (profile or {}).get("max_length", 0))
+        for sql_type, profile in zip(sql_types, profiles)
+    ]
+
+
+def estimate_row_bytes(
+    columns: list[FinalizedColumn], registry: list[ColumnMetadata]
+) -> tuple[int, int]:
+    """Estimated bytes of data per row: ``(as provisioned, as the wide DDL would store it)``.
+
+    The wide layout has ``_TYPE_MAP``'s types in the order of *columns*.
+    Assumes no NULLs and text at its profiled maximum length; the tuple
+    header and null bitmap are the same either way.
+    """
+    by_name = {meta.physical_name: meta for meta in registry}
+    metas = [by_name[_sanitize_identifier(col.original_name)] for col in columns]
+    profiles = [meta.profile for meta in metas]
+    compact = _column_widths([meta.sql_type for meta in metas], profiles)
+    wide = _column_widths([_TYPE_MAP[meta.data_type] for meta in metas], profiles)
+    id_width = column_width("BIGINT", 0)
+    return (
+        row_bytes([id_width, *(compact[i] for i in storage_order(compact))]),
+        row_bytes([id_width, *wide]),
+    )
+
+
+def _replacement_name(name: str) -> str:
+    """Name for the replacement of a table or index (outside the ``src_`` namespace)."""
+    return f"rpl_{name}"[:63]
+
+
+async def create_replacement_table(db: AsyncSession, table_name: str) -> str:
+    """Create an empty UNLOGGED copy of *table_name* for a full refresh.
+
+    The copy has the same columns but no indexes.  Its ``id`` identity
+    continues from the live table's sequence, so record ids (and the queue
+    entries pointing at them) are never reused across refreshes.  A copy
+    left over from an interrupted refresh is dropped first.
+    """
+    replacement = _replacement_name(table_name)
+    await db.execute(text(f'DROP TABLE IF EXISTS "{replacement}"'))
+    next_id = (
+        await db.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id'))"),
+            {"table": f'"{table_name}"'},
+        )
+    ).scalar()
+    await db.execute(text(f'CREATE UNLOGGED TABLE "{replacement}" (LIKE "{table_name}")'))
+    await db.execute(
+        text(
+            f'ALTER TABLE "{replacement}" ALTER COLUMN "id"'
+            f" ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {int(next_id)})"
+        )
+    )
+    return replacement
+
+
+async def prepare_replacement_table(db: AsyncSession, table_name: str, replacement: str) -> None:
+    """Make a loaded replacement durable, index it like *table_name* and ANALYZE it.
+
+    Indexes are built once over the finished data under temporary names;
+    :func:`swap_replacement_table` gives them the live names.  Fails if the
+    data violates one of the live table's unique indexes.
+    """
+    indexes = (
+        await db.execute(
+            text(
+                "SELECT c.relname AS name, x.indisprimary AS is_primary,"
+                "       x.indisunique AS is_unique, pg_get_indexdef(x.indexrelid) AS definition"
+                " FROM pg_index x JOIN pg_class c ON c.oid = x.indexrelid"
+                " WHERE x.indrelid = to_regclass(:table)"
+            ),
+            {"table": f'"{table_name}"'},
+        )
+    ).all()
+
+    await db.execute(text(f'ALTER TABLE "{replacement}" SET LOGGED'))
+    for index in indexes:
+        temp_name = _replacement_name(index.name)
+        if index.is_primary:
+            await db.execute(
+                text(f'ALTER TABLE "{replacement}" ADD CONSTRAINT "{temp_name}" PRIMARY KEY ("id")')
+            )
+            continue
+        # pg_get_indexdef: CREATE [UNIQUE] INDEX name ON schema.table USING method (...)
+        method_and_columns = index.definition.split(" USING ", 1)[1]
+        unique = "UNIQUE " if index.is_unique else ""
+        await db.execute(
+            text(
+                f'CREATE {unique}INDEX "{temp_name}" ON "{replacement}" USING {method_and_columns}'
+            )
+        )
+    await db.execute(text(f'ANALYZE "{replacement}"'))
+
+
+async def swap_replacement_table(db: AsyncSession, table_name: str, replacement: str) -> None:
+    """Drop *table_name* and rename the prepared replacement into its place.
+
+    Run in its own short transaction: readers block only for the swap
+    itself and then see the new table, never a partial one.
+    ``DATA_LOAD_SWAP_LOCK_TIMEOUT_MS`` bounds how long the swap waits behind
+    open readers, so it cannot stall new readers queued behind it.
+    """
+    indexes = (
+        await db.execute(
+            text(
+                "SELECT c.relname AS name FROM pg_index x JOIN pg_class c ON c.oid = x.indexrelid"
+                " WHERE x.indrelid = to_regclass(:table)"
+            ),
+            {"table": f'"{table_name}"'},
+        )
+    ).scalars().all()
+
+    await db.execute(
+        text(f"SET LOCAL lock_timeout = {int(settings.DATA_LOAD_SWAP_LOCK_TIMEOUT_MS)}")
+    )
+    await db.execute(text(f'DROP TABLE "{table_name}"'))
+    await db.execute(text(f'ALTER TABLE "{replacement}" RENAME TO "{table_name}"'))
+    for name in indexes:
+        await db.execute(text(f'ALTER INDEX "{_replacement_name(name)}" RENAME TO "{name}"'))
+
+
 async def provision_table(
     db: AsyncSession,
     project_name: str,
     columns: list[FinalizedColumn],
     screen_pop_url_template: str | None = None,
+    partitioning: PartitionSpec | None = None,
 ) -> SourceMetadata:
     """
     Create a new PostgreSQL table for the given project and register it.
 
     Steps:
-    1. Validate all identifiers and types.
-    2. Execute CREATE TABLE DDL.
+    1. Validate all identifiers and types, and pick each column's SQL type
+       (narrowed from its profile if PROVISION_COMPACT_TYPES is on).
+    2. Execute CREATE TABLE DDL, columns ordered to minimize padding (a
+       partitioned parent and its partitions if *partitioning* is given;
+       see app.services.partitioning).
     3. Insert registry rows into source_metadata and column_metadata.
+    4. Plan the unique-ID and lookup indexes in index_metadata; they are
+       built concurrently after the first load.
+    5. Create the project's rejects (quarantine) table.
     """
     table_name = _make_table_name(project_name)
 
-    # Build column definitions
-    col_defs: list[str] = ['"id" BIGSERIAL PRIMARY KEY']
+    # Pick each column's SQL type
     physical_names: list[str] = []
+    sql_types: list[str] = []
+    enums: dict[str, list[str]] = {}
 
     for col in columns:
         phys_name = _sanitize_identifier(col.original_name)
@@ -62,34 +275,83 @@ async def provision_table(
                 f"Unsupported data type: {col.data_type}. "
                 f"Allowed: {', '.join(_TYPE_MAP.keys())}"
             )
+        if settings.PROVISION_COMPACT_TYPES:
+            sql_type, labels = compact_type(col, sql_type, _enum_type_name(table_name, phys_name))
+            if labels:
+                enums[sql_type] = labels
         physical_names.append(phys_name)
-        col_defs.append(f'"{phys_name}" {sql_type}')
+        sql_types.append(sql_type)
+
+    partition_column = None
+    if partitioning:
+        partition_column = validate_partitioning(partitioning, columns, physical_names)
+
+    # Build column definitions, widest alignment first to avoid padding.
+    # A partitioned table's primary key would have to include the partition
+    # column, so "id" is indexed per partition instead.
+    col_defs: list[str] = ['"id" BIGSERIAL' if partitioning else '"id" BIGSERIAL PRIMARY KEY']
+    widths = _column_widths(
+        sql_types, [col.profile.model_dump() if col.profile else None for col in columns]
+    )
+    for i in storage_order(widths):
+        col_defs.append(f'"{physical_names[i]}" {sql_types[i]}')
 
-    ddl = f'CREATE TABLE "{table_name}" (\n  ' + ",\n  ".join(col_defs) + "\n);"
+    ddl = f'CREATE TABLE "{table_name}" (\n  ' + ",\n  ".join(col_defs) + "\n)"
+    if partitioning:
+        ddl += " " + partition_clause(partitioning.strategy, partition_column)
 
     # Execute DDL
-    await db.execute(text(ddl))
+    for sql_type, labels in enums.items():
+        await db.execute(text(create_enum_sql(sql_type, labels)))
+    await db.execute(text(ddl + ";"))
+    if partitioning:
+        is_range = partitioning.strategy == PARTITION_RANGE
+        await create_partitions(
+            db,
+            table_name,
+            partitioning.strategy,
+            interval=partitioning.interval,
+            range_starts=range_starts_for(partitioning, columns) if is_range else (),
+            hash_partitions=0 if is_range else partitioning.partitions,
+        )
 
     # Register in source_metadata
     source = SourceMetadata(
         project_name=project_name,
         table_name=table_name,
         screen_pop_url_template=screen_pop_url_template,
+        layout_signature=layout_signature(physical_names),
+        partition_strategy=partitioning.strategy if partitioning else None,
+        partition_column=partition_column,
+        partition_interval=(
+            partitioning.interval
+            if partitioning and partitioning.strategy == PARTITION_RANGE
+            else None
+        ),
     )
     db.add(source)
     await db.flush()  # get source.id
 
     # Register column metadata
-    for col, phys_name in zip(columns, physical_names):
+    for col, phys_name, sql_type in zip(columns, physical_names, sql_types):
         col_meta = ColumnMetadata(
             source_id=source.id,
             physical_name=phys_name,
             display_name=col.display_name,
             data_type=col.data_type.upper(),
+            sql_type=sql_type,
             is_unique_id=col.is_unique_id,
+            date_format=col.date_format if col.data_type.upper() == "DATE" else None,
+            profile=col.profile.model_dump() if col.profile else None,
         )
         db.add(col_meta)
 
+    for index in plan_indexes(table_name, columns, physical_names, partition_column):
+        index.source_id = source.id
+        db.add(index)
+
+    await ensure_rejects_table(db, table_name)
+    await notify_project_changed(db, source.id)
     await db.commit()
-    await db.refresh(source, attribute_names=["columns"])
+    await db.refresh(source, attribute_names=["columns", "indexes"])
     return source
@@ -3,13 +3,41 @@
 from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy import select, text, func, case
+from sqlalchemy import bindparam, select, text, func, case
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
 
 from app.models.queue import RecordQueue, RecordStatus
 from app.models.registry import SourceMetadata
 
 
+def queue_insert_sql(new_ids: str) -> str:
+    """SQL that queues freshly loaded records as pending entries, set-based.
+
+    *new_ids* is a relation with an ``id`` column: a CTE name, a table or a
+    parenthesised query.  Records already queued are skipped.  The SQL binds
+    ``:queue_source_id`` and ``:queue_status``; build the statement with
+    :func:`queue_text` and execute it with :func:`queue_params`.
+    """
+    return (
+        "INSERT INTO record_queue (id, source_id, record_id, status, priority)"
+        " SELECT gen_random_uuid(), :queue_source_id, new_records.id, :queue_status, 0"
+        f" FROM {new_ids} AS new_records"
+        " ON CONFLICT (source_id, record_id) DO NOTHING"
+    )
+
+
+def queue_text(sql: str) -> TextClause:
+    """Wrap SQL containing :func:`queue_insert_sql` so the status binds as the enum."""
+    return text(sql).bindparams(
+        bindparam("queue_status", type_=RecordQueue.__table__.c.status.type)
+    )
+
+
+def queue_params(source_id: UUID) -> dict:
+    return {"queue_source_id": source_id, "queue_status": RecordStatus.PENDING}
+
+
 async def enqueue_records(
     db: AsyncSession,
     source: SourceMetadata,
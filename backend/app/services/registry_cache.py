@@ -0,0 +1,147 @@
+"""Registry Cache: project definitions without a database round trip.
+
+Almost every workspace request starts by loading the project and its
+columns, which change only when a project is provisioned or its schema
+evolves.  ``get_project_info`` reads them through this cache:
+
+* whatever changes a project calls :func:`notify_project_changed` in its
+  transaction.  The NOTIFY is delivered on commit to every API process,
+  whose :func:`registry_listener` drops the entry, and the project's
+  built statements (app.services.statements);
+* every invalidation bumps the project's version, so a read that raced
+  with a change cannot put the old definition back;
+* entries expire after ``REGISTRY_CACHE_TTL_SECONDS`` regardless, as a
+  backstop.
+
+While the listener is not connected (at startup, or after losing its
+connection) nothing is cached, so a missed notification can never leave
+a process serving an old definition.
+"""
+
+import asyncio
+import time
+from uuid import UUID
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.registry import SourceMetadata
+from app.services.statements import statement_registry
+
+logger = structlog.get_logger("services.registry_cache")
+
+REGISTRY_CHANNEL = "qlogic_registry"
+
+# How often the listener checks its connection, and waits to reconnect.
+_LISTENER_CHECK_SECONDS = 5.0
+
+
+class RegistryCache:
+    """Detached ``SourceMetadata`` snapshots by id, with a TTL and versions."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[UUID, tuple[float, SourceMetadata]] = {}
+        self._versions: dict[UUID, int] = {}
+        self._epoch = 0  # bumped by clear(), which invalidates every project
+        self.listening = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, source_id: UUID) -> SourceMetadata | None:
+        entry = self._entries.get(source_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(source_id, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def version(self, source_id: UUID) -> tuple[int, int]:
+        """Take before reading the registry; :meth:`put` needs it unchanged."""
+        return self._epoch, self._versions.get(source_id, 0)
+
+    def put(self, source_id: UUID, version: tuple[int, int], source: SourceMetadata) -> bool:
+        """Cache *source* unless the project changed since *version*; returns whether it did."""
+        if not self.listening or self.ttl_seconds <= 0 or version != self.version(source_id):
+            return False
+        self._entries[source_id] = (time.monotonic() + self.ttl_seconds, source)
+        return True
+
+    def invalidate(self, source_id: UUID) -> None:
+        self._versions[source_id] = self._versions.get(source_id, 0) + 1
+        self._entries.pop(source_id, None)
+        statement_registry.invalidate(source_id)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        statement_registry.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "listening": self.listening,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+registry_cache = RegistryCache(settings.REGISTRY_CACHE_TTL_SECONDS)
+
+
+async def notify_project_changed(db: AsyncSession, source_id: UUID) -> None:
+    """Invalidate the project in every API process once *db* commits.
+
+    Also invalidates it here at once, so this process does not serve the
+    old definition while the notification is on its way.
+    """
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": REGISTRY_CHANNEL, "payload": str(source_id)},
+    )
+    registry_cache.invalidate(source_id)
+
+
+def _on_notify(_connection, _pid: int, _channel: str, payload: str) -> None:
+    try:
+        registry_cache.invalidate(UUID(payload))
+    except ValueError:
+        registry_cache.clear()
+
+
+async def registry_listener() -> None:
+    """LISTEN for registry changes for the life of the process, reconnecting as needed."""
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver_conn = raw.driver_connection
+                await driver_conn.add_listener(REGISTRY_CHANNEL, _on_notify)
+                # Reads that started before LISTEN may have missed a change.
+                registry_cache.clear()
+                registry_cache.listening = True
+                logger.info("registry_listener_started")
+                try:
+                    while not driver_conn.is_closed():
+                        await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+                finally:
+                    registry_cache.listening = False
+                    registry_cache.clear()
+                    # Never hand a LISTENing connection back to the pool.
+                    await conn.invalidate()
+            logger.warning("registry_listener_disconnected")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("registry_listener_failed")
+        await asyncio.sleep(_LISTENER_CHECK_SECONDS)
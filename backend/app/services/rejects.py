@@ -0,0 +1,83 @@
+"""Rejected-Row Quarantine: per-project table of rows that failed to load.
+
+Every row the loader skips (type conversion failure, missing unique ID) is
+written to ``<table>_rejects`` with its row number, the first offending
+column, the reason and the raw CSV record keyed by header.  Rejects are
+written in the load's own transaction, through the same COPY/INSERT writer
+as the data, so they are checkpointed with it.
+"""
+
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Column order of reject records handed to the batch writers, with the SQL
+# types the INSERT writer casts its arrays to.
+REJECT_COLUMNS = ["load_job_id", "row_num", "column_name", "reason", "raw_record"]
+REJECT_TYPES = ["UUID", "BIGINT", "TEXT", "TEXT", "JSONB"]
+
+
+def rejects_table_name(table_name: str) -> str:
+    return table_name[: 63 - len("_rejects")] + "_rejects"
+
+
+async def ensure_rejects_table(db: AsyncSession, table_name: str) -> str:
+    """Create the project's rejects table if missing and return its name."""
+    rejects = rejects_table_name(table_name)
+    await db.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{rejects}" ('
+            "  id BIGSERIAL PRIMARY KEY,"
+            "  load_job_id UUID,"
+            "  row_num BIGINT NOT NULL,"
+            "  column_name TEXT,"
+            "  reason TEXT NOT NULL,"
+            "  raw_record JSONB NOT NULL,"
+            "  rejected_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+            ")"
+        )
+    )
+    index_name = rejects[: 63 - len("_job_idx")] + "_job_idx"
+    await db.execute(
+        text(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{rejects}" (load_job_id)')
+    )
+    return rejects
+
+
+async def clear_job_rejects(db: AsyncSession, table_name: str, load_job_id: UUID) -> None:
+    """Drop the rejects recorded by an earlier attempt of a load job."""
+    rejects = rejects_table_name(table_name)
+    await db.execute(
+        text(f'DELETE FROM "{rejects}" WHERE load_job_id = :job_id'), {"job_id": load_job_id}
+    )
+
+
+async def _table_exists(db: AsyncSession, name: str) -> bool:
+    found = await db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": f'"{name}"'})
+    return bool(found.scalar())
+
+
+async def fetch_rejects(
+    db: AsyncSession,
+    table_name: str,
+    load_job_id: UUID | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> tuple[list[dict], int]:
+    """Return one page of rejects (oldest first) and the total matching count."""
+    rejects = rejects_table_name(table_name)
+    if not await _table_exists(db, rejects):
+        return [], 0
+
+    where = "WHERE load_job_id = :job_id" if load_job_id else ""
+    params = {"job_id": load_job_id, "limit": limit, "offset": offset}
+    total = (await db.execute(text(f'SELECT count(*) FROM "{rejects}" {where}'), params)).scalar()
+    rows = await db.execute(
+        text(
+            f"SELECT id, load_job_id, row_num, column_name, reason, raw_record, rejected_at"
+            f' FROM "{rejects}" {where} ORDER BY id LIMIT :limit OFFSET :offset'
+        ),
+        params,
+    )
+    return [dict(row) for row in rows.mappings().all()], total
@@ -0,0 +1,183 @@
+"""Project Statements: the SQL run against project tables, built once.
+
+Reading a project's records and loading its table run the same few
+statements over and over.  Rather than a new f-string and ``text()`` per
+request, they are built here once per version of the project (its table
+and its columns' names and SQL types), with explicit column lists:
+
+* the statement text is the same on every request, so SQLAlchemy's
+  compiled cache hits and asyncpg runs it as a server-side prepared
+  statement, prepared once per pooled connection (see
+  ``DB_STATEMENT_CACHE_SIZE``), whose plan PostgreSQL reuses;
+* reads return the registry's columns only, never the ``evo_*`` shadow
+  columns of a schema change in progress, and adding a column to the
+  table does not change the result of statements already prepared.
+
+A project whose definition changed (as seen through the registry cache)
+gets new statements on its next request, and the registry cache drops a
+project's statements with its definition (see app.services.registry_cache),
+so deleted or replaced projects do not linger.  A retyped column keeps its
+name, so each project's read statements carry a tag of the version they
+were built for: new text, which connections prepare afresh, instead of
+a prepared statement that no longer matches the table.
+"""
+
+import hashlib
+from collections import OrderedDict
+from uuid import UUID
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from app.models.registry import SourceMetadata
+from app.services.queue_manager import queue_insert_sql, queue_text
+
+logger = structlog.get_logger("services.statements")
+
+# Insert statements kept, by target table and column list.  Loads also
+# write to staging, replacement and rejects tables, so this is bounded.
+_MAX_INSERTS = 256
+# Projects whose read statements are kept, least recently used dropped
+# first (the inference cache's default size).
+_MAX_PROJECTS = 256
+
+
+class KeysetStatements:
+    """Pages of a project's rows in ``(column, id)`` order, for keyset pagination.
+
+    ``first`` reads from the start; ``after`` continues after a row's
+    ``(:after, :after_id)``, binding the value as text so it can come from
+    a cursor; ``after_null`` continues through rows where the column is
+    NULL, which sort last.  For ``id`` itself only ``first`` and ``after``
+    (on ``:after_id``) exist.
+    """
+
+    __slots__ = ("first", "after", "after_null")
+
+    def __init__(self, select: str, order_by: str, sql_type: str | None) -> None:
+        if sql_type is None:
+            self.first = text(f'{select} ORDER BY "id" LIMIT :limit')
+            self.after = text(f'{select} WHERE "id" > :after_id ORDER BY "id" LIMIT :limit')
+            self.after_null = None
+            return
+        column = f'"{order_by}"'
+        after = f"CAST(CAST(:after AS TEXT) AS {sql_type})"
+        self.first = text(f'{select} ORDER BY {column}, "id" LIMIT :limit')
+        self.after = text(
+            f'{select} WHERE ({column}, "id") > ({after}, :after_id)'
+            f' ORDER BY {column}, "id" LIMIT :limit'
+        )
+        self.after_null = text(
+            f'{select} WHERE {column} IS NULL AND "id" > :after_id ORDER BY "id" LIMIT :limit'
+        )
+
+
+class ProjectStatements:
+    """The read statements of one version of a project's table."""
+
+    __slots__ = ("version", "by_id", "_select", "_sql_types", "_pages")
+
+    def __init__(self, version: tuple) -> None:
+        table_name, columns = version
+        self.version = version
+        col_list = ", ".join(f'"{p}"' for p in ("id", *(name for name, _ in columns)))
+        tag = hashlib.blake2s(repr(version).encode(), digest_size=6).hexdigest()
+        self._select = f'/* {tag} */ SELECT {col_list} FROM "{table_name}"'
+        self._sql_types = dict(columns)
+        self._pages: dict[str, KeysetStatements] = {}
+        self.by_id = text(f'{self._select} WHERE "id" = :record_id')
+
+    def pages(self, order_by: str) -> KeysetStatements:
+        """Keyset page statements ordered by *order_by*: ``id`` or one of the columns."""
+        pages = self._pages.get(order_by)
+        if pages is None:
+            sql_type = None if order_by == "id" else self._sql_types[order_by]
+            pages = self._pages[order_by] = KeysetStatements(self._select, order_by, sql_type)
+        return pages
+
+
+def project_version(source: SourceMetadata) -> tuple:
+    """What the statements of *source* are built from."""
+    return source.table_name, tuple((c.physical_name, c.sql_type) for c in source.columns)
+
+
+def insert_statement(
+    table_name: str, physical_names: tuple[str, ...], sql_types: tuple[str, ...], enqueue: bool
+) -> TextClause:
+    """Array-bound INSERT of one batch; binds ``:c0``, ``:c1``, ... per column.
+
+    With *enqueue* the inserted rows are also queued (see
+    :func:`queue_insert_sql`), and the statement binds its parameters too.
+    """
+    col_list = ", ".join(f'"{p}"' for p in physical_names)
+    arrays = ", ".join(f"CAST(:c{i} AS {sql_type}[])" for i, sql_type in enumerate(sql_types))
+    insert = f'INSERT INTO "{table_name}" ({col_list}) SELECT * FROM unnest({arrays})'
+    if not enqueue:
+        return text(insert)
+    return queue_text(f"WITH inserted AS ({insert} RETURNING id) {queue_insert_sql('inserted')}")
+
+
+class StatementRegistry:
+    """Built statements by project, and insert statements by target, both LRU."""
+
+    def __init__(self, max_projects: int, max_inserts: int) -> None:
+        self.max_projects = max_projects
+        self.max_inserts = max_inserts
+        self._projects: OrderedDict[UUID, ProjectStatements] = OrderedDict()
+        self._inserts: OrderedDict[tuple, TextClause] = OrderedDict()
+        self.builds = 0
+        self.reuses = 0
+
+    def for_project(self, source: SourceMetadata) -> ProjectStatements:
+        version = project_version(source)
+        statements = self._projects.get(source.id)
+        if statements is not None and statements.version == version:
+            self._projects.move_to_end(source.id)
+            self.reuses += 1
+            return statements
+        if statements is not None:
+            logger.info("project_statements_rebuilt", source_id=str(source.id))
+        statements = self._projects[source.id] = ProjectStatements(version)
+        self._projects.move_to_end(source.id)
+        self.builds += 1
+        if len(self._projects) > self.max_projects:
+            self._projects.popitem(last=False)
+        return statements
+
+    def invalidate(self, source_id: UUID) -> None:
+        self._projects.pop(source_id, None)
+
+    def clear(self) -> None:
+        self._projects.clear()
+
+    def insert(
+        self,
+        table_name: str,
+        physical_names: list[str],
+        sql_types: list[str],
+        enqueue: bool = False,
+    ) -> TextClause:
+        key = (table_name, tuple(physical_names), tuple(sql_types), enqueue)
+        stmt = self._inserts.get(key)
+        if stmt is not None:
+            self._inserts.move_to_end(key)
+            self.reuses += 1
+            return stmt
+        stmt = self._inserts[key] = insert_statement(*key)
+        self.builds += 1
+        if len(self._inserts) > self.max_inserts:
+            self._inserts.popitem(last=False)
+        return stmt
+
+    def stats(self) -> dict:
+        return {
+            "projects": len(self._projects),
+            "inserts": len(self._inserts),
+            "builds": self.builds,
+            "reuses": self.reuses,
+        }
+
+
+statement_registry = StatementRegistry(_MAX_PROJECTS, _MAX_INSERTS)
+
@@ -0,0 +1,251 @@
+"""Storage Types: compact SQL types and column order for new project tables.
+
+A column's registry type (STRING, INTEGER, ...) says how the loader parses
+its values; its SQL type says how PostgreSQL stores them.  ``_TYPE_MAP``
+in provisioning gives the widest SQL type for each registry type.  With
+``PROVISION_COMPACT_TYPES`` on, provisioning narrows it from the column's
+inference profile:
+
+* INTEGER as SMALLINT or INTEGER when the profiled range fits with
+  headroom (unique IDs, which grow, are never SMALLINT);
+* FLOAT as REAL when no profiled value is longer than REAL holds exactly
+  (six significant digits);
+* DATE as DATE when the detected layout has no time of day;
+* low-cardinality STRING as an enum type, when the profile lists every
+  distinct value, each seen repeatedly, and the labels average more than
+  the four bytes an enum takes.
+
+Unless inference ran a full scan (``CSV_INFER_FULL_SCAN``) the profile
+comes from a sample, and later values may not fit, so compaction is off
+by default.  The loader never stores a value altered to fit: it rejects
+numbers out of range, numbers a REAL would round and dates with a time of
+day (see :func:`value_limit`), and adds new labels to enum types before
+it writes them (:func:`add_enum_labels`).
+
+Columns are laid out by alignment, widest first, so fixed-width values
+pack without padding; :func:`row_bytes` estimates the data width of a row
+so provisioning can report the saving over the wide layout.
+"""
+
+import re
+import struct
+from datetime import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.schemas.schema_inference import FinalizedColumn
+from app.services.date_formats import ISO_8601
+
+_SMALLINT_RANGE = (-(2**15), 2**15 - 1)
+_INTEGER_RANGE = (-(2**31), 2**31 - 1)
+_REAL_MAX = 3.4028234663852886e38
+_REAL_DIGITS = 6  # significant digits a REAL always holds (FLT_DIG)
+
+# The profiled range must fit in 1/_HEADROOM of a narrower integer type.
+_HEADROOM = 4
+# Longest FLOAT text below 1e6 that has at most six significant digits.
+_REAL_MAX_LENGTH = 7
+# Each label must be seen this many times on average in the profile.
+_ENUM_MIN_REPEATS = 5
+_ENUM_LABEL_MAX_BYTES = 63  # NAMEDATALEN - 1
+_ENUM_WIDTH = 4
+
+_TIME_DIRECTIVES = re.compile(r"%[HIMSfpzZXcTR]")
+
+_FIXED_WIDTHS = {
+    "BOOLEAN": 1,
+    "SMALLINT": 2,
+    "INTEGER": 4,
+    "REAL": 4,
+    "DATE": 4,
+    "BIGINT": 8,
+    "DOUBLE PRECISION": 8,
+    "TIMESTAMP": 8,
+}
+
+
+def is_enum_type(sql_type: str) -> bool:
+    """Enum types are the project's own, stored as quoted names."""
+    return sql_type.startswith('"')
+
+
+def _quote_label(label: str) -> str:
+    return "'" + label.replace("'", "''") + "'"
+
+
+def compact_type(col: FinalizedColumn, wide_type: str, enum_type: str) -> tuple[str, list[str]]:
+    """The SQL type to store *col* as, and the labels to create if it is an enum.
+
+    *wide_type* is the registry type's default and *enum_type* the name an
+    enum for the column would get.
+    """
+    data_type = col.data_type.upper()
+    profile = col.profile
+    if data_type == "DATE":
+        return ("DATE" if _date_only(col) else wide_type), []
+    if profile is None or not profile.distinct_count:
+        return wide_type, []
+
+    if data_type == "INTEGER":
+        try:
+            low, high = int(profile.min_value), int(profile.max_value)
+        except (TypeError, ValueError):
+            return wide_type, []
+        candidates = [("INTEGER", _INTEGER_RANGE)]
+        if not col.is_unique_id:
+            candidates.insert(0, ("SMALLINT", _SMALLINT_RANGE))
+        for sql_type, (lowest, highest) in candidates:
+            if lowest <= low * _HEADROOM and high * _HEADROOM <= highest:
+                return sql_type, []
+    elif data_type == "FLOAT":
+        try:
+            low, high = float(profile.min_value), float(profile.max_value)
+        except (TypeError, ValueError):
+            return wide_type, []
+        if profile.max_length <= _REAL_MAX_LENGTH and max(-low, high) < 1e6:
+            return "REAL", []
+    elif data_type == "STRING" and not col.is_unique_id:
+        labels = _enum_labels(col)
+        if labels:
+            return f'"{enum_type}"', labels
+    return wide_type, []
+
+
+def _date_only(col: FinalizedColumn) -> bool:
+    if not col.date_format:
+        return False
+    if col.date_format == ISO_8601:
+        # "YYYY-MM-DD"; anything longer carries a time.
+        return col.profile is not None and 0 < col.profile.max_length <= 10
+    return not _TIME_DIRECTIVES.search(col.date_format)
+
+
+def _enum_labels(col: FinalizedColumn) -> list[str]:
+    profile = col.profile
+    top = profile.top_values
+    if not top or profile.distinct_count != len(top):
+        return []  # the profile does not list every value
+    seen = sum(t.count for t in top)
+    if seen < _ENUM_MIN_REPEATS * len(top):
+        return []
+    sizes = [len(t.value.encode()) for t in top]
+    if max(sizes) > _ENUM_LABEL_MAX_BYTES:
+        return []
+    mean_size = sum(size * t.count for size, t in zip(sizes, top)) / seen
+    if 1 + mean_size <= _ENUM_WIDTH:
+        return []
+    return sorted(t.value for t in top)
+
+
+def create_enum_sql(sql_type: str, labels: list[str]) -> str:
+    return f"CREATE TYPE {sql_type} AS ENUM ({', '.join(map(_quote_label, labels))})"
+
+
+async def add_enum_labels(sql_type: str, labels: set[str], existing: set[str]) -> None:
+    """Add *labels* to an enum type, keeping the labels in sorted order.
+
+    Runs on its own autocommit connection, so the labels are committed and
+    usable by the load that found them.
+    """
+    known = sorted(existing)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for label in sorted(labels):
+            after = next((k for k in known if k > label), None)
+            position = f" BEFORE {_quote_label(after)}" if after is not None else ""
+            await conn.execute(
+                text(
+                    f"ALTER TYPE {sql_type} ADD VALUE IF NOT EXISTS {_quote_label(label)}{position}"
+                )
+            )
+
+
+class ValueLimit:
+    """What a compact SQL type can hold; the loader rejects other values."""
+
+    __slots__ = ("reason", "low", "high", "max_bytes", "single_precision", "date_only")
+
+    def __init__(
+        self,
+        reason: str,
+        low: float | None = None,
+        high: float | None = None,
+        max_bytes: int | None = None,
+        *,
+        single_precision: bool = False,
+        date_only: bool = False,
+    ) -> None:
+        self.reason = reason
+        self.low = low
+        self.high = high
+        self.max_bytes = max_bytes
+        self.single_precision = single_precision
+        self.date_only = date_only
+
+    def refuses(self, value) -> bool:
+        if self.max_bytes is not None:
+            return len(value.encode()) > self.max_bytes
+        if self.date_only:
+            return value.time() != time()
+        if not self.low <= value <= self.high:
+            return True
+        return self.single_precision and _rounds_in_real(value)
+
+
+def _rounds_in_real(value: float) -> bool:
+    """Whether storing *value* as a REAL would change it.
+
+    A REAL reads back as the shortest text that identifies it, so values of
+    up to six significant digits survive even when not exactly representable.
+    """
+    if struct.unpack("f", struct.pack("f", value))[0] == value:
+        return False
+    return float(f"{value:.{_REAL_DIGITS}g}") != value
+
+
+def value_limit(sql_type: str) -> ValueLimit | None:
+    """The limit to check loaded values against, for types narrower than the registry's."""
+    if sql_type == "SMALLINT":
+        return ValueLimit("Out of range for SMALLINT", *_SMALLINT_RANGE)
+    if sql_type == "INTEGER":
+        return ValueLimit("Out of range for INTEGER", *_INTEGER_RANGE)
+    if sql_type == "REAL":
+        return ValueLimit(
+            f"Out of range for REAL, or more than {_REAL_DIGITS} significant digits",
+            -_REAL_MAX,
+            _REAL_MAX,
+            single_precision=True,
+        )
+    if sql_type == "DATE":
+        return ValueLimit("Has a time of day; the column stores dates only", date_only=True)
+    if is_enum_type(sql_type):
+        return ValueLimit(
+            f"Longer than {_ENUM_LABEL_MAX_BYTES} bytes, the limit for enum labels",
+            max_bytes=_ENUM_LABEL_MAX_BYTES,
+        )
+    return None
+
+
+def column_width(sql_type: str, max_length: int) -> tuple[int, int]:
+    """``(bytes, alignment)`` of a non-null value; text is sized at *max_length*."""
+    if is_enum_type(sql_type):
+        return _ENUM_WIDTH, _ENUM_WIDTH
+    if sql_type in _FIXED_WIDTHS:
+        return _FIXED_WIDTHS[sql_type], _FIXED_WIDTHS[sql_type]
+    if max_length < 127:
+        return 1 + max_length, 1  # short varlena header, unaligned
+    return 4 + max_length, 4
+
+
+def storage_order(widths: list[tuple[int, int]]) -> list[int]:
+    """Positions of *widths* ordered widest alignment first, text last."""
+    return sorted(range(len(widths)), key=lambda i: (-widths[i][1], widths[i][0] != widths[i][1]))
+
+
+def row_bytes(widths: list[tuple[int, int]]) -> int:
+    """Bytes of row data for values laid out in order, padding included."""
+    offset = 0
+    for size, align in widths:
+        offset = -(-offset // align) * align + size
+    return offset
@@ -1,15 +1,39 @@
 """Agent Workspace: dynamic data loading and screen pop URL injection."""
 
+import base64
+import binascii
+import json
 from uuid import UUID
 
-from sqlalchemy import text, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.registry import SourceMetadata, ColumnMetadata
+from app.models.registry import SourceMetadata, ColumnMetadata, IndexMetadata
+from app.services.indexing import INDEX_READY
+from app.services.registry_cache import registry_cache
+from app.services.statements import statement_registry
 
 
 async def get_project_info(db: AsyncSession, source_id: UUID) -> SourceMetadata | None:
+    """The project and its columns, read through the registry cache.
+
+    A cached result is a detached snapshot shared between requests: read
+    it, but do not change it or add it to a session.  Use
+    :func:`load_project` for a session-bound copy to modify.
+    """
+    source = registry_cache.get(source_id)
+    if source is not None:
+        return source
+    version = registry_cache.version(source_id)
+    source = await load_project(db, source_id)
+    if source is not None and registry_cache.put(source_id, version, source):
+        db.expunge(source)
+    return source
+
+
+async def load_project(db: AsyncSession, source_id: UUID) -> SourceMetadata | None:
+    """The project and its columns, from the database."""
     stmt = (
         select(SourceMetadata)
         .options(selectinload(SourceMetadata.columns))
@@ -29,14 +53,84 @@ async def fetch_records(
     db: AsyncSession,
     source: SourceMetadata,
     limit: int = 50,
-    offset: int = 0,
-) -> list[dict]:
-    """Fetch rows from the dynamic table for a given project."""
-    table_name = source.table_name
-    query = text(f'SELECT * FROM "{table_name}" LIMIT :limit OFFSET :offset')
-    result = await db.execute(query, {"limit": limit, "offset": offset})
-    rows = result.mappings().all()
-    return [dict(row) for row in rows]
+    order_by: str = "id",
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """A page of rows in ``(order_by, id)`` order, and the cursor of the next page.
+
+    Pages are keyset-paginated: each continues after the last row of the
+    one before, which the index on *order_by* finds directly, so a deep
+    page costs what the first does and rows added meanwhile do not shift
+    later pages.  Pass no *cursor* for the first page; the cursor returned
+    with the last page is None.  Raises ValueError for a column that is not
+    ``id`` or indexed, or a cursor from another ordering.
+    """
+    await _check_order_by(db, source, order_by)
+    pages = statement_registry.for_project(source).pages(order_by)
+    fetch = limit + 1  # one more tells whether there is a next page
+    if cursor is None:
+        rows = await _fetch(db, pages.first, {"limit": fetch})
+    else:
+        after, after_id = _decode_cursor(cursor, order_by)
+        rows = []
+        if pages.after_null is None:
+            rows = await _fetch(db, pages.after, {"after_id": after_id, "limit": fetch})
+        elif after is not None:
+            params = {"after": after, "after_id": after_id, "limit": fetch}
+            rows = await _fetch(db, pages.after, params)
+            after_id = 0  # ids start at 1: the NULLs, if reached, from the start
+        if pages.after_null is not None and len(rows) < fetch:
+            params = {"after_id": after_id, "limit": fetch - len(rows)}
+            rows += await _fetch(db, pages.after_null, params)
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, _encode_cursor(order_by, None if order_by == "id" else last[order_by], last["id"])
+
+
+async def _fetch(db: AsyncSession, query, params: dict) -> list[dict]:
+    result = await db.execute(query, params)
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def _check_order_by(db: AsyncSession, source: SourceMetadata, order_by: str) -> None:
+    if order_by == "id":
+        return
+    if order_by not in {col.physical_name for col in source.columns}:
+        raise ValueError(f"Unknown column {order_by!r}.")
+    indexed = await db.execute(
+        select(IndexMetadata.id)
+        .where(
+            IndexMetadata.source_id == source.id,
+            IndexMetadata.physical_name == order_by,
+            IndexMetadata.status == INDEX_READY,
+        )
+        .limit(1)
+    )
+    if indexed.first() is None:
+        raise ValueError(
+            f"Records can be ordered by id or an indexed column; {order_by!r} has no built index."
+        )
+
+
+def _encode_cursor(order_by: str, value, record_id: int) -> str:
+    """Opaque to clients; the value travels as text and is cast back in SQL."""
+    payload = [order_by, None if value is None else str(value), record_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_cursor(cursor: str, order_by: str) -> tuple[str | None, int]:
+    try:
+        cursor_order, value, record_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor.") from None
+    if not isinstance(record_id, int) or not (value is None or isinstance(value, str)):
+        raise ValueError("Invalid cursor.")
+    if cursor_order != order_by:
+        raise ValueError(f"The cursor is for records ordered by {cursor_order!r}.")
+    return value, record_id
 
 
 async def fetch_record_by_id(
@@ -45,8 +139,7 @@ async def fetch_record_by_id(
     record_id: int,
 ) -> dict | None:
     """Fetch a single row from a dynamic table by its id."""
-    table_name = source.table_name
-    query = text(f'SELECT * FROM "{table_name}" WHERE id = :record_id')
+    query = statement_registry.for_project(source).by_id
     result = await db.execute(query, {"record_id": record_id})
     row = result.mappings().first()
     return dict(row) if row else None
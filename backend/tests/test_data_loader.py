@@ -0,0 +1,458 @@
+"""Tests for the CSV data loader's parsing helpers."""
+
+import csv
+import datetime
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import data_loader
+from app.services.data_loader import _iter_text_lines
+from app.services.provisioning import _TYPE_MAP
+
+
+def _rows(data: bytes, chunk_size: int) -> list[list[str]]:
+    return list(csv.reader(_iter_text_lines(io.BytesIO(data), chunk_size)))
+
+
+def test_strips_bom_split_across_chunks():
+    data = "﻿id,name\n1,Alice\n".encode("utf-8")
+    assert _rows(data, chunk_size=1) == [["id", "name"], ["1", "Alice"]]
+
+
+def test_multibyte_characters_split_across_chunks():
+    data = "city\nZürich\nKøbenhavn\n".encode("utf-8")
+    for chunk_size in (1, 2, 3, 7):
+        assert _rows(data, chunk_size) == [["city"], ["Zürich"], ["København"]]
+
+
+def test_quoted_newlines_and_missing_trailing_newline():
+    data = b'id,note\r\n1,"line one\nline two"\r\n2,last'
+    assert _rows(data, chunk_size=4) == [
+        ["id", "note"],
+        ["1", "line one\nline two"],
+        ["2", "last"],
+    ]
+
+
+class _FakeSession:
+    def __init__(self) -> None:
+        self.committed = False
+        self.commits = 0
+
+    async def commit(self) -> None:
+        self.committed = True
+        self.commits += 1
+
+
+class _FakeWriter:
+    method = "fake"
+
+    def __init__(self) -> None:
+        self.batches: list[list[tuple]] = []
+        self.rejects: list[tuple] = []
+
+    async def write(self, batch: list[tuple]) -> tuple[int, int]:
+        self.batches.append(batch)
+        return len(batch), 0
+
+    async def close(self) -> None:
+        pass
+
+
+def _source(*columns: tuple[str, str]) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=None,
+        table_name="src_test",
+        partition_strategy=None,
+        columns=[
+            SimpleNamespace(
+                physical_name=name,
+                data_type=dtype,
+                sql_type=_TYPE_MAP[dtype],
+                is_unique_id=False,
+                date_format=None,
+            )
+            for name, dtype in columns
+        ],
+    )
+
+
+@pytest.fixture
+def fake_writer(monkeypatch) -> _FakeWriter:
+    writer = _FakeWriter()
+
+    async def _get_writer(*_args, **_kwargs):
+        return writer
+
+    class _RejectsWriter:
+        async def write(self, records):
+            writer.rejects.extend(records)
+
+    async def _get_rejects_writer(*_args, **_kwargs):
+        return _RejectsWriter()
+
+    async def _ensure_rejects_table(_db, table_name):
+        return f"{table_name}_rejects"
+
+    monkeypatch.setattr(data_loader, "_get_batch_writer", _get_writer)
+    monkeypatch.setattr(data_loader, "_get_plain_writer", _get_rejects_writer)
+    monkeypatch.setattr(data_loader, "ensure_rejects_table", _ensure_rejects_table)
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_BATCH_SIZE", 2)
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_QUEUE_DEPTH", 1)
+    return writer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("conversion", ["row", "columnar"])
+async def test_load_csv_pipelines_batches_in_order(fake_writer, monkeypatch, conversion):
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_CONVERSION", conversion)
+    data = b"Account ID,Amount\n1,10\n2,oops\n3,30\n4,40\n5,50\n"
+    db = _FakeSession()
+    result = await data_loader.load_csv(
+        db, _source(("account_id", "INTEGER"), ("amount", "FLOAT")), io.BytesIO(data)
+    )
+
+    assert db.committed
+    assert result.rows_loaded == 4
+    assert result.rows_failed == 1
+    assert "Row 2, column 'Amount'" in result.errors[0]
+    assert [row for b in fake_writer.batches for row in b] == [(1, 10.0), (3, 30.0), (4, 40.0), (5, 50.0)]
+    assert all(0 < len(b) <= 2 for b in fake_writer.batches)
+    assert fake_writer.rejects == [
+        (None, 2, "Amount", "Cannot convert to FLOAT", '{"Account ID": "2", "Amount": "oops"}')
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("conversion", ["row", "columnar"])
+async def test_upsert_keeps_the_last_row_of_a_repeated_key(fake_writer, monkeypatch, conversion):
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_CONVERSION", conversion)
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_BATCH_SIZE", 3)
+    source = _source(("account_id", "INTEGER"), ("note", "STRING"))
+    source.columns[0].is_unique_id = True
+    data = b"Account ID,Note\n1,first\n2,other\n1,second\n"
+    result = await data_loader.load_csv(_FakeSession(), source, io.BytesIO(data), mode="upsert")
+
+    assert [row for b in fake_writer.batches for row in b] == [(2, "other"), (1, "second")]
+    assert (result.rows_loaded, result.rows_inserted, result.rows_duplicate) == (3, 2, 1)
+    assert result.rows_unchanged == 0
+
+
+def test_drop_duplicate_keys_keeps_rows_without_a_key():
+    batch = data_loader.ColumnBatch([[1, None, 1, None], ["a", "b", "c", "d"]], 4)
+    deduped, dropped = data_loader._drop_duplicate_keys(batch, 0)
+    assert dropped == 1
+    assert list(deduped) == [(None, "b"), (1, "c"), (None, "d")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("conversion", ["row", "columnar"])
+async def test_values_a_compact_type_cannot_hold_are_rejected(fake_writer, monkeypatch, conversion):
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_CONVERSION", conversion)
+    source = _source(("qty", "INTEGER"), ("note", "STRING"))
+    source.columns[0].sql_type = "SMALLINT"
+    data = b"qty,note\n1,a\n40000,b\n-3,c\n"
+    result = await data_loader.load_csv(_FakeSession(), source, io.BytesIO(data))
+
+    assert [row for b in fake_writer.batches for row in b] == [(1, "a"), (-3, "c")]
+    assert [r[1:4] for r in fake_writer.rejects] == [(2, "qty", "Out of range for SMALLINT")]
+    assert result.rows_failed == 1
+
+
+@pytest.mark.asyncio
+async def test_load_csv_surfaces_parse_errors(fake_writer, monkeypatch):
+    monkeypatch.setattr(data_loader.settings, "CSV_READ_CHUNK_SIZE", 4)
+    data = b"id\n1\n2\n3\n\xff\n"  # invalid UTF-8 well past the header
+    with pytest.raises(UnicodeDecodeError):
+        await data_loader.load_csv(_FakeSession(), _source(("id", "INTEGER")), io.BytesIO(data))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("conversion", ["row", "columnar"])
+async def test_load_csv_resumes_from_checkpoint(fake_writer, monkeypatch, conversion):
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_CONVERSION", conversion)
+    monkeypatch.setattr(data_loader.settings, "DATA_LOAD_COMMIT_EVERY", 1)
+    data = b'id,note\n1,a\n2,"multi\nline"\nx,b\n4,c\n5,d\n6,e\n'
+    source = _source(("id", "INTEGER"), ("note", "STRING"))
+    checkpoints = []
+
+    async def record(checkpoint, result):
+        checkpoints.append((checkpoint, result.rows_loaded))
+
+    db = _FakeSession()
+    full = await data_loader.load_csv(db, source, io.BytesIO(data), on_checkpoint=record)
+    all_rows = [row for b in fake_writer.batches for row in b]
+    assert db.commits == len(checkpoints) > 2
+    assert checkpoints[-1][0].byte_offset == len(data)
+
+    # Resume as if the process died right after the second checkpoint commit.
+    checkpoint, rows_loaded = checkpoints[1]
+    seed = data_loader.LoadResult()
+    seed.rows_loaded = rows_loaded
+    seed.rows_failed = checkpoint.rows_failed
+    fake_writer.batches.clear()
+    resumed = await data_loader.load_csv(
+        _FakeSession(), source, io.BytesIO(data), resume=checkpoint, result=seed
+    )
+
+    assert [row for b in fake_writer.batches for row in b] == all_rows[rows_loaded:]
+    assert (resumed.rows_loaded, resumed.rows_failed) == (full.rows_loaded, full.rows_failed)
+
+
+@pytest.mark.asyncio
+async def test_load_csv_replace_loads_a_copy_and_swaps_it_in(fake_writer, monkeypatch):
+    calls = []
+
+    class _Session(_FakeSession):
+        async def commit(self) -> None:
+            calls.append("commit")
+            await super().commit()
+
+    async def _get_writer(_db, table_name, *_args, **kwargs):
+        calls.append(("writer", table_name, kwargs.get("key_column")))
+        return fake_writer
+
+    async def _create(_db, table_name):
+        calls.append(("create", table_name))
+        return f"rpl_{table_name}"
+
+    async def _prepare(_db, table_name, replacement):
+        calls.append(("prepare", table_name, replacement))
+
+    async def _swap(_db, table_name, replacement):
+        calls.append(("swap", table_name, replacement))
+
+    monkeypatch.setattr(data_loader, "_get_batch_writer", _get_writer)
+    monkeypatch.setattr(data_loader, "create_replacement_table", _create)
+    monkeypatch.setattr(data_loader, "prepare_replacement_table", _prepare)
+    monkeypatch.setattr(data_loader, "swap_replacement_table", _swap)
+
+    data = b"id\n1\n2\n3\n"
+    result = await data_loader.load_csv(
+        _Session(), _source(("id", "INTEGER")), io.BytesIO(data), mode="replace"
+    )
+
+    assert result.rows_loaded == 3
+    assert calls == [
+        ("create", "src_test"),
+        ("writer", "rpl_src_test", None),
+        "commit",
+        ("prepare", "src_test", "rpl_src_test"),
+        "commit",
+        ("swap", "src_test", "rpl_src_test"),
+        "commit",
+    ]
+
+    with pytest.raises(ValueError):
+        await data_loader.load_csv(
+            _Session(),
+            _source(("id", "INTEGER")),
+            io.BytesIO(data),
+            mode="replace",
+            resume=data_loader.LoadCheckpoint(3, 1, 0),
+        )
+
+
+@pytest.mark.asyncio
+async def test_insert_writer_queues_inserted_ids_in_the_same_statement():
+    executed = []
+
+    class _Session:
+        async def execute(self, stmt, params):
+            executed.append((str(stmt), params))
+
+    source_id = uuid.uuid4()
+    writer = data_loader._InsertBatchWriter(
+        _Session(), "src_test", ["a"], ["INTEGER"], enqueue_source_id=source_id
+    )
+    assert await writer.write([(1,), (2,)]) == (2, 0)
+
+    (sql, params), = executed
+    assert sql.startswith('WITH inserted AS (INSERT INTO "src_test"')
+    assert "RETURNING id) INSERT INTO record_queue" in sql
+    assert "ON CONFLICT (source_id, record_id) DO NOTHING" in sql
+    assert params["c0"] == [1, 2]
+    assert params["queue_source_id"] == source_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+async def test_load_arrow_passes_typed_columns_through(fake_writer, tmp_path, file_format):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table(
+        {
+            "Account ID": pa.array([1, 2, 3, 4, 5]),
+            "Amount": pa.array(["10", "oops", "30", "40", None]),
+            "Opened": pa.array([datetime.date(2024, 1, d) for d in range(1, 6)]),
+        }
+    )
+    path = tmp_path / f"upload.{file_format}"
+    if file_format == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.ipc.new_file(path, table.schema) as out:
+            out.write_table(table)
+
+    source = _source(("account_id", "INTEGER"), ("amount", "FLOAT"), ("opened", "DATE"))
+    checkpoints = []
+
+    async def record(checkpoint, result):
+        checkpoints.append(checkpoint)
+
+    result = await data_loader.load_arrow(
+        _FakeSession(), source, str(path), file_format, on_checkpoint=record
+    )
+
+    rows = [row for b in fake_writer.batches for row in b]
+    assert rows == [
+        (1, 10.0, datetime.datetime(2024, 1, 1)),
+        (3, 30.0, datetime.datetime(2024, 1, 3)),
+        (4, 40.0, datetime.datetime(2024, 1, 4)),
+        (5, None, datetime.datetime(2024, 1, 5)),
+    ]
+    assert (result.rows_loaded, result.rows_failed) == (4, 1)
+    assert fake_writer.rejects[0][:4] == (None, 2, "Amount", "Cannot convert to FLOAT")
+    assert checkpoints[-1].byte_offset == path.stat().st_size
+    assert checkpoints[-1].rows_done == 5
+
+    fake_writer.batches.clear()
+    resumed = await data_loader.load_arrow(
+        _FakeSession(), source, str(path), file_format, resume=data_loader.LoadCheckpoint(0, 3, 1)
+    )
+    assert [row for b in fake_writer.batches for row in b] == rows[2:]
+    assert resumed.rows_loaded == 2
+
+
+def test_row_aligned_chunks_respect_quoted_newlines():
+    data = b'id,note\n1,"a\nb"\n2,"say ""hi""\n"\n3,c\n'
+    for chunk_size in (1, 5, 9, 64):
+        chunks = list(data_loader._iter_row_aligned_chunks(io.BytesIO(data), chunk_size))
+        assert b"".join(chunks) == data
+        for chunk in chunks:
+            assert chunk.count(b'"') % 2 == 0
+            assert chunk.endswith(b"\n")
+
+
+def test_parallel_conversion_matches_serial_order_and_row_numbers():
+    lines = ["id,amount"] + [f"{i},{'bad' if i % 7 == 0 else i * 1.5}" for i in range(1, 60)]
+    data = ("\n".join(lines) + "\n").encode()
+    plan = data_loader._LoadPlan(
+        csv_indexes=[0, 1],
+        csv_keys=["id", "amount"],
+        physical_names=["id", "amount"],
+        converters=[data_loader._to_integer, data_loader._to_float],
+        data_types={"id": "INTEGER", "amount": "FLOAT"},
+    )
+
+    serial = data_loader.LoadResult()
+    reader = csv.reader(_iter_text_lines(io.BytesIO(data), 1024))
+    next(reader)
+    expected = [row for batch in data_loader._convert_rows(reader, plan, serial, 10) for row in batch]
+    expected_rejects = data_loader._drain_rejects(serial, plan)
+
+    parallel = data_loader.LoadResult()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        items = list(
+            data_loader._convert_chunks_parallel(
+                data_loader._iter_row_aligned_chunks(io.BytesIO(data), 40),
+                plan,
+                parallel,
+                10,
+                pool,
+                max_in_flight=4,
+            )
+        )
+    batches = [batch for batch, _, _ in items if batch is not None]
+    rejects = [reject for _, chunk_rejects, _ in items for reject in chunk_rejects]
+    last = items[-1][2]
+
+    assert [row for batch in batches for row in batch] == expected
+    assert rejects == expected_rejects
+    assert [row_num for row_num, *_ in rejects] == list(range(7, 60, 7))
+    assert (last.byte_offset, last.rows_done, last.rows_failed) == (len(data), 59, 8)
+    assert all(len(batch) <= 10 for batch in batches)
+    assert parallel.rows_failed == serial.rows_failed == 8
+    assert parallel.errors == serial.errors
+
+
+def test_columnar_conversion_matches_row_conversion():
+    rows = [
+        ["1", " 2.5 ", "yes", "2024-01-15", " text "],
+        ["1,000", "", "N", "Jan 15 2024", ""],
+        ["x", "1.5", "maybe", "2024-02-01T10:30", "a"],
+        ["3", "bad", "t", "", "b"],
+        [" ", "3", "", "not a date"],
+        ["4"],
+    ]
+    types = ["INTEGER", "FLOAT", "BOOLEAN", "DATE", "STRING"]
+    plan = data_loader._LoadPlan(
+        csv_indexes=list(range(5)),
+        csv_keys=[f"col{i}" for i in range(5)],
+        physical_names=[f"col{i}" for i in range(5)],
+        converters=[data_loader._CONVERTERS[t] for t in types],
+        data_types={f"col{i}": t for i, t in enumerate(types)},
+    )
+
+    row_result, col_result = data_loader.LoadResult(), data_loader.LoadResult()
+    by_row = list(data_loader._convert_rows(iter(rows), plan, row_result, 4))
+    by_col = list(data_loader._convert_rows_columnar(iter(rows), plan, col_result, 4))
+
+    assert [row for b in by_col for row in b] == [row for b in by_row for row in b]
+    assert col_result.errors == row_result.errors
+    assert col_result.rows_failed == row_result.rows_failed == 3
+
+
+@pytest.mark.parametrize("conversion", ["row", "columnar"])
+def test_required_key_column_rejects_empty_values(conversion):
+    rows = [["A1", "x"], ["", "y"], ["A3"], [" ", "z"]]
+    plan = data_loader._LoadPlan(
+        csv_indexes=[0, 1],
+        csv_keys=["key", "note"],
+        physical_names=["key", "note"],
+        converters=[data_loader._to_text, data_loader._to_text],
+        data_types={"key": "STRING", "note": "STRING"},
+        conversion=conversion,
+        required=frozenset([0]),
+    )
+    result = data_loader.LoadResult()
+    batches = list(data_loader._convert_batches(iter(rows), plan, result, 10))
+
+    assert [row for b in batches for row in b] == [("A1", "x"), ("A3", None)]
+    assert result.rows_failed == 2
+    assert result.errors[0].startswith("Row 2, column 'key': Missing value")
+
+
+@pytest.mark.asyncio
+async def test_retried_rejects_get_their_range_partitions_first(monkeypatch):
+    calls = []
+
+    class _Session:
+        async def execute(self, statement, params=None):
+            calls.append("execute")
+            return SimpleNamespace(scalar=lambda: 7, all=lambda: [])
+
+        async def commit(self):
+            calls.append("commit")
+
+    async def rejects_table(db, table_name):
+        return f"{table_name}_rejects"
+
+    async def plain_writer(*args):
+        return None
+
+    async def ensure_partitions(db, source):
+        calls.append("ensure_partitions")
+        return ["src_t_p202503"]
+
+    monkeypatch.setattr(data_loader, "ensure_rejects_table", rejects_table)
+    monkeypatch.setattr(data_loader, "_get_plain_writer", plain_writer)
+    monkeypatch.setattr(data_loader, "ensure_range_partitions", ensure_partitions)
+
+    await data_loader.retry_rejects(_Session(), SimpleNamespace(table_name="src_t"))
+    assert calls[:3] == ["execute", "ensure_partitions", "commit"]
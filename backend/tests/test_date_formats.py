@@ -0,0 +1,63 @@
+"""Tests for per-column date format detection and fast-path parsing."""
+
+import pickle
+from datetime import datetime
+
+from app.services.date_formats import (
+    _CANDIDATE_FORMATS,
+    _SHAPES,
+    ISO_8601,
+    DateParser,
+    detect_date_format,
+)
+from app.services.inference import infer_schema
+
+
+def test_detects_iso_dates_and_datetimes():
+    assert detect_date_format(["2024-01-15", "2024-02-20"]) == ISO_8601
+    assert detect_date_format(["2024-01-15 10:30:00", "2024-01-16T08:00:00"]) == ISO_8601
+
+
+def test_prefers_month_first_on_ambiguous_sample_but_uses_day_first_when_needed():
+    assert detect_date_format(["01/02/2024", "03/04/2024"]) == "%m/%d/%Y"
+    assert detect_date_format(["01/02/2024", "25/12/2024"]) == "%d/%m/%Y"
+
+
+def test_returns_none_without_a_dominant_format():
+    assert detect_date_format(["hello", "world", "2024-01-15"]) is None
+    assert detect_date_format([]) is None
+
+
+def test_parser_falls_back_to_dateutil_for_stragglers():
+    parse = DateParser("%m/%d/%Y")
+    assert parse("12/31/2024") == datetime(2024, 12, 31)
+    assert parse("March 5, 2024") == datetime(2024, 3, 5)
+    assert parse("not a date") is None
+
+
+def test_shapes_never_reject_a_value_the_format_parses():
+    moment = datetime(2024, 3, 5, 9, 7, 2)
+    for fmt in _CANDIDATE_FORMATS:
+        if fmt == ISO_8601:
+            values = [moment.isoformat(), "2024-03-05", "20240305", "2024-03-05 09:07+01:00"]
+        else:
+            # strptime also takes unpadded and space-padded numbers
+            padded = moment.strftime(fmt)
+            values = [padded, padded.replace("03", "3").replace("05", " 5")]
+        for value in values:
+            if DateParser(fmt).parse_column([value]) != [None]:
+                assert _SHAPES[fmt].match(value), (fmt, value)
+        assert _SHAPES[fmt].match("SKU-00042") is None
+
+
+def test_parser_survives_pickling_for_worker_processes():
+    parse = pickle.loads(pickle.dumps(DateParser(ISO_8601)))
+    assert parse("2024-01-15T10:00") == datetime(2024, 1, 15, 10, 0)
+
+
+def test_inference_records_date_format():
+    csv = b"created,name\n15/01/2024,a\n20/02/2024,b\n"
+    columns, _ = infer_schema(csv)
+    assert columns[0].inferred_type == "DATE"
+    assert columns[0].date_format == "%d/%m/%Y"
+    assert columns[1].date_format is None
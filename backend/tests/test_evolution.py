@@ -0,0 +1,173 @@
+"""Tests for diffing a project's new column list against its registry."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from sqlalchemy import create_mock_engine
+
+from app.core.database import Base
+from app.schemas.schema_inference import EvolvedColumn
+from app.services.date_formats import pg_pattern
+from app.services.evolution import _add_shadow, _rename_indexes, convert_sql, plan_evolution
+
+
+def _source(partition_column: str | None = None) -> SimpleNamespace:
+    columns = [
+        SimpleNamespace(
+            physical_name=name, display_name=display, data_type=data_type,
+            is_unique_id=name == "account", date_format=None,
+        )
+        for name, display, data_type in [
+            ("account", "Account", "STRING"),
+            ("balance", "Balance", "STRING"),
+            ("notes", "Notes", "STRING"),
+        ]
+    ]
+    indexes = [
+        SimpleNamespace(index_name="src_t_account_key", physical_name="account", is_unique=True)
+    ]
+    return SimpleNamespace(
+        table_name="src_t", columns=columns, indexes=indexes, partition_column=partition_column
+    )
+
+
+def _col(name: str, data_type: str = "STRING", **kwargs) -> EvolvedColumn:
+    kwargs.setdefault("display_name", name.title())
+    return EvolvedColumn(original_name=name, data_type=data_type, **kwargs)
+
+
+def test_plan_separates_online_changes_from_type_changes():
+    plan = plan_evolution(
+        _source(),
+        [
+            _col("account", is_unique_id=True, display_name="Account No."),
+            _col("balance", "FLOAT"),
+            _col("comments", renamed_from="notes", display_name="Notes", is_indexed=True),
+            _col("region"),
+        ],
+    )
+    assert [name for name, _ in plan.added] == ["region"]
+    assert plan.renamed == {"notes": "comments"}
+    assert [meta.physical_name for meta, _ in plan.updated] == ["account"]
+    assert [(meta.physical_name, col.data_type) for meta, col in plan.retyped] == [
+        ("balance", "FLOAT")
+    ]
+    assert [index.index_name for index in plan.indexes_added] == ["src_t_comments_idx"]
+    assert plan.indexes_dropped == []
+    assert plan.physical_names == ["account", "balance", "comments", "region"]
+
+
+def test_clearing_the_unique_id_drops_its_index():
+    plan = plan_evolution(_source(), [_col("account"), _col("balance"), _col("notes")])
+    assert [index.index_name for index in plan.indexes_dropped] == ["src_t_account_key"]
+    assert plan.indexes_added == []
+
+
+@pytest.mark.parametrize(
+    "columns, error",
+    [
+        ([_col("account", is_unique_id=True), _col("balance")], "missing .*notes"),
+        ([_col("account", is_unique_id=True), _col("balance"), _col("x", renamed_from="nope"),
+          _col("notes")], "no such column"),
+        ([_col("account", is_unique_id=True), _col("balance", "MONEY"), _col("notes")],
+         "Unsupported data type"),
+        ([_col("account", is_unique_id=True), _col("balance"), _col("notes"), _col("Notes")],
+         "more than once"),
+    ],
+)
+def test_invalid_evolutions_are_rejected(columns, error):
+    with pytest.raises(ValueError, match=error):
+        plan_evolution(_source(), columns)
+
+
+def test_partition_column_cannot_be_retyped():
+    columns = [_col("account", "INTEGER", is_unique_id=True), _col("balance"), _col("notes")]
+    with pytest.raises(ValueError, match="partition column"):
+        plan_evolution(_source(partition_column="account"), columns)
+
+
+def test_conversion_nulls_invalid_values():
+    value = """replace(btrim("balance"::text), ',', '')"""
+    assert convert_sql('"balance"', "FLOAT") == (
+        f"CASE WHEN pg_input_is_valid({value}, 'DOUBLE PRECISION')"
+        f" THEN {value}::DOUBLE PRECISION END"
+    )
+    assert convert_sql('"balance"', "STRING") == '"balance"::text'
+
+
+def test_conversion_reads_values_like_the_loader():
+    # "1,000" is an integer to the loader, and must not become NULL here.
+    assert "replace(btrim(\"qty\"::text), ',', '')::BIGINT" in convert_sql('"qty"', "INTEGER")
+    dated = convert_sql('"opened"', "DATE", "%d/%m/%Y")
+    assert dated.startswith(
+        """coalesce(qlogic_try_timestamp(btrim("opened"::text), 'DD/MM/YYYY'), """
+    )
+    assert "'yes'" in convert_sql('"active"', "BOOLEAN")
+
+
+def test_pg_pattern_follows_the_strptime_format():
+    assert pg_pattern("%d/%m/%Y") == "DD/MM/YYYY"
+    assert pg_pattern("%Y-%m-%dT%H:%M:%S") == 'YYYY-MM-DD"T"HH24:MI:SS'
+    with pytest.raises(ValueError, match="cannot be read"):
+        pg_pattern("%j")
+
+
+def test_retype_to_date_checks_the_format():
+    with pytest.raises(ValueError, match="cannot be read"):
+        plan_evolution(
+            _source(),
+            [_col("account"), _col("balance", "DATE", date_format="%j/%Y"), _col("notes")],
+        )
+
+
+class _RecordingSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+
+def _create_all_ddl() -> list[str]:
+    """The DDL ``create_all`` runs, as on a dev database built without Alembic."""
+    statements: list[str] = []
+
+    def record(sql, *args, **kwargs) -> None:
+        statements.append(str(sql.compile(dialect=engine.dialect)))
+
+    engine = create_mock_engine("postgresql://", record)
+    Base.metadata.create_all(engine, checkfirst=False)
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_date_retype_trigger_calls_a_function_create_all_creates():
+    db = _RecordingSession()
+    change = SimpleNamespace(
+        shadow_column="evo_opened", physical_name="opened", to_type="DATE",
+        date_format="%d/%m/%Y",
+    )
+    await _add_shadow(db, "src_t", change)
+    trigger_function = next(s for s in db.statements if "RETURNS trigger" in s)
+    assert "qlogic_try_timestamp(" in trigger_function
+
+    schema = _create_all_ddl()
+    assert any(
+        "CREATE OR REPLACE FUNCTION qlogic_try_timestamp(value text, pattern text)" in s
+        for s in schema
+    )
+
+
+@pytest.mark.asyncio
+async def test_renamed_column_keeps_the_index_name_upserts_look_for():
+    db = _RecordingSession()
+    source = _source()
+    source.partition_strategy = None
+    await _rename_indexes(db, source, {"account": "account_no"})
+
+    assert db.statements == [
+        'ALTER INDEX IF EXISTS "src_t_account_key" RENAME TO "src_t_account_no_key"'
+    ]
+    (index,) = source.indexes
+    assert (index.index_name, index.physical_name) == ("src_t_account_no_key", "account_no")
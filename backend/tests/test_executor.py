@@ -0,0 +1,86 @@
+"""Tests for the CPU executor that keeps inference off the event loop."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import executor
+from app.services.inference import infer_schema_full
+
+
+def _large_csv() -> bytes:
+    header = ",".join(f"col_{c}" for c in range(40))
+    rows = [
+        ",".join(f"2024-01-{i % 28 + 1:02d}" if c % 2 else str(i * c) for c in range(40))
+        for i in range(40_000)
+    ]
+    return "\n".join([header, *rows]).encode()
+
+
+async def _max_loop_lag(done: asyncio.Future, tick: float = 0.01) -> float:
+    """Largest overshoot of a short sleep until *done* completes."""
+    worst = 0.0
+    while not done.done():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        worst = max(worst, time.perf_counter() - start - tick)
+    return worst
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_large_inference():
+    content = _large_csv()
+    started = time.perf_counter()
+    inference = asyncio.ensure_future(executor.run_cpu_bound(infer_schema_full, content))
+    lag = await _max_loop_lag(inference)
+    elapsed = time.perf_counter() - started
+
+    columns, row_count = await inference
+    assert row_count == 40_000
+    assert [c.inferred_type for c in columns[1:3]] == ["DATE", "INTEGER"]
+    # Inline, the loop would stall for the whole inference.
+    assert elapsed > 0.2
+    assert lag < min(0.1, elapsed / 4)
+
+
+@pytest.mark.asyncio
+async def test_stats_report_busy_and_queued_tasks(monkeypatch):
+    monkeypatch.setattr(executor.settings, "CPU_EXECUTOR_WORKERS", 1)
+    monkeypatch.setattr(executor, "_executor", None)
+    release = threading.Event()
+    try:
+        first = asyncio.ensure_future(executor.run_cpu_bound(release.wait))
+        second = asyncio.ensure_future(executor.run_cpu_bound(release.wait))
+        while executor.executor_stats()["busy"] == 0:
+            await asyncio.sleep(0.01)
+
+        stats = executor.executor_stats()
+        assert (stats["busy"], stats["queued"], stats["saturation"]) == (1, 1, 1.0)
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert executor.executor_stats()["busy"] == 0
+        assert executor.executor_stats()["queued"] == 0
+    finally:
+        release.set()
+        executor.shutdown_cpu_executor()
+
+
+@pytest.mark.asyncio
+async def test_loads_leave_the_cpu_executor_free(monkeypatch):
+    monkeypatch.setattr(executor.settings, "CPU_EXECUTOR_WORKERS", 1)
+    monkeypatch.setattr(executor, "_executor", None)
+    monkeypatch.setattr(executor, "_load_executor", None)
+    release = threading.Event()
+    try:
+        load = asyncio.ensure_future(executor.run_load_producer(release.wait))
+        name = await executor.run_cpu_bound(lambda: threading.current_thread().name)
+        assert name.startswith("cpu")
+        assert executor.executor_stats()["busy"] == 0
+        release.set()
+        await load
+    finally:
+        release.set()
+        executor.shutdown_cpu_executor()
@@ -0,0 +1,40 @@
+"""Tests for planning the unique-ID and lookup indexes of project tables."""
+
+from app.schemas.schema_inference import FinalizedColumn
+from app.services.indexing import _create_index_sql
+from app.services.provisioning import _index_name, plan_indexes
+
+
+def _column(name: str, **flags) -> FinalizedColumn:
+    return FinalizedColumn(original_name=name, display_name=name, data_type="STRING", **flags)
+
+
+def test_unique_id_and_lookup_columns_get_indexes():
+    columns = [
+        _column("Account ID", is_unique_id=True),
+        _column("Email", is_indexed=True),
+        _column("Notes"),
+    ]
+    indexes = plan_indexes("src_accounts", columns, ["account_id", "email", "notes"])
+
+    assert [(i.index_name, i.physical_name, i.is_unique) for i in indexes] == [
+        ("src_accounts_account_id_key", "account_id", True),
+        ("src_accounts_email_idx", "email", False),
+    ]
+    # Upserts create their conflict index under the same name, so one index serves both.
+    assert indexes[0].index_name == _index_name("src_accounts", "account_id", "key")
+    assert _create_index_sql("src_accounts", indexes[0]) == (
+        'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "src_accounts_account_id_key"'
+        ' ON "src_accounts" ("account_id")'
+    )
+    # Lookup indexes end in id, for record pages ordered by the column.
+    assert _create_index_sql("src_accounts", indexes[1]).endswith(
+        'ON "src_accounts" ("email", "id")'
+    )
+
+
+def test_index_names_fit_the_identifier_limit():
+    table = "src_" + "x" * 59
+    (index,) = plan_indexes(table, [_column("Email", is_indexed=True)], ["email"])
+    assert len(index.index_name) == 63
+    assert index.index_name.endswith("_email_idx")
@@ -1,8 +1,21 @@
 """Tests for the schema inference engine."""
 
+import gzip
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
+import zstandard
 
-from app.services.inference import infer_schema
+from app.services.file_formats import detect_format, open_csv_stream
+from app.services.inference import (
+    _infer_type,
+    _Reservoir,
+    infer_arrow_schema,
+    infer_schema,
+    infer_schema_full,
+)
 
 
 def _make_csv(headers: list[str], rows: list[list[str]]) -> bytes:
@@ -42,6 +55,15 @@ def test_infer_date_column():
     assert columns[0].inferred_type == "DATE"
 
 
+def test_classifier_keeps_exotic_numbers_and_rules_out_text():
+    assert _infer_type(["1_000", "2,500", "+7", "\u0661\u0662"]) == "INTEGER"
+    assert _infer_type(["1e3", "inf", "-.5", "3."]) == "FLOAT"
+    assert _infer_type(["yes", "no", "Y", "0"]) == "BOOLEAN"
+    assert _infer_type(["12", "yes", "maybe"]) == "STRING"
+    assert _infer_type(["Monday", "Sept", "2024-01-05", "n/a", "x"]) == "DATE"
+    assert _infer_type(["Monday", "Sept", "n/a", "x", "y"]) == "STRING"
+
+
 def test_primary_key_candidate():
     csv = _make_csv(
         ["account_id", "name"],
@@ -72,3 +94,105 @@ def test_respects_max_rows():
     csv = _make_csv(["id", "name"], rows)
     columns, count = infer_schema(csv, max_rows=50)
     assert count == 50
+
+
+@pytest.mark.parametrize(
+    "fmt, compress",
+    [("csv.gz", gzip.compress), ("csv.zst", zstandard.ZstdCompressor().compress)],
+)
+def test_infer_from_compressed_stream(fmt, compress):
+    csv = _make_csv(["id", "price"], [[str(i), f"{i}.5"] for i in range(1, 201)])
+    upload = io.BytesIO(compress(csv))
+    columns, count = infer_schema(open_csv_stream(upload, fmt), max_rows=50)
+    assert count == 50
+    assert [c.inferred_type for c in columns] == ["INTEGER", "FLOAT"]
+    assert not upload.closed
+
+
+def test_infer_arrow_schema_uses_column_types():
+    table = pa.table(
+        {
+            "account_id": pa.array([1, 2, 3]),
+            "score": pa.array([1.5, None, 2.0]),
+            "active": pa.array([True, False, None]),
+            "opened": pa.array([None, None, None], pa.timestamp("us")),
+            "note": pa.array(["a", "b", "c"]).dictionary_encode(),
+        }
+    )
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+    buf.seek(0)
+    columns, count = infer_arrow_schema(buf, detect_format("export.PARQUET"), max_rows=2)
+    assert count == 2
+    assert [c.inferred_type for c in columns] == ["INTEGER", "FLOAT", "BOOLEAN", "DATE", "STRING"]
+    assert columns[0].is_primary_key_candidate
+
+
+def test_detect_format():
+    assert detect_format("a.csv") == "csv"
+    assert detect_format("a.CSV.GZ") == "csv.gz"
+    assert detect_format("a.csv.zst") == "csv.zst"
+    assert detect_format("a.feather") == "arrow"
+    assert detect_format("a.gz") is None
+    assert detect_format(None) is None
+
+
+def test_full_scan_sees_values_past_the_sample():
+    rows = [[str(i), "2024-01-15", str(i), "yes"] for i in range(1, 3000)]
+    rows.append(["A3000", "15/01/2024", "1.5", "maybe"])
+    csv = _make_csv(["id", "opened", "amount", "flag"], rows)
+
+    sampled, _ = infer_schema(csv)
+    assert [c.inferred_type for c in sampled] == ["INTEGER", "DATE", "INTEGER", "BOOLEAN"]
+
+    columns, count = infer_schema_full(csv)
+    assert count == 3000
+    assert [c.inferred_type for c in columns] == ["STRING", "DATE", "FLOAT", "STRING"]
+    # ISO parsed every value up to the mismatch; dateutil covers the rest.
+    assert columns[1].date_format == "ISO8601"
+
+
+def test_full_scan_rules_out_unparseable_dates_and_late_empty_keys():
+    rows = [[f"K{i}", "2024-01-15"] for i in range(2000)] + [["", "not a date"]]
+    columns, _ = infer_schema_full(_make_csv(["key", "when"], rows))
+    assert columns[1].inferred_type == "STRING"
+    assert not columns[0].is_primary_key_candidate
+
+
+def test_full_scan_matches_sampling_on_small_files():
+    csv = _make_csv(
+        ["id", "price", "active", "joined", "name"],
+        [["1", "9.99", "true", "2024-01-15", "Alice"], ["2", "1,250", "false", "", "Bob"]],
+    )
+    sampled, _ = infer_schema(csv)
+    full, _ = infer_schema_full(csv)
+    assert full == sampled
+
+
+def test_profiles_cover_the_sample_or_the_whole_file():
+    rows = [[str(i), f"2024-01-{i % 28 + 1:02d}", "" if i % 4 else "x"] for i in range(1, 2001)]
+    content = _make_csv(["id", "when", "note"], rows)
+
+    sampled, _ = infer_schema(content, max_rows=100)
+    assert (sampled[0].profile.min_value, sampled[0].profile.max_value) == ("1", "100")
+    assert sampled[0].profile.distinct_count == 100
+
+    full, _ = infer_schema_full(content)
+    ident, when, note = (c.profile for c in full)
+    assert (ident.min_value, ident.max_value) == ("1", "2000")
+    assert (when.min_value, when.max_value) == ("2024-01-01T00:00:00", "2024-01-28T00:00:00")
+    assert when.distinct_count == 28
+    assert note.null_rate == 0.75
+    assert note.top_values[0].value == "x" and note.top_values[0].count == 500
+
+
+def test_reservoir_keeps_a_bounded_uniform_sample():
+    counts = [0] * 40
+    for seed in range(2000):
+        reservoir = _Reservoir(4, seed=seed)
+        for start in range(0, 40, 9):
+            reservoir.extend(list(range(start, min(start + 9, 40))))
+        assert len(set(reservoir.items)) == 4
+        for item in reservoir.items:
+            counts[item] += 1
+    assert min(counts) > 120 and max(counts) < 280  # expected 200 each
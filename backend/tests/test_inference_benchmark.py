@@ -0,0 +1,98 @@
+"""Benchmark: single-pass vs multi-pass type classification on wide files.
+
+Run with ``pytest -s tests/test_inference_benchmark.py`` to see the timing
+report.  The assertions only check that both classifiers agree, so the test
+is stable on slow CI runners.
+"""
+
+import time
+
+from dateutil import parser as dateutil_parser
+
+from app.services import date_formats, inference
+from app.services.date_formats import DateParser, detect_date_format
+
+_ROWS = 100
+_COLUMNS = 600
+
+
+def _multi_pass_infer_type(values: list[str]) -> str:
+    """The classifier as it was: one exception-driven pass per candidate type.
+
+    Run it with ``date_formats._SHAPES`` emptied to reproduce the date
+    detection it used, which tried strptime on every value.
+    """
+
+    def is_boolean(v):
+        return v.strip().lower() in inference._BOOL_TRUE | inference._BOOL_FALSE
+
+    def is_number(v, cast):
+        try:
+            cast(v.strip().replace(",", ""))
+            return True
+        except ValueError:
+            return False
+
+    def is_date(v):
+        try:
+            dateutil_parser.parse(v.strip(), fuzzy=False)
+            return True
+        except (ValueError, OverflowError):
+            return False
+
+    if not values:
+        return inference.TYPE_STRING
+    if all(is_boolean(v) for v in values):
+        return inference.TYPE_BOOLEAN
+    if all(is_number(v, int) for v in values):
+        return inference.TYPE_INTEGER
+    if all(is_number(v, float) for v in values):
+        return inference.TYPE_FLOAT
+    date_format = detect_date_format(values)
+    if date_format is not None:
+        parse = DateParser(date_format)
+        date_count = sum(1 for v in values if parse(v) is not None)
+    else:
+        date_count = sum(1 for v in values if is_date(v))
+    if date_count / len(values) >= 0.6:
+        return inference.TYPE_DATE
+    return inference.TYPE_STRING
+
+
+_GENERATORS = [
+    lambda i: str(i * 7),
+    lambda i: f"{i * 1.5:.2f}",
+    lambda i: "yes" if i % 2 else "no",
+    lambda i: f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+    lambda i: f"{i % 12 + 1}/{i % 28 + 1}/2023",
+    lambda i: ["Alice Smith", "Bob Jones", "Carol White", "Dan Brown"][i % 4],
+    lambda i: f"SKU-{i:05d}",
+    lambda i: f"{i:,}" if i % 3 else "1e3",
+    lambda i: str(i) if i < _ROWS - 1 else "n/a",
+]
+
+
+def _wide_columns() -> list[list[str]]:
+    return [
+        [_GENERATORS[c % len(_GENERATORS)](i) for i in range(_ROWS)] for c in range(_COLUMNS)
+    ]
+
+
+def _classify(infer_type, columns: list[list[str]]) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    types = [infer_type(values) for values in columns]
+    return time.perf_counter() - start, types
+
+
+def test_single_pass_vs_multi_pass_classifier_on_wide_file(monkeypatch):
+    columns = _wide_columns()
+    with monkeypatch.context() as patched:
+        patched.setattr(date_formats, "_SHAPES", {})
+        old_time, old_types = _classify(_multi_pass_infer_type, columns)
+    new_time, new_types = _classify(inference._infer_type, columns)
+
+    print(
+        f"\n{_COLUMNS} columns x {_ROWS} rows | multi-pass: {old_time * 1000:,.0f} ms "
+        f"| single-pass: {new_time * 1000:,.0f} ms | speedup x{old_time / new_time:.2f}"
+    )
+    assert new_types == old_types
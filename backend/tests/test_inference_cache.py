@@ -0,0 +1,156 @@
+"""Tests for reusing inference results and finalized schemas on re-uploads."""
+
+import gzip
+import io
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import inference_cache
+from app.services.file_formats import read_csv_head, read_csv_head_from_chunks
+from app.services.inference_cache import InferenceCache, infer_upload
+from app.services.provisioning import layout_signature
+
+
+class _CountingStream(io.BytesIO):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class _Chunks:
+    """An upload body arriving in *size*-byte chunks, counting those pulled."""
+
+    def __init__(self, data: bytes, size: int) -> None:
+        self.data = data
+        self.size = size
+        self.pulled = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        start = self.pulled * self.size
+        if start >= len(self.data):
+            raise StopAsyncIteration
+        self.pulled += 1
+        return self.data[start : start + self.size]
+
+
+def _csv(rows: int) -> bytes:
+    return b"id,name\n" + b"".join(f"{i},name {i}\n".encode() for i in range(rows))
+
+
+def test_read_csv_head_stops_after_the_sample():
+    stream = _CountingStream(_csv(10_000))
+    head, rows = read_csv_head(stream, max_rows=100, chunk_size=256)
+    assert rows == 100
+    assert head == _csv(100)
+    assert stream.bytes_read < 100 * 20 + 256
+
+
+def test_read_csv_head_ignores_quoted_newlines_and_blank_lines():
+    data = b'id,note\r\n1,"two\nlines"\r\n\r\n2,x\n3,"a ""quoted"" word"'
+    head, rows = read_csv_head(io.BytesIO(data), max_rows=2, chunk_size=3)
+    assert (head, rows) == (b'id,note\r\n1,"two\nlines"\r\n\r\n2,x\n', 2)
+    assert read_csv_head(io.BytesIO(data), max_rows=10, chunk_size=5) == (data, 3)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "csv.zst"])
+async def test_streamed_head_stops_pulling_chunks_after_the_sample(fmt):
+    data = _csv(200_000)
+    if fmt == "csv.gz":
+        data = gzip.compress(data)
+    elif fmt == "csv.zst":
+        import zstandard
+
+        data = zstandard.ZstdCompressor().compress(data)
+    chunks = _Chunks(data, 512)
+
+    head, rows = await read_csv_head_from_chunks(chunks, fmt, max_rows=100)
+    assert (head, rows) == (_csv(100), 100)
+    assert chunks.pulled < len(data) // 512 / 4
+
+
+def test_lru_evicts_least_recently_used_and_counts():
+    cache = InferenceCache(max_entries=2)
+    cache.put("a", ([], 1))
+    cache.put("b", ([], 2))
+    assert cache.get("a") == ([], 1)  # "b" is now the oldest
+    cache.put("c", ([], 3))
+    assert cache.get("b") is None
+    assert cache.stats() | {"hit_rate": None} == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": None,
+        "evictions": 1,
+        "template_matches": 0,
+    }
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = InferenceCache(max_entries=8)
+    monkeypatch.setattr(inference_cache, "inference_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_identical_samples_are_inferred_once(fresh_cache, monkeypatch):
+    async def no_template(db, headers):
+        return None
+
+    monkeypatch.setattr(inference_cache, "find_template", no_template)
+    first = await infer_upload(None, io.BytesIO(_csv(500)), "csv", full_scan=False, sample_rows=50)
+    # Same header and first 50 rows, different tail: same sample, same result.
+    second = await infer_upload(
+        None, io.BytesIO(_csv(50) + b"x,y\n"), "csv", full_scan=False, sample_rows=50
+    )
+    assert (first.cached, second.cached) == (False, True)
+    assert second.columns == first.columns
+    assert (fresh_cache.hits, fresh_cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_matching_headers_return_the_projects_finalized_schema(fresh_cache, monkeypatch):
+    project = SimpleNamespace(
+        id=uuid.uuid4(),
+        project_name="Daily Export",
+        layout_signature=layout_signature(["id", "name"]),
+        columns=[
+            SimpleNamespace(
+                physical_name=name, display_name=display, data_type=data_type,
+                is_unique_id=name == "id", date_format=None, profile=None,
+            )
+            for name, display, data_type in [
+                ("id", "Customer ID", "STRING"), ("name", "Full Name", "STRING"),
+            ]
+        ],
+    )
+
+    async def find(db, headers):
+        signature = layout_signature(inference_cache._sanitize_identifier(h) for h in headers)
+        return project if signature == project.layout_signature else None
+
+    monkeypatch.setattr(inference_cache, "find_template", find)
+    upload = io.BytesIO(b"Name,ID\nAda,7\n")
+    outcome = await infer_upload(None, upload, "csv", full_scan=False, sample_rows=50)
+
+    assert outcome.template is project
+    columns = [(c.original_name, c.suggested_display_name, c.inferred_type) for c in outcome.columns]
+    assert columns == [
+        ("Name", "Full Name", "STRING"),
+        ("ID", "Customer ID", "STRING"),
+    ]
+    assert outcome.columns[1].is_primary_key_candidate
+    assert outcome.row_count == 1
+    assert fresh_cache.template_matches == 1
@@ -0,0 +1,82 @@
+"""Tests for which load jobs a process may claim and run."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import load_jobs
+
+
+def _sql(clause) -> str:
+    return str(
+        clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def test_jobs_spooled_locally_are_claimed_by_their_host_only(monkeypatch):
+    monkeypatch.setattr(load_jobs.settings, "LOAD_JOB_SPOOL_SHARED", False)
+    monkeypatch.setattr(load_jobs, "_HOST", "api-2")
+    sql = _sql(load_jobs._claimable())
+    # A job stamped with another host is claimable once its heartbeat is stale.
+    assert (
+        "(load_jobs.spool_host = 'api-2' OR load_jobs.spool_host IS NULL"
+        " OR load_jobs.heartbeat_at < now() - "
+    ) in sql
+
+    monkeypatch.setattr(load_jobs.settings, "LOAD_JOB_SPOOL_SHARED", True)
+    assert "spool_host" not in _sql(load_jobs._claimable())
+
+
+def test_missing_spool_fails_with_a_clear_error(tmp_path):
+    job = SimpleNamespace(spool_path=str(tmp_path / "gone.csv"), spool_host="api-1")
+    with pytest.raises(ValueError, match="missing from .*gone.csv.*spooled on api-1"):
+        load_jobs._open_spool(job)
+
+
+class _FakeSession:
+    def __init__(self, job) -> None:
+        self.job = job
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def get(self, model, job_id):
+        return self.job
+
+    async def rollback(self) -> None:
+        return None
+
+    async def commit(self) -> None:
+        self.committed = True
+
+
+@pytest.mark.asyncio
+async def test_job_of_a_gone_host_fails_on_its_missing_spool(monkeypatch, tmp_path):
+    monkeypatch.setattr(load_jobs, "_HOST", "api-2")
+    job = SimpleNamespace(
+        source_id="src", spool_path=str(tmp_path / "job.csv"), spool_host="api-1",
+        mode="append", byte_offset=0, filename="job.csv", enqueue=False,
+        status=None, error_message=None, finished_at=None,
+    )
+    session = _FakeSession(job)
+
+    class _Engine:
+        def connect(self):
+            return _FakeSession(None)
+
+    async def project_info(db, source_id):
+        return SimpleNamespace(id=source_id)
+
+    monkeypatch.setattr(load_jobs, "engine", _Engine())
+    monkeypatch.setattr(load_jobs, "AsyncSession", lambda **kwargs: session)
+    monkeypatch.setattr(load_jobs, "get_project_info", project_info)
+
+    assert await load_jobs._run_claimed("job-id") is None
+    assert job.status == load_jobs.LoadJobStatus.FAILED
+    assert "on api-2 (spooled on api-1)" in job.error_message
+    assert session.committed
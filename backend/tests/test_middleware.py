@@ -0,0 +1,61 @@
+"""Tests for the upload size guard on streamed request bodies."""
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.middleware import UploadSizeLimitMiddleware
+
+_LIMIT = 1024 * 1024
+
+
+def _app(received: list[int]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": _LIMIT})
+
+    @app.post("/upload")
+    @app.post("/other")
+    async def upload(request: Request):
+        async for chunk in request.stream():
+            received.append(len(chunk))
+        return {"bytes": sum(received)}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _chunks(count: int, size: int = 64 * 1024):
+    for _ in range(count):
+        yield b"x" * size
+
+
+@pytest.mark.asyncio
+async def test_declared_oversized_body_is_refused_before_reading():
+    received: list[int] = []
+    async with _client(_app(received)) as client:
+        response = await client.post("/upload", content=b"x" * (_LIMIT + 1))
+    assert response.status_code == 413
+    assert received == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_body_is_cut_off_once_over_the_limit():
+    received: list[int] = []
+    async with _client(_app(received)) as client:
+        response = await client.post("/upload", content=_chunks(64))  # 4 MiB, no length
+    assert response.status_code == 413
+    assert response.json() == {"detail": "File exceeds maximum size of 1 MB."}
+    assert sum(received) <= _LIMIT
+
+
+@pytest.mark.asyncio
+async def test_bodies_within_the_limit_or_on_other_paths_pass_through():
+    received: list[int] = []
+    async with _client(_app(received)) as client:
+        assert (await client.post("/upload", content=_chunks(4))).status_code == 200
+        received.clear()
+        response = await client.post("/other", content=_chunks(32))
+    assert response.json() == {"bytes": 32 * 64 * 1024}
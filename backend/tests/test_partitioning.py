@@ -0,0 +1,171 @@
+"""Tests for provisioning range- and hash-partitioned project tables."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.schema_inference import ColumnProfile, FinalizedColumn, PartitionSpec
+from app.services import partitioning
+from app.services.partitioning import (
+    add_range_partition,
+    check_load_mode,
+    create_partitions,
+    ensure_range_partitions,
+    initial_range_starts,
+    range_starts_for,
+    validate_partitioning,
+)
+from app.services.provisioning import plan_indexes
+
+
+class _RecordingSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+
+class _CatalogSession(_RecordingSession):
+    """Answers the partition listing, and which periods DEFAULT holds rows of."""
+
+    def __init__(self, partitions: list[str], stranded: tuple[str, ...] = ()) -> None:
+        super().__init__()
+        self.partitions = partitions
+        self.stranded = stranded
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "FROM pg_inherits" in sql:
+            rows = [{"name": name} for name in self.partitions]
+            return SimpleNamespace(mappings=lambda: rows)
+        if sql.startswith("SELECT EXISTS"):
+            return SimpleNamespace(scalar=lambda: any(day in sql for day in self.stranded))
+        return None
+
+
+def _columns() -> list[FinalizedColumn]:
+    return [
+        FinalizedColumn(
+            original_name="Account", display_name="Account", data_type="STRING",
+            is_unique_id=True,
+        ),
+        FinalizedColumn(
+            original_name="Opened", display_name="Opened", data_type="DATE",
+            profile=ColumnProfile(
+                null_rate=0, distinct_count=3, min_value="2023-11-20T00:00:00",
+                max_value="2024-02-03T00:00:00", max_length=10, top_values=[],
+            ),
+        ),
+    ]
+
+
+def test_range_starts_cover_the_profiled_dates():
+    spec = PartitionSpec(strategy="range", column="Opened")
+    assert range_starts_for(spec, _columns()) == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1),
+    ]
+    assert initial_range_starts(date(2019, 6, 1), date(2021, 1, 1), "year") == [
+        date(2019, 1, 1), date(2020, 1, 1), date(2021, 1, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "spec, error",
+    [
+        (PartitionSpec(strategy="range", column="Account"), "DATE column"),
+        (PartitionSpec(strategy="hash", column="Opened"), "unique ID"),
+        (PartitionSpec(strategy="hash", column="Account", partitions=1), "between 2 and 64"),
+        (PartitionSpec(strategy="list", column="Account"), "Unsupported"),
+        (PartitionSpec(strategy="range", column="Missing"), "not one of the columns"),
+    ],
+)
+def test_unsuitable_partitioning_is_rejected(spec, error):
+    with pytest.raises(ValueError, match=error):
+        validate_partitioning(spec, _columns(), ["account", "opened"])
+
+
+@pytest.mark.asyncio
+async def test_range_partitions_get_a_default_and_an_id_index():
+    db = _RecordingSession()
+    await create_partitions(
+        db, "src_accounts", "range", interval="month", range_starts=[date(2024, 12, 1)]
+    )
+    assert db.statements == [
+        (
+            'CREATE TABLE "src_accounts_p202412" PARTITION OF "src_accounts"'
+            " FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+        ),
+        'CREATE TABLE "src_accounts_default" PARTITION OF "src_accounts" DEFAULT',
+        'CREATE INDEX "src_accounts_id_idx" ON "src_accounts" ("id")',
+    ]
+
+
+def test_only_the_partition_column_can_be_unique():
+    columns = _columns()
+    ranged = plan_indexes("src_accounts", columns, ["account", "opened"], "opened")
+    hashed = plan_indexes("src_accounts", columns, ["account", "opened"], "account")
+    assert [(i.index_name, i.is_unique) for i in ranged] == [("src_accounts_account_idx", False)]
+    assert [(i.index_name, i.is_unique) for i in hashed] == [("src_accounts_account_key", True)]
+
+
+def test_load_modes_on_partitioned_projects():
+    ranged = SimpleNamespace(partition_strategy="range", partition_column="opened")
+    hashed = SimpleNamespace(partition_strategy="hash", partition_column="account")
+    check_load_mode(ranged, "append", "account")
+    check_load_mode(hashed, "upsert", "account")
+    with pytest.raises(ValueError, match="Replace"):
+        check_load_mode(hashed, "replace", "account")
+    with pytest.raises(ValueError, match="Upsert"):
+        check_load_mode(ranged, "upsert", "account")
+
+
+class _Today(date):
+    @classmethod
+    def today(cls) -> date:
+        return date(2025, 3, 10)
+
+
+@pytest.mark.asyncio
+async def test_a_load_past_the_profiled_range_gets_its_partitions(monkeypatch):
+    # Provisioned from a sample of 2023-11 .. 2024-02; the load is dated 2025.
+    monkeypatch.setattr(partitioning, "date", _Today)
+    monkeypatch.setattr(partitioning.settings, "PARTITION_AHEAD_PERIODS", 2)
+    source = SimpleNamespace(
+        table_name="src_accounts", partition_strategy="range",
+        partition_interval="month", partition_column="opened",
+    )
+    existing = [f"src_accounts_p{m}" for m in ("202311", "202312", "202401", "202402")]
+    db = _CatalogSession([*existing, "src_accounts_default", "src_accounts_p202503"])
+
+    created = await ensure_range_partitions(db, source)
+
+    assert created == ["src_accounts_p202504", "src_accounts_p202505"]
+    assert db.statements[-1] == (
+        'CREATE TABLE "src_accounts_p202505" PARTITION OF "src_accounts"'
+        " FOR VALUES FROM ('2025-05-01') TO ('2025-06-01')"
+    )
+    hashed = SimpleNamespace(partition_strategy="hash")
+    assert await ensure_range_partitions(_CatalogSession([]), hashed) == []
+
+@pytest.mark.asyncio
+async def test_new_partition_takes_its_rows_out_of_default():
+    db = _CatalogSession([], stranded=("2019-06-01",))
+    name = await add_range_partition(db, "src_accounts", "opened", date(2019, 6, 15), "month")
+
+    assert name == "src_accounts_p201906"
+    assert db.statements[2:] == [
+        'ALTER TABLE "src_accounts" DETACH PARTITION "src_accounts_default"',
+        (
+            'CREATE TABLE "src_accounts_p201906" PARTITION OF "src_accounts"'
+            " FOR VALUES FROM ('2019-06-01') TO ('2019-07-01')"
+        ),
+        (
+            'WITH moved AS (DELETE FROM "src_accounts_default"'
+            """ WHERE "opened" >= '2019-06-01' AND "opened" < '2019-07-01' RETURNING *)"""
+            ' INSERT INTO "src_accounts_p201906" SELECT * FROM moved'
+        ),
+        'ALTER TABLE "src_accounts" ATTACH PARTITION "src_accounts_default" DEFAULT',
+    ]
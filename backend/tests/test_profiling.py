@@ -0,0 +1,36 @@
+"""Tests for the column profiles gathered during schema inference."""
+
+from app.services.profiling import ColumnProfiler, HyperLogLog
+
+
+def test_hyperloglog_is_exact_when_small_and_close_when_large():
+    small = HyperLogLog()
+    small.update(str(i % 500) for i in range(10_000))
+    assert small.estimate() == 500
+
+    large = HyperLogLog()
+    for start in range(0, 200_000, 1000):
+        large.update([f"value-{i}" for i in range(start, start + 1000)])
+    assert abs(large.estimate() - 200_000) / 200_000 < 0.05
+
+
+def test_profiler_tracks_nulls_lengths_and_frequent_values():
+    profiler = ColumnProfiler()
+    for _ in range(10):
+        # "red" is frequent; the unique values push out everything rare.
+        profiler.add(["red"] * 50 + [f"unique-{i}" for i in range(200)], rows=300)
+
+    profile = profiler.profile("STRING")
+    assert profile.null_rate == round(500 / 3000, 4)
+    assert profile.max_length == len("unique-199")
+    assert profile.top_values[0].value == "red"
+    assert 0 < profile.top_values[0].count <= 500
+    assert (profile.min_value, profile.max_value) == ("red", "unique-99")
+
+
+def test_profile_range_follows_the_inferred_type():
+    profiler = ColumnProfiler()
+    profiler.add(["9", "10", "100"], rows=3)
+    assert profiler.profile("INTEGER", (9, 100)).min_value == "9"
+    assert profiler.profile("STRING").min_value == "10"  # lexical
+    assert profiler.profile("BOOLEAN").min_value is None
@@ -0,0 +1,92 @@
+"""Tests for caching project definitions between requests."""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import registry_cache as registry_cache_module
+from app.services import workspace
+from app.services.registry_cache import RegistryCache, _on_notify
+
+
+class _Session:
+    """A request session that remembers what was expunged."""
+
+    def __init__(self, source) -> None:
+        self.source = source
+        self.expunged = []
+
+    def expunge(self, obj) -> None:
+        self.expunged.append(obj)
+
+
+@pytest.fixture
+def cache(monkeypatch) -> RegistryCache:
+    cache = RegistryCache(ttl_seconds=60)
+    cache.listening = True
+    monkeypatch.setattr(workspace, "registry_cache", cache)
+    monkeypatch.setattr(registry_cache_module, "registry_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list:
+    calls = []
+
+    async def load_project(db, source_id):
+        calls.append(source_id)
+        return db.source
+
+    monkeypatch.setattr(workspace, "load_project", load_project)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_hits_skip_the_database_until_invalidated(cache, loads):
+    source_id = uuid.uuid4()
+    db = _Session(SimpleNamespace(id=source_id, columns=[]))
+
+    first = await workspace.get_project_info(db, source_id)
+    second = await workspace.get_project_info(db, source_id)
+    assert first is second is db.source
+    assert db.expunged == [db.source]
+    assert loads == [source_id]
+
+    _on_notify(None, 0, registry_cache_module.REGISTRY_CHANNEL, str(source_id))
+    await workspace.get_project_info(db, source_id)
+    assert loads == [source_id, source_id]
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_a_read_racing_a_change_is_not_cached(cache, loads, monkeypatch):
+    source_id = uuid.uuid4()
+    db = _Session(SimpleNamespace(id=source_id, columns=[]))
+
+    async def load_during_change(db, source_id):
+        cache.invalidate(source_id)  # the change commits while the old row is read
+        return db.source
+
+    monkeypatch.setattr(workspace, "load_project", load_during_change)
+    assert await workspace.get_project_info(db, source_id) is db.source
+    assert cache.get(source_id) is None
+    assert db.expunged == []
+
+
+def test_nothing_is_cached_without_the_listener_or_after_the_ttl(monkeypatch):
+    source_id, source = uuid.uuid4(), object()
+    cache = RegistryCache(ttl_seconds=60)
+    assert not cache.put(source_id, cache.version(source_id), source)
+
+    cache.listening = True
+    clock = [100.0]
+    monkeypatch.setattr(registry_cache_module.time, "monotonic", lambda: clock[0])
+    assert cache.put(source_id, cache.version(source_id), source)
+    assert cache.get(source_id) is source
+    clock[0] += 60
+    assert cache.get(source_id) is None
+
+    version = cache.version(source_id)
+    cache.clear()  # the listener reconnected: anything read before may be stale
+    assert not cache.put(source_id, version, source)
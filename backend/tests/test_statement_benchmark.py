@@ -0,0 +1,79 @@
+"""Benchmark: per-request vs prebuilt statements for ``/records/{id}``.
+
+Run with ``pytest -s tests/test_statement_benchmark.py`` to see the
+timing report.  Each lookup goes through SQLAlchemy's compiled cache, as
+an engine would run it, but no database: this measures what the API
+process spends per request on the statement.  Against PostgreSQL the
+prebuilt statement also runs prepared, skipping parse and plan.  The
+assertions only check that both paths agree, so the test is stable on
+slow CI runners.
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.services import workspace
+from app.services.statements import StatementRegistry
+
+_LOOKUPS = 20_000
+_COLUMNS = 40
+
+
+class _CompilingSession:
+    """Compiles each statement through a compiled cache, as the engine does."""
+
+    def __init__(self, row: dict) -> None:
+        self._dialect = asyncpg_dialect()
+        self._cache: dict = {}
+        self._row = row
+        self.sql = set()
+
+    async def execute(self, stmt, params):
+        compiled, *_ = stmt._compile_w_cache(
+            self._dialect, compiled_cache=self._cache, column_keys=sorted(params)
+        )
+        self.sql.add(compiled.string)
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(first=lambda: self._row))
+
+
+async def _fetch_record_by_id_as_it_was(db, source, record_id: int) -> dict | None:
+    table_name = source.table_name
+    query = text(f'SELECT * FROM "{table_name}" WHERE id = :record_id')
+    result = await db.execute(query, {"record_id": record_id})
+    row = result.mappings().first()
+    return dict(row) if row else None
+
+
+async def _lookups(fetch, source, row: dict) -> tuple[float, _CompilingSession, dict | None]:
+    db = _CompilingSession(row)
+    start = time.perf_counter()
+    for record_id in range(_LOOKUPS):
+        found = await fetch(db, source, record_id)
+    return time.perf_counter() - start, db, found
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_vs_per_request_record_lookup(monkeypatch):
+    monkeypatch.setattr(workspace, "statement_registry", StatementRegistry(max_projects=8, max_inserts=8))
+    columns = [
+        SimpleNamespace(physical_name=f"col_{i}", sql_type="TEXT") for i in range(_COLUMNS)
+    ]
+    source = SimpleNamespace(id=uuid.uuid4(), table_name="src_bench", columns=columns)
+    row = {"id": 1, **{c.physical_name: "x" for c in columns}}
+
+    old_time, old_db, old_row = await _lookups(_fetch_record_by_id_as_it_was, source, row)
+    new_time, new_db, new_row = await _lookups(workspace.fetch_record_by_id, source, row)
+
+    print(
+        f"\n{_LOOKUPS:,} lookups | per-request: {old_time / _LOOKUPS * 1e6:,.1f} us "
+        f"| prebuilt: {new_time / _LOOKUPS * 1e6:,.1f} us | speedup x{old_time / new_time:.2f}"
+    )
+    assert new_row == old_row
+    (new_sql,) = new_db.sql
+    assert "SELECT *" not in new_sql
+    assert len(old_db.sql) == 1
@@ -0,0 +1,90 @@
+"""Tests for the per-project statement registry."""
+
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.services import registry_cache
+from app.services.statements import StatementRegistry
+
+
+def _source(
+    *columns: tuple[str, str], table_name: str = "src_test", source_id: int = 1
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.UUID(int=source_id),
+        table_name=table_name,
+        columns=[SimpleNamespace(physical_name=p, sql_type=t) for p, t in columns],
+    )
+
+
+def test_project_statements_list_registry_columns_and_are_reused():
+    registry = StatementRegistry(max_projects=8, max_inserts=8)
+    source = _source(("name", "TEXT"), ("amount", "REAL"))
+
+    built = registry.for_project(source)
+    assert str(built.by_id).endswith(
+        'SELECT "id", "name", "amount" FROM "src_test" WHERE "id" = :record_id'
+    )
+    pages = built.pages("amount")
+    assert str(pages.after).endswith(
+        'WHERE ("amount", "id") > (CAST(CAST(:after AS TEXT) AS REAL), :after_id)'
+        ' ORDER BY "amount", "id" LIMIT :limit'
+    )
+    assert built.pages("amount") is pages
+    assert built.pages("id").after_null is None
+    assert registry.for_project(source) is built
+    assert registry.stats()["builds"] == 1
+
+
+def test_changed_project_gets_statements_the_driver_prepares_afresh():
+    registry = StatementRegistry(max_projects=8, max_inserts=8)
+    dialect = asyncpg_dialect()
+    first = registry.for_project(_source(("amount", "REAL")))
+    first_sql = first.by_id.compile(dialect=dialect).string
+
+    # A retyped column keeps its name.  asyncpg caches prepared statements
+    # by their SQL, so the new version's SQL must differ to be prepared
+    # against the altered table.
+    retyped = registry.for_project(_source(("amount", "DOUBLE PRECISION")))
+    retyped_sql = retyped.by_id.compile(dialect=dialect).string
+    assert retyped is not first
+    assert retyped_sql != first_sql
+    assert retyped_sql.endswith('FROM "src_test" WHERE "id" = $1')
+
+    # The same version, built in another process, has the same SQL.
+    again = StatementRegistry(max_projects=8, max_inserts=8)
+    again = again.for_project(_source(("amount", "REAL")))
+    assert again.by_id.compile(dialect=dialect).string == first_sql
+
+
+def test_insert_statements_are_shared_and_bounded():
+    registry = StatementRegistry(max_projects=8, max_inserts=2)
+    stmt = registry.insert("src_a", ["x"], ["INTEGER"])
+    assert registry.insert("src_a", ["x"], ["INTEGER"]) is stmt
+    assert str(stmt) == 'INSERT INTO "src_a" ("x") SELECT * FROM unnest(CAST(:c0 AS INTEGER[]))'
+
+    queued = registry.insert("src_a", ["x"], ["INTEGER"], enqueue=True)
+    assert queued is not stmt and "INSERT INTO record_queue" in str(queued)
+
+    registry.insert("src_b", ["x"], ["INTEGER"])
+    assert registry.stats()["inserts"] == 2
+    assert registry.insert("src_a", ["x"], ["INTEGER"]) is not stmt  # evicted
+
+
+def test_project_statements_are_bounded_and_dropped_with_the_registry_entry(monkeypatch):
+    registry = StatementRegistry(max_projects=2, max_inserts=8)
+    monkeypatch.setattr(registry_cache, "statement_registry", registry)
+    first = registry.for_project(_source(("x", "TEXT"), source_id=1))
+    registry.for_project(_source(("x", "TEXT"), source_id=2))
+    registry.for_project(_source(("x", "TEXT"), source_id=1))  # most recently used
+    registry.for_project(_source(("x", "TEXT"), source_id=3))
+    assert registry.stats()["projects"] == 2
+    assert registry.for_project(_source(("x", "TEXT"), source_id=1)) is first
+
+    # The NOTIFY handler invalidates the registry cache, and with it these.
+    registry_cache._on_notify(None, 0, registry_cache.REGISTRY_CHANNEL, str(uuid.UUID(int=1)))
+    assert registry.for_project(_source(("x", "TEXT"), source_id=1)) is not first
+    registry_cache.registry_cache.clear()
+    assert registry.stats()["projects"] == 0
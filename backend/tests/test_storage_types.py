@@ -0,0 +1,93 @@
+"""Tests for choosing compact SQL types and laying out project tables."""
+
+from datetime import datetime
+
+import pytest
+
+from app.schemas.schema_inference import ColumnProfile, FinalizedColumn, TopValue
+from app.services.storage_types import (
+    column_width,
+    compact_type,
+    row_bytes,
+    storage_order,
+    value_limit,
+)
+
+
+def _col(data_type: str, *, date_format=None, is_unique_id=False, **profile) -> FinalizedColumn:
+    profile.setdefault("null_rate", 0.0)
+    profile.setdefault("distinct_count", 100)
+    profile.setdefault("max_length", 8)
+    profile.setdefault("top_values", [])
+    return FinalizedColumn(
+        original_name="c",
+        display_name="C",
+        data_type=data_type,
+        is_unique_id=is_unique_id,
+        date_format=date_format,
+        profile=ColumnProfile(**profile),
+    )
+
+
+def _labels(*counts: tuple[str, int]) -> dict:
+    return {
+        "distinct_count": len(counts),
+        "max_length": max(len(v) for v, _ in counts),
+        "top_values": [TopValue(value=v, count=c) for v, c in counts],
+    }
+
+
+@pytest.mark.parametrize(
+    "col, expected",
+    [
+        (_col("INTEGER", min_value="0", max_value="500"), "SMALLINT"),
+        (_col("INTEGER", min_value="0", max_value="500", is_unique_id=True), "INTEGER"),
+        (_col("INTEGER", min_value="-9000", max_value="20"), "INTEGER"),
+        (_col("INTEGER", min_value="0", max_value="900000000"), "BIGINT"),
+        (_col("FLOAT", min_value="0.5", max_value="99.99", max_length=5), "REAL"),
+        (_col("FLOAT", min_value="0.5", max_value="99.12345", max_length=8), "DOUBLE PRECISION"),
+        (_col("DATE", date_format="%m/%d/%Y"), "DATE"),
+        (_col("DATE", date_format="%m/%d/%Y %H:%M"), "TIMESTAMP"),
+        (_col("DATE", date_format="ISO8601", max_length=10), "DATE"),
+        (_col("DATE", date_format="ISO8601", max_length=19), "TIMESTAMP"),
+        (_col("STRING", **_labels(("Open", 40), ("Closed", 25), ("Pending", 10))), '"enm_t_c"'),
+        (_col("STRING", **_labels(("Y", 40), ("N", 25))), "TEXT"),  # no smaller as an enum
+        (_col("STRING", **_labels(("note one", 1), ("note two", 1))), "TEXT"),  # not repeated
+        (_col("STRING", max_length=30), "TEXT"),  # more values than the profile lists
+    ],
+)
+def test_compact_type_follows_the_profile(col, expected):
+    wide = {"INTEGER": "BIGINT", "FLOAT": "DOUBLE PRECISION", "DATE": "TIMESTAMP"}
+    sql_type, labels = compact_type(col, wide.get(col.data_type, "TEXT"), "enm_t_c")
+    assert sql_type == expected
+    assert labels == (["Closed", "Open", "Pending"] if expected.startswith('"') else [])
+
+
+def test_storage_order_removes_padding():
+    # id BIGINT, then as uploaded: BOOLEAN, BIGINT, TEXT(5), INTEGER, SMALLINT, DATE.
+    widths = [
+        column_width(t, 5) for t in ("BOOLEAN", "BIGINT", "TEXT", "INTEGER", "SMALLINT", "DATE")
+    ]
+    id_width = column_width("BIGINT", 0)
+    assert row_bytes([id_width, *widths]) == 8 + 1 + 7 + 8 + 6 + 2 + 4 + 2 + 2 + 4
+    ordered = [widths[i] for i in storage_order(widths)]
+    assert ordered == [(8, 8), (4, 4), (4, 4), (2, 2), (1, 1), (6, 1)]
+    assert row_bytes([id_width, *ordered]) == 8 + 8 + 4 + 4 + 2 + 1 + 6
+
+
+def test_value_limits():
+    assert value_limit("BIGINT") is None and value_limit("TEXT") is None
+    assert value_limit("SMALLINT").refuses(40_000)
+    assert not value_limit("INTEGER").refuses(40_000)
+    assert value_limit('"enm_t_c"').refuses("x" * 64)
+
+
+def test_real_and_date_limits_refuse_values_they_would_change():
+    real = value_limit("REAL")
+    assert not real.refuses(0.1) and not real.refuses(1234.5) and not real.refuses(0.5)
+    assert real.refuses(1234.5678) and real.refuses(98765.4321)
+    assert real.refuses(float("inf"))
+
+    date_only = value_limit("DATE")
+    assert not date_only.refuses(datetime(2024, 3, 1))
+    assert date_only.refuses(datetime(2024, 3, 1, 9, 30))
@@ -0,0 +1,94 @@
+"""Tests for keyset pagination of project records."""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql.elements import TextClause
+
+from app.services import workspace
+from app.services.statements import StatementRegistry
+
+
+class _Session:
+    """Answers each page query with the next canned rows, and records it."""
+
+    def __init__(self, *pages: list[dict], indexed: bool = True) -> None:
+        self.pages = list(pages)
+        self.indexed = indexed
+        self.queries = []
+
+    async def execute(self, stmt, params=None):
+        if not isinstance(stmt, TextClause):  # the index lookup
+            return SimpleNamespace(first=lambda: (1,) if self.indexed else None)
+        self.queries.append((str(stmt), params))
+        rows = self.pages.pop(0)
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: rows))
+
+
+@pytest.fixture
+def source(monkeypatch) -> SimpleNamespace:
+    monkeypatch.setattr(workspace, "statement_registry", StatementRegistry(max_projects=8, max_inserts=8))
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        table_name="src_test",
+        columns=[SimpleNamespace(physical_name="region", sql_type="TEXT")],
+    )
+
+
+@pytest.mark.asyncio
+async def test_pages_by_id_continue_after_the_last_row(source):
+    db = _Session(
+        [{"id": 1, "region": "a"}, {"id": 2, "region": "b"}, {"id": 3, "region": "c"}],
+        [{"id": 3, "region": "c"}],
+    )
+    rows, cursor = await workspace.fetch_records(db, source, limit=2)
+    assert [r["id"] for r in rows] == [1, 2]
+    assert db.queries[0][1] == {"limit": 3}
+
+    rows, cursor = await workspace.fetch_records(db, source, limit=2, cursor=cursor)
+    assert [r["id"] for r in rows] == [3] and cursor is None
+    sql, params = db.queries[1]
+    assert 'WHERE "id" > :after_id ORDER BY "id"' in sql and "OFFSET" not in sql
+    assert params == {"after_id": 2, "limit": 3}
+
+
+@pytest.mark.asyncio
+async def test_column_pages_run_on_into_null_values(source):
+    db = _Session(
+        [{"id": 7, "region": "east"}, {"id": 4, "region": "west"}, {"id": 5, "region": "west"}],
+        [{"id": 5, "region": "west"}],
+        [{"id": 2, "region": None}, {"id": 9, "region": None}],
+        [{"id": 9, "region": None}],
+    )
+    rows, cursor = await workspace.fetch_records(db, source, limit=2, order_by="region")
+    assert [r["id"] for r in rows] == [7, 4]
+
+    # The non-NULL values run out mid-page; the page carries on with the NULLs.
+    rows, cursor = await workspace.fetch_records(
+        db, source, limit=2, order_by="region", cursor=cursor
+    )
+    assert [r["id"] for r in rows] == [5, 2]
+    assert db.queries[1][1] == {"after": "west", "after_id": 4, "limit": 3}
+    assert db.queries[2][1] == {"after_id": 0, "limit": 2}
+
+    rows, cursor = await workspace.fetch_records(
+        db, source, limit=2, order_by="region", cursor=cursor
+    )
+    assert [r["id"] for r in rows] == [9] and cursor is None
+    assert '"region" IS NULL AND "id" > :after_id' in db.queries[3][0]
+    assert db.queries[3][1] == {"after_id": 2, "limit": 3}
+
+
+@pytest.mark.asyncio
+async def test_bad_orders_and_cursors_are_refused(source):
+    with pytest.raises(ValueError, match="no built index"):
+        await workspace.fetch_records(_Session(indexed=False), source, order_by="region")
+    with pytest.raises(ValueError, match="Unknown column"):
+        await workspace.fetch_records(_Session(), source, order_by="missing")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await workspace.fetch_records(_Session(), source, cursor="not-a-cursor")
+
+    other = workspace._encode_cursor("region", "west", 4)
+    with pytest.raises(ValueError, match="ordered by 'region'"):
+        await workspace.fetch_records(_Session(), source, cursor=other)
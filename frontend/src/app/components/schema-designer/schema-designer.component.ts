@@ -1,5 +1,6 @@
-import { Component } from '@angular/core';
+import { Component, OnDestroy } from '@angular/core';
 import { CommonModule } from '@angular/common';
+import { Subscription, interval, switchMap, takeWhile } from 'rxjs';
 import {
   ReactiveFormsModule,
   FormArray,
@@ -14,7 +15,7 @@ import {
   DataType,
   FinalizedColumn,
   ProvisionResponse,
-  DataLoadResponse,
+  LoadJobResponse,
 } from '../../models/schema.models';
 
 @Component({
@@ -24,11 +25,13 @@ import {
   templateUrl: './schema-designer.component.html',
   styleUrl: './schema-designer.component.css',
 })
-export class SchemaDesignerComponent {
+export class SchemaDesignerComponent implements OnDestroy {
   dataTypes: DataType[] = ['STRING', 'INTEGER', 'FLOAT', 'BOOLEAN', 'DATE'];
   step: 'upload' | 'design' | 'provisioned' | 'loaded' = 'upload';
   filename = '';
   rowCount = 0;
+  /** Project whose schema was reused because the file has the same columns. */
+  matchedProjectName: string | null = null;
   isLoading = false;
   error = '';
 
@@ -38,7 +41,11 @@ export class SchemaDesignerComponent {
   projectForm: FormGroup;
   columnsForm: FormArray;
   provisionResult: ProvisionResponse | null = null;
-  loadResult: DataLoadResponse | null = null;
+  loadResult: LoadJobResponse | null = null;
+  /** Latest progress of the running load job. */
+  loadJob: LoadJobResponse | null = null;
+
+  private pollSub: Subscription | null = null;
 
   constructor(
     private api: ApiService,
@@ -65,12 +72,13 @@ export class SchemaDesignerComponent {
       next: (response) => {
         this.filename = response.filename;
         this.rowCount = response.row_count;
+        this.matchedProjectName = response.matched_project_name;
         this.buildFormFromInference(response.columns);
         this.step = 'design';
         this.isLoading = false;
       },
       error: (err) => {
-        this.error = err.error?.detail || 'Failed to analyze CSV file.';
+        this.error = err.error?.detail || 'Failed to analyze file.';
         this.isLoading = false;
       },
     });
@@ -85,6 +93,9 @@ export class SchemaDesignerComponent {
           displayName: [col.suggested_display_name, Validators.required],
           dataType: [col.inferred_type, Validators.required],
           isUniqueId: [col.is_primary_key_candidate],
+          isIndexed: [false],
+          dateFormat: [col.date_format],
+          profile: [col.profile],
         })
       );
     }
@@ -103,6 +114,9 @@ export class SchemaDesignerComponent {
         display_name: ctrl.get('displayName')!.value,
         data_type: ctrl.get('dataType')!.value,
         is_unique_id: ctrl.get('isUniqueId')!.value,
+        is_indexed: ctrl.get('isIndexed')!.value,
+        date_format: ctrl.get('dateFormat')!.value,
+        profile: ctrl.get('profile')!.value,
       })
     );
 
@@ -146,11 +160,7 @@ export class SchemaDesignerComponent {
     this.error = '';
 
     this.api.loadData(this.provisionResult.source_id, file).subscribe({
-      next: (result) => {
-        this.loadResult = result;
-        this.step = 'loaded';
-        this.isLoading = false;
-      },
+      next: (job) => this.pollLoadJob(job),
       error: (err) => {
         this.error = err.error?.detail || 'Data loading failed.';
         this.isLoading = false;
@@ -158,6 +168,38 @@ export class SchemaDesignerComponent {
     });
   }
 
+  /** The load runs in the background; poll until it finishes. */
+  private pollLoadJob(job: LoadJobResponse): void {
+    this.loadJob = job;
+    this.pollSub?.unsubscribe();
+    this.pollSub = interval(1_000)
+      .pipe(
+        switchMap(() => this.api.getLoadJob(job.job_id)),
+        takeWhile((j) => j.status === 'queued' || j.status === 'running', true)
+      )
+      .subscribe({
+        next: (j) => {
+          this.loadJob = j;
+          if (j.status === 'completed') {
+            this.loadResult = j;
+            this.step = 'loaded';
+            this.isLoading = false;
+          } else if (j.status === 'failed') {
+            this.error = j.error_message || 'Data loading failed.';
+            this.isLoading = false;
+          }
+        },
+        error: (err) => {
+          this.error = err.error?.detail || 'Lost track of the data load.';
+          this.isLoading = false;
+        },
+      });
+  }
+
+  ngOnDestroy(): void {
+    this.pollSub?.unsubscribe();
+  }
+
   /** Auto-enqueue after data load. */
   enqueueNow(): void {
     if (!this.provisionResult) return;
@@ -181,6 +223,8 @@ export class SchemaDesignerComponent {
     this.originalFile = null;
     this.provisionResult = null;
     this.loadResult = null;
+    this.loadJob = null;
+    this.pollSub?.unsubscribe();
     this.columnsForm.clear();
     this.projectForm.reset();
   }
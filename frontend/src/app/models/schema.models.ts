@@ -1,14 +1,33 @@
+export interface TopValue {
+  value: string;
+  count: number;
+}
+
+export interface ColumnProfile {
+  null_rate: number;
+  distinct_count: number;
+  min_value: string | null;
+  max_value: string | null;
+  max_length: number;
+  top_values: TopValue[];
+}
+
 export interface InferredColumn {
   original_name: string;
   inferred_type: DataType;
   suggested_display_name: string;
   is_primary_key_candidate: boolean;
+  date_format: string | null;
+  profile: ColumnProfile | null;
 }
 
 export interface SchemaInferenceResponse {
   filename: string;
   row_count: number;
   columns: InferredColumn[];
+  matched_source_id: string | null;
+  matched_project_name: string | null;
+  cached: boolean;
 }
 
 export type DataType = 'STRING' | 'INTEGER' | 'FLOAT' | 'BOOLEAN' | 'DATE';
@@ -18,12 +37,55 @@ export interface FinalizedColumn {
   display_name: string;
   data_type: DataType;
   is_unique_id: boolean;
+  is_indexed: boolean;
+  date_format: string | null;
+  profile: ColumnProfile | null;
+}
+
+export interface EvolvedColumn extends FinalizedColumn {
+  renamed_from?: string | null;
+}
+
+export interface SchemaEvolutionRequest {
+  columns: EvolvedColumn[];
+}
+
+export interface SchemaChangeResponse {
+  change_id: string;
+  source_id: string;
+  column: string;
+  from_type: DataType;
+  to_type: DataType;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  rows_done: number;
+  rows_failed: number;
+  error_message: string | null;
+  created_at: string | null;
+  finished_at: string | null;
+}
+
+export interface SchemaEvolutionResponse {
+  source_id: string;
+  added: string[];
+  renamed: Record<string, string>;
+  updated: string[];
+  indexes_added: string[];
+  indexes_dropped: string[];
+  type_changes: SchemaChangeResponse[];
 }
 
 export interface ProvisionRequest {
   project_name: string;
   screen_pop_url_template: string | null;
   columns: FinalizedColumn[];
+  partitioning?: PartitionSpec | null;
+}
+
+export interface PartitionSpec {
+  strategy: 'range' | 'hash';
+  column: string;
+  interval?: 'month' | 'year';
+  partitions?: number;
 }
 
 export interface ProvisionResponse {
@@ -31,11 +93,76 @@ export interface ProvisionResponse {
   table_name: string;
   source_id: string;
   column_count: number;
+  indexes: IndexInfo[];
+  partitions: string[];
+  column_types: Record<string, string>;
+  estimated_row_bytes: number;
+  estimated_row_bytes_saved: number;
+}
+
+export interface IndexInfo {
+  index_name: string;
+  column: string;
+  unique: boolean;
+  status: 'pending' | 'ready' | 'failed';
+  error: string | null;
+}
+
+export type LoadJobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface LoadJobResponse {
+  job_id: string;
+  source_id: string;
+  status: LoadJobStatus;
+  mode: 'append' | 'upsert' | 'replace';
+  enqueue: boolean;
+  filename: string;
+  total_bytes: number;
+  bytes_done: number;
+  percent_complete: number;
+  rows_done: number;
+  rows_loaded: number;
+  rows_inserted: number;
+  rows_updated: number;
+  rows_duplicate: number;
+  rows_unchanged: number;
+  rows_failed: number;
+  errors: string[];
+  load_method: 'copy' | 'insert' | null;
+  rows_per_second: number;
+  eta_seconds: number | null;
+  error_message: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+export interface RejectedRow {
+  id: number;
+  load_job_id: string | null;
+  row_num: number;
+  column_name: string | null;
+  reason: string;
+  raw_record: Record<string, string>;
+  rejected_at: string;
+}
+
+export interface RejectsPage {
+  source_id: string;
+  total: number;
+  rejects: RejectedRow[];
 }
 
-export interface DataLoadResponse {
+export interface RejectRetryResponse {
   source_id: string;
+  mode: 'append' | 'upsert';
+  rows_retried: number;
   rows_loaded: number;
+  rows_inserted: number;
+  rows_updated: number;
+  rows_duplicate: number;
+  rows_unchanged: number;
   rows_failed: number;
   errors: string[];
+  load_method: 'copy' | 'insert';
 }
@@ -18,6 +18,11 @@ export interface TaskRecord {
   screen_pop_url: string | null;
 }
 
+export interface RecordPage {
+  records: TaskRecord[];
+  next_cursor: string | null;
+}
+
 export interface EnqueueResponse {
   source_id: string;
   records_enqueued: number;
@@ -7,11 +7,14 @@ import {
   SchemaInferenceResponse,
   ProvisionRequest,
   ProvisionResponse,
-  DataLoadResponse,
+  LoadJobResponse,
+  RejectsPage,
+  RejectRetryResponse,
 } from '../models/schema.models';
 import {
   ProjectInfo,
   TaskRecord,
+  RecordPage,
   EnqueueResponse,
   QueueStatsResponse,
   NextTaskResponse,
@@ -38,11 +41,14 @@ export class ApiService {
   // --- Schema ---
 
   inferSchema(file: File): Observable<SchemaInferenceResponse> {
-    const formData = new FormData();
-    formData.append('file', file);
+    // Raw body: the server reads only the sample rows it needs.
     return this.http.post<SchemaInferenceResponse>(
-      `${this.base}/schema/infer`,
-      formData
+      `${this.base}/schema/infer/stream`,
+      file,
+      {
+        params: new HttpParams().set('filename', file.name),
+        headers: { 'Content-Type': 'application/octet-stream' },
+      }
     );
   }
 
@@ -55,12 +61,43 @@ export class ApiService {
     );
   }
 
-  loadData(sourceId: string, file: File): Observable<DataLoadResponse> {
+  loadData(sourceId: string, file: File, enqueue = false): Observable<LoadJobResponse> {
     const formData = new FormData();
     formData.append('file', file);
-    return this.http.post<DataLoadResponse>(
+    const params = enqueue ? new HttpParams().set('enqueue', true) : undefined;
+    return this.http.post<LoadJobResponse>(
       `${this.base}/schema/${sourceId}/load`,
-      formData
+      formData,
+      { params }
+    );
+  }
+
+  getLoadJob(jobId: string): Observable<LoadJobResponse> {
+    return this.http.get<LoadJobResponse>(`${this.base}/schema/jobs/${jobId}`);
+  }
+
+  getRejects(
+    sourceId: string,
+    limit = 50,
+    offset = 0,
+    jobId?: string
+  ): Observable<RejectsPage> {
+    let params = new HttpParams().set('limit', limit).set('offset', offset);
+    if (jobId) {
+      params = params.set('job_id', jobId);
+    }
+    return this.http.get<RejectsPage>(
+      `${this.base}/schema/${sourceId}/rejects`,
+      { params }
+    );
+  }
+
+  retryRejects(sourceId: string, jobId?: string): Observable<RejectRetryResponse> {
+    const params = jobId ? new HttpParams().set('job_id', jobId) : undefined;
+    return this.http.post<RejectRetryResponse>(
+      `${this.base}/schema/${sourceId}/rejects/retry`,
+      null,
+      { params }
     );
   }
 
@@ -79,12 +116,16 @@ export class ApiService {
   getRecords(
     sourceId: string,
     limit = 50,
-    offset = 0
-  ): Observable<TaskRecord[]> {
-    const params = new HttpParams()
+    orderBy = 'id',
+    cursor: string | null = null
+  ): Observable<RecordPage> {
+    let params = new HttpParams()
       .set('limit', limit)
-      .set('offset', offset);
-    return this.http.get<TaskRecord[]>(
+      .set('order_by', orderBy);
+    if (cursor) {
+      params = params.set('cursor', cursor);
+    }
+    return this.http.get<RecordPage>(
       `${this.base}/workspace/projects/${sourceId}/records`,
       { params }
     );